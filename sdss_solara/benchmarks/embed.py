@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from typing import Callable
+
+# the default baseline results, next to this module
+BASELINE = pathlib.Path(__file__).parent / "baseline.json"
+
+# file counts and pixel scales of the benchmark cases
+COUNTS = (1, 10, 50)
+SCALES = (1, 4)
+
+
+def timeit(func: Callable, repeat: int = 5, setup: Callable = None) -> dict:
+    """Time a function, running an optional untimed setup before each call"""
+    times = []
+    for __ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return {"min_s": min(times), "median_s": statistics.median(times), "repeat": repeat}
+
+
+def clear_caches():
+    """Clear the in-process caches and the sidecars, so each run reads and parses from disk"""
+    from sdss_solara.io.access import stat_cache
+    from sdss_solara.io.cache import spectrum_cache
+    from sdss_solara.io.paths import classify, get_cache_dir
+    from sdss_solara.io.probe import _probe
+    from sdss_solara.io.shared import shared_store
+
+    spectrum_cache.clear()
+    shared_store.clear()
+    stat_cache.clear()
+    classify.cache_clear()
+    _probe.cache_clear()
+    shutil.rmtree(get_cache_dir("sidecars"), ignore_errors=True)
+
+
+def clear_data(specviz):
+    """Remove all data from a jdaviz app"""
+    dc = specviz.app.data_collection
+    for label in list(dc.labels):
+        dc.remove(dc[label])
+
+
+def run_benchmarks(root: str, counts: tuple = COUNTS, scales: tuple = SCALES, repeat: int = 5) -> dict:
+    """Time the embed page loading path on synthetic SAS trees
+
+    Parameters
+    ----------
+    root : str
+        a directory to write the synthetic files and caches to
+    counts : tuple
+        the numbers of targets, each with one file of each product type
+    scales : tuple
+        the scale factors for the number of pixels per spectrum
+    repeat : int
+        the number of timing repeats
+
+    Returns
+    -------
+    dict
+        the timings of each benchmark case, by name
+    """
+    # keep the file caches in the temporary root, away from the user cache
+    os.environ["SAS_BASE_DIR"] = root
+    os.environ["SDSS_SOLARA_CACHE_DIR"] = os.path.join(root, "cache")
+    from sdss_solara.benchmarks.fixtures import make_tree
+    from sdss_solara.io.paths import get_specformat, make_label
+    from sdss_solara.io.stats import get_app_stats
+    from sdss_solara.pages import jdaviz_embed as je
+
+    results = {}
+    je.params.value = {"release": "IPL3"}
+
+    # time getting an app and rendering the first file, as the page does
+    tree = make_tree(os.path.join(root, "app"), 1)
+    je.filemap.value = {make_label(tree["mwmStar"][0]): tree["mwmStar"][0]}
+
+    def first_spectrum():
+        je.acquire_app()
+        asyncio.run(je.load_first(je.spec.value, next(iter(je.filemap.value))))
+
+    results["first_spectrum"] = timeit(first_spectrum, repeat=max(repeat // 2, 1), setup=clear_caches)
+    specviz = je.spec.value
+
+    for scale in scales:
+        tree = make_tree(os.path.join(root, f"x{scale}"), max(counts), scale=scale)
+        for kind in ("spec", "apStar", "mwmStar", "cube"):
+            path = tree[kind][0]
+            results[f"load_data[{kind},x{scale}]"] = timeit(
+                lambda: je.load_data(specviz, path, resize=True),
+                repeat=repeat,
+                setup=lambda: (clear_caches(), clear_data(specviz)),
+            )
+
+        for count in counts:
+            files = [f for k in ("spec", "apStar", "apVisit", "mwmStar", "mwmVisit") for f in tree[k][:count]]
+
+            # load a sample of up to 10 files, and recombine their stats each run
+            clear_data(specviz)
+            stats = get_app_stats(specviz)
+            stats.datasets.clear()
+            for f in files[:: max(len(files) // 10, 1)]:
+                je.load_data(specviz, f)
+            results[f"smart_resize[n={len(files)},x{scale}]"] = timeit(
+                lambda: je.smart_resize(specviz),
+                repeat=repeat,
+                setup=lambda: setattr(stats, "_combined", None),
+            )
+
+            if scale != scales[0]:
+                continue
+
+            results[f"get_specformat[n={len(files)}]"] = timeit(
+                lambda: [get_specformat(f) for f in files], repeat=repeat, setup=clear_caches
+            )
+            results[f"make_label[n={len(files)}]"] = timeit(
+                lambda: [make_label(f) for f in files], repeat=repeat, setup=clear_caches
+            )
+
+            def new_files():
+                clear_caches()
+                clear_data(specviz)
+                je.filemap.value = {}
+                je.parent_files.value = []
+                je.new_files.value = list(files)
+
+            results[f"consume_new_files[n={len(files)}]"] = timeit(
+                je.consume_new_files, repeat=repeat, setup=new_files
+            )
+
+    clear_data(specviz)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 2.0, min_delta: float = 0.005) -> list:
+    """Compare results to a baseline, returning the regressed benchmarks
+
+    A benchmark regresses when its median time is more than ``tolerance``
+    times the baseline median, and slower by over ``min_delta`` seconds, so
+    sub-millisecond timing noise is ignored.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        new, old = result["median_s"], base["median_s"]
+        if new > tolerance * old and new - old > min_delta:
+            regressions.append((name, old, new))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the embed page loading path")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="the number of timing repeats")
+    parser.add_argument("-c", "--counts", type=int, nargs="+", default=COUNTS, help="the numbers of targets")
+    parser.add_argument("-s", "--scales", type=int, nargs="+", default=SCALES, help="the spectrum size scales")
+    parser.add_argument("-b", "--baseline", default=str(BASELINE), help="the baseline results file")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("-t", "--tolerance", type=float, default=2.0, help="the allowed slowdown factor")
+    opts = parser.parse_args(args)
+
+    warnings.simplefilter("ignore")
+    with tempfile.TemporaryDirectory() as root:
+        results = run_benchmarks(root, tuple(opts.counts), tuple(opts.scales), opts.repeat)
+
+    baseline = {}
+    if os.path.exists(opts.baseline):
+        with open(opts.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    print(f"{'benchmark':<40} {'median':>10} {'baseline':>10}")
+    for name, result in results.items():
+        base = baseline.get(name, {}).get("median_s")
+        base = f"{base * 1e3:8.2f}ms" if base else f"{'-':>10}"
+        print(f"{name:<40} {result['median_s'] * 1e3:8.2f}ms {base}")
+
+    if opts.save:
+        with open(opts.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "results": results}, f, indent=2)
+        return
+
+    regressions = compare(results, baseline, opts.tolerance)
+    for name, base, new in regressions:
+        print(f"regression: {name} took {new * 1e3:.2f}ms, baseline {base * 1e3:.2f}ms")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
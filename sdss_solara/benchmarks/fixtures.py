@@ -0,0 +1,170 @@
+import pathlib
+
+import numpy as np
+from astropy.io import fits
+
+# number of pixels of each product, at size scale 1
+NPIX = {"spec": 4648, "apogee": 8575, "manga": 4563}
+
+# flux unit header, as written by the APOGEE pipeline
+APOGEE_BUNIT = "Flux (10^-17 erg/s/cm^2/Ang)"
+
+
+def _loglam(npix: int, start: float, step: float = 1e-4) -> np.ndarray:
+    """Get a log10 wavelength grid"""
+    return start + step * np.arange(npix)
+
+
+def _flux(rng: np.random.Generator, shape: tuple) -> np.ndarray:
+    """Get noisy continuum flux, with a few bright outliers"""
+    flux = rng.normal(10, 1, shape).astype("f4")
+    if flux.size:
+        flux.reshape(-1)[rng.integers(0, flux.size, 5)] = 1e4
+    return flux
+
+
+def make_spec(path: pathlib.Path, rng: np.random.Generator, npix: int):
+    """Write an SDSS-V BOSS spec file"""
+    table = fits.BinTableHDU.from_columns([
+        fits.Column(name="FLUX", format="E", array=_flux(rng, npix)),
+        fits.Column(name="LOGLAM", format="E", array=_loglam(npix, 3.55)),
+        fits.Column(name="IVAR", format="E", array=np.ones(npix)),
+        fits.Column(name="OR_MASK", format="J", array=np.zeros(npix)),
+    ], name="COADD")
+    primary = fits.PrimaryHDU(header=fits.Header({"TELESCOP": "SDSS 2.5-M", "VERS2D": "v6_1_3"}))
+    fits.HDUList([primary, table]).writeto(path, overwrite=True)
+
+
+def make_apstar(path: pathlib.Path, rng: np.random.Generator, npix: int, nvisits: int = 3):
+    """Write an SDSS-V apStar file"""
+    nrows = nvisits + 2 if nvisits > 1 else 1
+    wcs = {"CRVAL1": 4.179, "CDELT1": 6e-6}
+    primary = fits.PrimaryHDU(header=fits.Header({"APRED": "1.3", "NVISITS": nvisits}))
+    hdus = [
+        primary,
+        fits.ImageHDU(_flux(rng, (nrows, npix)), header=fits.Header(dict(wcs, BUNIT=APOGEE_BUNIT))),
+        fits.ImageHDU(np.ones((nrows, npix), "f4"), header=fits.Header(dict(wcs, BUNIT="Err " + APOGEE_BUNIT))),
+        fits.ImageHDU(np.zeros((nrows, npix), "i4")),
+    ]
+    hdus += [fits.ImageHDU() for __ in range(7)]
+    fits.HDUList(hdus).writeto(path, overwrite=True)
+
+
+def make_apvisit(path: pathlib.Path, rng: np.random.Generator, npix: int):
+    """Write an SDSS-V apVisit file, of 3 chips"""
+    shape = (3, npix // 3)
+    wave = np.sort(10 ** _loglam(shape[0] * shape[1], 4.179, 6e-6)).reshape(shape)[::-1]
+    primary = fits.PrimaryHDU(header=fits.Header({"SURVEY": "SDSS-V"}))
+    fits.HDUList([
+        primary,
+        fits.ImageHDU(_flux(rng, shape), header=fits.Header({"BUNIT": APOGEE_BUNIT})),
+        fits.ImageHDU(np.ones(shape, "f4"), header=fits.Header({"BUNIT": "Flux error"})),
+        fits.ImageHDU(np.zeros(shape, "i4")),
+        fits.ImageHDU(wave, header=fits.Header({"BUNIT": "Wavelength (Ang)"})),
+    ]).writeto(path, overwrite=True)
+
+
+def make_mwm(path: pathlib.Path, rng: np.random.Generator, npix: dict, sdssid: int, nvisits: int = 1):
+    """Write an SDSS-V mwmStar, or with nvisits > 1 an mwmVisit, file
+
+    The four HDUs hold BOSS/APO, BOSS/LCO, APOGEE/APO and APOGEE/LCO
+    spectra; the LCO HDUs are empty.
+    """
+    star = nvisits == 1
+    hdus = [fits.PrimaryHDU(header=fits.Header({"V_ASTRA": "0.6.0", "SDSS_ID": sdssid}))]
+    for name, instrument, size, start, step in [
+        ("BOSS/APO", "BOSS", npix["spec"], 3.55, 1e-4),
+        ("BOSS/LCO", "BOSS", 0, 3.55, 1e-4),
+        ("APOGEE/APO", "APOGEE", npix["apogee"], 4.179, 6e-6),
+        ("APOGEE/LCO", "APOGEE", 0, 4.179, 6e-6),
+    ]:
+        nrows = nvisits if size else 0
+        size = size or 1
+        cols = [
+            fits.Column(name="sdss_id", format="K", array=np.full(nrows, sdssid)),
+            fits.Column(name="telescope", format="6A", array=np.full(nrows, name[-3:].lower() + "25m")),
+            fits.Column(name="snr", format="E", array=np.full(nrows, 50.0)),
+            fits.Column(name="flux", format=f"{size}E", array=_flux(rng, (nrows, size))),
+            fits.Column(name="ivar", format=f"{size}E", array=np.ones((nrows, size))),
+            fits.Column(name="pixel_flags", format=f"{size}J", array=np.zeros((nrows, size))),
+        ]
+        if star:
+            cols += [
+                fits.Column(name="min_mjd", format="J", array=np.full(nrows, 59000)),
+                fits.Column(name="max_mjd", format="J", array=np.full(nrows, 60000)),
+            ]
+        else:
+            cols.append(fits.Column(name="mjd", format="J", array=np.arange(nrows) + 59000))
+        header = fits.Header({"INSTRMNT": instrument, "NPIXELS": size, "CRVAL": start, "CDELT": step})
+        hdu = fits.BinTableHDU.from_columns(cols, header=header, name=name.replace("/", "_"))
+        hdus.append(hdu)
+    fits.HDUList(hdus).writeto(path, overwrite=True, checksum=True)
+
+
+def make_manga_cube(path: pathlib.Path, rng: np.random.Generator, npix: int, size: int = 34):
+    """Write a MaNGA LOGCUBE file"""
+    shape = (npix, size, size)
+    primary = fits.PrimaryHDU(header=fits.Header({"TELESCOP": "SDSS 2.5-M"}))
+    flux_header = fits.Header({"INSTRUME": "MaNGA", "BUNIT": "1E-17 erg/s/cm^2/Ang/spaxel"})
+    fits.HDUList([
+        primary,
+        fits.ImageHDU(_flux(rng, shape), header=flux_header, name="FLUX"),
+        fits.ImageHDU(np.ones(shape, "f4"), name="IVAR"),
+        fits.ImageHDU(np.zeros(shape, "i4"), name="MASK"),
+        fits.ImageHDU(10 ** _loglam(npix, 3.5563), name="WAVE"),
+    ]).writeto(path, overwrite=True)
+
+
+def make_tree(root: str, ntargets: int = 1, scale: float = 1.0, cube: bool = True, seed: int = 42) -> dict:
+    """Write a synthetic SAS tree of SDSS-V products, and a MaNGA cube
+
+    Parameters
+    ----------
+    root : str
+        the directory to use as the SAS_BASE_DIR
+    ntargets : int
+        the number of targets, with one of each product per target
+    scale : float
+        a scale factor for the number of pixels of each spectrum
+    cube : bool
+        whether to write a MaNGA cube
+    seed : int
+        the random seed
+
+    Returns
+    -------
+    dict
+        the list of file paths of each product type
+    """
+    root = pathlib.Path(root)
+    rng = np.random.default_rng(seed)
+    npix = {k: max(int(v * scale), 30) for k, v in NPIX.items()}
+    ipl = root / "ipl-3" / "spectro"
+    files = {k: [] for k in ("spec", "apStar", "apVisit", "mwmStar", "mwmVisit", "cube")}
+
+    for i in range(ntargets):
+        sdssid = 100000 + i
+        paths = {
+            "spec": ipl / f"boss/redux/v6_1_3/spectra/lite/015000/59000/spec-015000-59000-{sdssid}.fits",
+            "apStar": ipl / f"apogee/redux/1.3/stars/apo25m/{i % 100:02d}/apStar-1.3-apo25m-2M{sdssid:08d}.fits",
+            "apVisit": ipl / f"apogee/redux/1.3/visit/apo25m/{i % 100:02d}/apVisit-1.3-apo25m-5000-59000-{sdssid}.fits",
+            "mwmStar": ipl / f"astra/0.6.0/spectra/star/{i % 100:02d}/mwmStar-0.6.0-{sdssid}.fits",
+            "mwmVisit": ipl / f"astra/0.6.0/spectra/visit/{i % 100:02d}/mwmVisit-0.6.0-{sdssid}.fits",
+        }
+        for path in paths.values():
+            path.parent.mkdir(parents=True, exist_ok=True)
+        make_spec(paths["spec"], rng, npix["spec"])
+        make_apstar(paths["apStar"], rng, npix["apogee"])
+        make_apvisit(paths["apVisit"], rng, npix["apogee"])
+        make_mwm(paths["mwmStar"], rng, npix, sdssid)
+        make_mwm(paths["mwmVisit"], rng, npix, sdssid, nvisits=3)
+        for key, path in paths.items():
+            files[key].append(path.as_posix())
+
+    if cube:
+        path = root / "dr17/manga/spectro/redux/v3_1_1/8485/stack/manga-8485-1901-LOGCUBE.fits"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        make_manga_cube(path, rng, npix["manga"])
+        files["cube"].append(path.as_posix())
+
+    return files
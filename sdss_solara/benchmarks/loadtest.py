@@ -0,0 +1,420 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import psutil
+
+# the product types of each synthetic target, grouped as Valis returns them
+PIPELINES = {"boss": ("spec",), "apogee": ("apStar", "apVisit"), "astra": ("mwmStar", "mwmVisit")}
+
+# the first sdss_id of the synthetic targets
+FIRST_SDSSID = 100000
+
+
+def make_targets(root: str, ntargets: int = 4, scale: float = 1.0) -> dict:
+    """Write a synthetic SAS tree, returning the Valis pipeline files of each target"""
+    from sdss_solara.benchmarks.fixtures import make_tree
+
+    tree = make_tree(root, ntargets, scale=scale, cube=False)
+    return {
+        str(FIRST_SDSSID + i): {k: [tree[kind][i] for kind in kinds] for k, kinds in PIPELINES.items()}
+        for i in range(ntargets)
+    }
+
+
+class ValisStub(ThreadingHTTPServer):
+    """A local stand-in for the Valis API, answering ``/target/pipelines/{sdssid}``
+
+    Parameters
+    ----------
+    targets : dict
+        the pipeline files of each sdss_id, by pipeline
+    port : int
+        the port to listen on, or 0 for any free port
+    """
+
+    daemon_threads = True
+
+    def __init__(self, targets: dict, port: int = 0):
+        self.targets = targets
+        self.requests = 0
+        super().__init__(("127.0.0.1", port), _ValisHandler)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "ValisStub":
+        """Serve in a background thread"""
+        threading.Thread(target=self.serve_forever, daemon=True, name="valis-stub").start()
+        return self
+
+
+class _ValisHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # the client sends the release as a json body
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests += 1
+        prefix = "/target/pipelines/"
+        sdssid = self.path.split("?")[0][len(prefix):] if self.path.startswith(prefix) else None
+        files = self.server.targets.get(sdssid)
+        if files is None:
+            self._send(404, {"detail": f"sdss_id {sdssid} not found"})
+        else:
+            self._send(200, {"files": files})
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class ResourceSampler:
+    """Sample the memory and CPU time of a process and its children
+
+    Parameters
+    ----------
+    pid : int
+        the process to sample, defaulting to this process
+    interval : float
+        the sampling interval, in seconds
+    """
+
+    def __init__(self, pid: int = None, interval: float = 0.2):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _processes(self) -> list:
+        try:
+            return [self.process] + self.process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def rss(self) -> int:
+        """Get the total resident memory, in bytes"""
+        total = 0
+        for p in self._processes():
+            with contextlib.suppress(psutil.Error):
+                total += p.memory_info().rss
+        return total
+
+    def cpu(self) -> float:
+        """Get the total user and system CPU seconds"""
+        total = 0.0
+        for p in self._processes():
+            with contextlib.suppress(psutil.Error):
+                t = p.cpu_times()
+                total += t.user + t.system
+        return total
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self.rss())
+
+    def __enter__(self) -> "ResourceSampler":
+        self.start_rss, self.start_cpu, self.start_time = self.rss(), self.cpu(), time.perf_counter()
+        self.peak_rss = self.start_rss
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.end_rss, self.end_cpu, self.end_time = self.rss(), self.cpu(), time.perf_counter()
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, self.end_rss)
+
+    def summary(self, sessions: int) -> dict:
+        """Get the memory per session and the CPU use of the sampled run"""
+        wall = self.end_time - self.start_time
+        return {
+            "rss_start_mb": self.start_rss / 1024**2,
+            "rss_peak_mb": self.peak_rss / 1024**2,
+            "rss_per_session_mb": (self.end_rss - self.start_rss) / max(sessions, 1) / 1024**2,
+            "cpu_s": self.end_cpu - self.start_cpu,
+            "cpu_cores": (self.end_cpu - self.start_cpu) / wall if wall else 0.0,
+            "wall_s": wall,
+        }
+
+
+def percentiles(values: list) -> dict:
+    """Get the p50, p95 and p99 of a list of seconds"""
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_s": p50, "p95_s": p95, "p99_s": p99, "n": len(values)}
+
+
+async def _simulate_session(sdssid: str, release: str, update: list, timeout: float) -> dict:
+    """Drive one embed page session, within an event loop as in the server"""
+    from solara.server import kernel, kernel_context
+
+    from sdss_solara.components.message import event_handler, file_updates
+    from sdss_solara.pages import jdaviz_embed as je
+
+    context = kernel_context.VirtualKernelContext(
+        id=str(uuid.uuid4()), kernel=kernel.Kernel(), session_id=str(uuid.uuid4())
+    )
+    times = {"context": context}
+    with context:
+        # the Page query params, then the DataSelect and Jdaviz tasks
+        t0 = time.perf_counter()
+        je.params.value = {"sdssid": sdssid, "release": release}
+        je.find_files(sdssid, release, "", False)
+        je.create_shared_widgets()
+        je.acquire_app()
+        await je.load_first(je.spec.value, next(iter(je.filemap.value), None))
+        times["first_spectrum_s"] = time.perf_counter() - t0
+
+        # the parent page pushes its file list
+        t0 = time.perf_counter()
+        event_handler({"type": "updateFiles", "files": list(je.filemap.value.values()) + list(update or [])})
+        file_updates.value.flush()
+        je.consume_new_files()
+        times["update_files_s"] = time.perf_counter() - t0
+
+        # select all files and click "Load Data"
+        t0 = time.perf_counter()
+        je.selected.value = list(je.all_files.value)
+        je.load_selected()
+        deadline = time.monotonic() + timeout
+        while je.load_files.pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        times["load_data_s"] = time.perf_counter() - t0
+        times["error"] = repr(je.load_files.exception) if je.load_files.error else None
+        times["datasets"] = len(je.spec.value.app.data_collection)
+    return times
+
+
+def simulate_session(sdssid: str, release: str = "IPL3", update: list = None, timeout: float = 300) -> dict:
+    """Drive one embed page session in a new virtual kernel, as the browser would
+
+    Runs the functions of the page components in order: finds the target
+    files from Valis, acquires the app and loads the first spectrum, applies
+    an ``updateFiles`` message, and clicks "Load Data" for all files.  The
+    session is kept open, and closed by the caller.
+
+    Returns
+    -------
+    dict
+        the context, the seconds of each step and any loading error
+    """
+    return asyncio.run(_simulate_session(sdssid, release, update, timeout))
+
+
+def run_inprocess(targets: dict, sessions: int = 10, concurrency: int = 4, warmup: int = 1) -> dict:
+    """Simulate concurrent embed page sessions in this process
+
+    Each session runs in its own solara virtual kernel, so the per-session
+    state is isolated as in the server.  The sessions are held open until
+    all finish, to measure the memory of the live sessions.
+    """
+    # scope reactive state to each kernel context, as when served
+    import solara.server.starlette  # noqa: F401
+
+    ids = list(targets)
+    extra = [f for files in targets.values() for f in files["boss"]][:3]
+
+    def run(i):
+        return simulate_session(ids[i % len(ids)], update=extra)
+
+    for i in range(warmup):
+        run(i)["context"].close()
+
+    with ResourceSampler() as sampler, ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(run, range(sessions)))
+
+    for result in results:
+        with contextlib.suppress(Exception):
+            result.pop("context").close()
+
+    return {
+        "mode": "inprocess",
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "time_to_first_spectrum": percentiles([r["first_spectrum_s"] for r in results]),
+        "update_files": percentiles([r["update_files_s"] for r in results]),
+        "load_data": percentiles([r["load_data_s"] for r in results]),
+        "errors": [r["error"] for r in results if r["error"]],
+        "resources": sampler.summary(sessions),
+    }
+
+
+def free_port() -> int:
+    """Get a free local port"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def solara_server(env: dict, port: int = None, timeout: float = 120):
+    """Run ``solara run sdss_solara.pages.home`` in a subprocess, yielding its process and url"""
+    port = port or free_port()
+    cmd = [sys.executable, "-m", "solara", "run", "sdss_solara.pages.home",
+           "--host", "127.0.0.1", "--port", str(port), "--no-open", "--production"]
+    proc = subprocess.Popen(cmd, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", port), timeout=1):
+                break
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"solara server did not start: {' '.join(cmd)}")
+            time.sleep(0.5)
+        yield proc, f"http://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        with contextlib.suppress(subprocess.TimeoutExpired):
+            proc.wait(10)
+        if proc.poll() is None:
+            proc.kill()
+
+
+def browse_session(url: str, sdssid: str, files: list, update: list, selector: str, timeout: float) -> dict:
+    """Drive one embed page session in a headless browser"""
+    from playwright.sync_api import sync_playwright
+
+    from sdss_solara.components.message import get_update_delay
+    from sdss_solara.io.paths import make_label
+
+    times = {}
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch()
+        page = browser.new_page()
+        page.set_default_timeout(timeout * 1000)
+        try:
+            t0 = time.perf_counter()
+            page.goto(f"{url}/embed?sdssid={sdssid}&release=IPL3")
+            page.locator(selector.format(label=make_label(files[0]))).first.wait_for()
+            times["first_spectrum_s"] = time.perf_counter() - t0
+
+            # the parent page pushes its file list, applied once the burst settles
+            message = {"type": "updateFiles", "files": list(files) + list(update)}
+            page.evaluate("(m) => window.postMessage(m, '*')", message)
+            page.wait_for_timeout(1000 * (get_update_delay() + 0.5))
+
+            t0 = time.perf_counter()
+            button = page.get_by_role("button", name="Load Data")
+            button.click()
+            page.wait_for_function(
+                "() => [...document.querySelectorAll('button')]"
+                ".some(b => b.textContent.includes('Load Data') && !b.disabled)"
+            )
+            times["load_data_s"] = time.perf_counter() - t0
+        finally:
+            browser.close()
+    return times
+
+
+def run_browser(targets: dict, sas: str, sessions: int = 10, concurrency: int = 4, warmup: int = 1,
+                selector: str = "text={label}", timeout: float = 120) -> dict:
+    """Drive concurrent embed page sessions in headless browsers against a solara server
+
+    Requires playwright, with its chromium browser installed.  The server,
+    Valis stub and SAS tree all run locally.
+    """
+    stub = ValisStub(targets).start()
+    env = {"SAS_BASE_DIR": sas, "VALIS_API_URL": stub.url}
+    ids = list(targets)
+    extra = [f for files in targets.values() for f in files["boss"]][:3]
+
+    def run(i):
+        sdssid = ids[i % len(ids)]
+        files = sum(targets[sdssid].values(), [])
+        return browse_session(url, sdssid, files, extra, selector, timeout)
+
+    try:
+        with solara_server(env) as (proc, url):
+            for i in range(warmup):
+                run(i)
+            with ResourceSampler(proc.pid) as sampler, ThreadPoolExecutor(concurrency) as pool:
+                results = list(pool.map(run, range(sessions)))
+    finally:
+        stub.shutdown()
+
+    return {
+        "mode": "browser",
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "time_to_first_spectrum": percentiles([r["first_spectrum_s"] for r in results]),
+        "load_data": percentiles([r["load_data_s"] for r in results]),
+        "resources": sampler.summary(sessions),
+    }
+
+
+def report(results: dict):
+    """Print the load test results"""
+    print(f"{results['mode']} load test: {results['sessions']} sessions, concurrency {results['concurrency']}")
+    print(f"{'step':<24} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for step in ("time_to_first_spectrum", "update_files", "load_data"):
+        p = results.get(step)
+        if p:
+            print(f"{step:<24} {p['p50_s']:8.2f}s {p['p95_s']:8.2f}s {p['p99_s']:8.2f}s")
+    for error in results.get("errors", []):
+        print(f"error: {error}")
+    r = results["resources"]
+    print(f"memory: {r['rss_per_session_mb']:.1f} MB per session, peak {r['rss_peak_mb']:.0f} MB")
+    print(f"cpu: {r['cpu_s']:.1f}s over {r['wall_s']:.1f}s, {r['cpu_cores']:.2f} cores")
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Load test the embed page with concurrent sessions, offline")
+    parser.add_argument("-n", "--sessions", type=int, default=10, help="the number of sessions")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="the number of concurrent sessions")
+    parser.add_argument("-t", "--targets", type=int, default=4, help="the number of synthetic targets")
+    parser.add_argument("-s", "--scale", type=float, default=1.0, help="the spectrum size scale")
+    parser.add_argument("-w", "--warmup", type=int, default=1, help="the number of untimed warmup sessions")
+    parser.add_argument("--browser", action="store_true", help="drive headless browsers against a solara server")
+    parser.add_argument("--selector", default="text={label}",
+                        help="the playwright selector shown once the first spectrum is loaded")
+    parser.add_argument("-o", "--output", help="write the results as json to this file")
+    opts = parser.parse_args(args)
+
+    warnings.simplefilter("ignore")
+    with tempfile.TemporaryDirectory() as root:
+        sas = os.path.join(root, "sas")
+        os.environ["SDSS_SOLARA_CACHE_DIR"] = os.path.join(root, "cache")
+        targets = make_targets(sas, opts.targets, opts.scale)
+
+        if opts.browser:
+            results = run_browser(targets, sas, opts.sessions, opts.concurrency, opts.warmup, opts.selector)
+        else:
+            os.environ["SAS_BASE_DIR"] = sas
+            stub = ValisStub(targets).start()
+            os.environ["VALIS_API_URL"] = stub.url
+            try:
+                results = run_inprocess(targets, opts.sessions, opts.concurrency, opts.warmup)
+            finally:
+                stub.shutdown()
+
+    report(results)
+    if opts.output:
+        with open(opts.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
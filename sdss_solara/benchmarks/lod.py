@@ -0,0 +1,92 @@
+import argparse
+import json
+import time
+
+import numpy as np
+from bqplot import LinearScale, Lines
+from ipywidgets.widgets.widget import _remove_buffers
+
+from sdss_solara.io.lod import minmax_indices
+
+# spectrum sizes, in pixels, of typical products
+SIZES = {
+    "boss spec": 4648,
+    "apStar": 8575,
+    "mwmStar": 4648 + 8575,
+    "manga rss": 4563 * 20,
+    "long": 1_000_000,
+}
+
+
+def payload_size(x: np.ndarray, y: np.ndarray) -> tuple:
+    """Serialize a bqplot line as for the websocket, returning bytes and seconds"""
+    t0 = time.perf_counter()
+    line = Lines(x=x, y=y, scales={"x": LinearScale(), "y": LinearScale()})
+    state, __, buffers = _remove_buffers(line.get_state())
+    nbytes = len(json.dumps(state)) + sum(len(memoryview(i).cast("B")) for i in buffers)
+    elapsed = time.perf_counter() - t0
+    line.close()
+    return nbytes, elapsed
+
+
+def benchmark_lod(width: int = 1200, repeat: int = 5) -> list:
+    """Benchmark decimation time and payload size against full resolution
+
+    Parameters
+    ----------
+    width : int
+        the viewer width, in pixels, to decimate to
+    repeat : int
+        the number of timing repeats
+
+    Returns
+    -------
+    list
+        one result dict per spectrum size
+    """
+    rng = np.random.default_rng(42)
+    results = []
+    for name, npix in SIZES.items():
+        x = np.linspace(3600, 17000, npix)
+        y = rng.normal(1, 0.1, npix)
+
+        times = []
+        for __ in range(repeat):
+            t0 = time.perf_counter()
+            idx = minmax_indices(y, width)
+            times.append(time.perf_counter() - t0)
+
+        full_bytes, full_time = payload_size(x, y)
+        lod_bytes, lod_time = payload_size(x[idx], y[idx])
+        results.append(
+            {
+                "name": name,
+                "npix": npix,
+                "lod_npix": int(idx.size),
+                "decimate_s": min(times),
+                "full_bytes": full_bytes,
+                "lod_bytes": lod_bytes,
+                "full_serialize_s": full_time,
+                "lod_serialize_s": lod_time,
+            }
+        )
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark level-of-detail spectrum decimation")
+    parser.add_argument("-w", "--width", type=int, default=1200, help="the viewer width in pixels")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="the number of timing repeats")
+    opts = parser.parse_args(args)
+
+    print(f"{'product':>10} {'npix':>9} {'lod npix':>9} {'decimate':>10} {'full KB':>9} {'lod KB':>8} {'full ser':>9} {'lod ser':>8}")
+    for r in benchmark_lod(opts.width, opts.repeat):
+        print(
+            f"{r['name']:>10} {r['npix']:9d} {r['lod_npix']:9d} {r['decimate_s'] * 1e3:8.2f}ms "
+            f"{r['full_bytes'] / 1024:9.1f} {r['lod_bytes'] / 1024:8.1f} "
+            f"{r['full_serialize_s'] * 1e3:7.2f}ms {r['lod_serialize_s'] * 1e3:6.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+# the module solara serves the routes from
+ROUTES_MODULE = "sdss_solara.pages.home"
+
+# modules which should only be imported when their route is visited
+HEAVY_MODULES = ["jdaviz", "specutils", "sdss_access", "ipypopout", "sdss_explorer"]
+
+
+def run_python(code: str, *args) -> subprocess.CompletedProcess:
+    """Run code in a fresh python interpreter"""
+    return subprocess.run(
+        [sys.executable, *args, "-c", code], capture_output=True, text=True, check=True
+    )
+
+
+def import_time_report(module: str = ROUTES_MODULE, top: int = 20) -> list:
+    """Report the slowest imports of a module with python -X importtime
+
+    Parameters
+    ----------
+    module : str
+        the module to import
+    top : int
+        the number of imports to report
+
+    Returns
+    -------
+    list
+        tuples of (cumulative seconds, self seconds, module name), slowest first
+    """
+    proc = run_python(f"import {module}", "-X", "importtime")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        selft, cumul, name = line.split(":", 1)[1].split("|")
+        rows.append((int(cumul) / 1e6, int(selft) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def measure_import(module: str = ROUTES_MODULE) -> tuple:
+    """Measure the import time of a module in a fresh interpreter
+
+    Returns
+    -------
+    tuple
+        the import time in seconds, and the heavy modules it imported
+    """
+    code = (
+        "import sys, time\n"
+        "t0 = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - t0)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    elapsed, loaded = run_python(code).stdout.splitlines()[-2:]
+    return float(elapsed), [i for i in loaded.split(",") if i]
+
+
+def benchmark_startup(module: str = ROUTES_MODULE, repeat: int = 5) -> dict:
+    """Benchmark the cold import time of a module over several runs"""
+    times = [measure_import(module)[0] for __ in range(repeat)]
+    return {
+        "module": module,
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "max": max(times),
+    }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Report the startup import time of the Solara app")
+    parser.add_argument("module", nargs="?", default=ROUTES_MODULE, help="the module to import")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="the number of cold imports to time")
+    parser.add_argument("-t", "--top", type=int, default=20, help="the number of slowest imports to list")
+    opts = parser.parse_args(args)
+
+    print(f"{'cumulative [s]':>15} {'self [s]':>10}  module")
+    for cumul, selft, name in import_time_report(opts.module, opts.top):
+        print(f"{cumul:15.3f} {selft:10.3f}  {name}")
+
+    res = benchmark_startup(opts.module, opts.repeat)
+    print(
+        f"\nimport {res['module']}: median {res['median']:.3f}s, "
+        f"min {res['min']:.3f}s, max {res['max']:.3f}s over {res['repeat']} runs"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import collections
+import contextlib
+import re
+import weakref
+
+from echo import delay_callback
+from glue.core.hub import HubListener
+from glue.core.message import DataCollectionAddMessage, DataCollectionDeleteMessage
+
+# the spectrum viewer state callbacks held while adding several datasets
+VIEWER_PROPS = ("layers", "x_min", "x_max", "y_min", "y_max")
+
+# suffixes jdaviz and glue add to a data label, e.g. "label_index-0" or "label [zoom]"
+_SUFFIX = re.compile(r"(_index-\d+)?( .*)?$")
+
+
+def base_label(label: str) -> str:
+    """Get the label a dataset was loaded with, without the jdaviz suffixes"""
+    return _SUFFIX.sub("", label, count=1)
+
+
+class LabelIndex(HubListener):
+    """Incremental index of the base labels of the datasets in a data collection
+
+    The counts are kept up to date from the data collection add and delete
+    messages, so checking which files are loaded does not scan all labels.
+
+    Parameters
+    ----------
+    data_collection : glue.core.DataCollection
+        the data collection to index
+    """
+
+    def __init__(self, data_collection):
+        self.counts = collections.Counter(base_label(i) for i in data_collection.labels)
+        hub = data_collection.hub
+        hub.subscribe(self, DataCollectionAddMessage, handler=self._added)
+        hub.subscribe(self, DataCollectionDeleteMessage, handler=self._removed)
+
+    def _added(self, msg):
+        self.counts[base_label(msg.data.label)] += 1
+
+    def _removed(self, msg):
+        label = base_label(msg.data.label)
+        self.counts[label] -= 1
+        if self.counts[label] <= 0:
+            del self.counts[label]
+
+    def __contains__(self, label: str) -> bool:
+        return label in self.counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+_label_indexes = weakref.WeakKeyDictionary()
+
+
+def get_label_index(app) -> LabelIndex:
+    """Get the loaded label index of a jdaviz app or helper"""
+    app = getattr(app, "app", app)
+    if app not in _label_indexes:
+        _label_indexes[app] = LabelIndex(app.data_collection)
+    return _label_indexes[app]
+
+
+@contextlib.contextmanager
+def batch_load(helper):
+    """Hold the linking, viewer and redraw updates while adding several datasets
+
+    Uses the jdaviz helper batch load, deferring the link updates and adding
+    the data to the viewers at the end, and holds the spectrum viewer layer
+    and limit callbacks so they fire once.  The viewer state is released
+    first, so the layers exist when the deferred visibility is applied.
+    """
+    with contextlib.ExitStack() as stack:
+        batch = getattr(helper, "batch_load", None)
+        if batch is not None:
+            stack.enter_context(batch())
+        else:
+            stack.enter_context(helper.app.data_collection.delay_link_manager_update())
+
+        try:
+            viewer = helper._spectrum_viewer
+        except Exception:
+            viewer = None
+        if viewer is not None:
+            stack.enter_context(delay_callback(viewer.state, *VIEWER_PROPS))
+        yield
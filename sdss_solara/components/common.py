@@ -1,4 +1,7 @@
+import functools
 import os
+import sys
+import threading
 
 import ipygoldenlayout
 import ipysplitpanes
@@ -6,22 +9,49 @@ import ipyvue
 import jdaviz
 from jdaviz.app import custom_components
 
+_lock = threading.Lock()
 
-def create_shared_widgets():
+
+@functools.lru_cache(maxsize=None)
+def read_template(path: str) -> str:
+    """Read a vue component template, cached for the process"""
+    with open(path) as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=None)
+def get_components() -> tuple:
+    """Get the names and template paths of the jdaviz vue components"""
+    root = os.path.dirname(jdaviz.__file__)
+    components = [(name, os.path.join(root, path)) for name, path in custom_components.items()]
+    components.append(("g-viewer-tab", os.path.join(root, "container.vue")))
+    return tuple(components)
+
+
+def create_shared_widgets() -> bool:
     """Create shared widgets
 
-    Necessary fix to display jdaviz with solara properly
+    Necessary fix to display jdaviz with solara properly.  The vue component
+    registry is global in a plain kernel, but scoped to each virtual kernel
+    under solara, so this registers the components at most once per
+    registry, reading the templates from an in-memory cache.  Safe to call
+    repeatedly and from multiple threads.
+
+    Returns
+    -------
+    bool
+        True if the widgets were created by this call
     """
-    ipysplitpanes.SplitPanes()
-    ipygoldenlayout.GoldenLayout()
-    for name, path in custom_components.items():
-        ipyvue.register_component_from_file(
-            None, name, os.path.join(os.path.dirname(jdaviz.__file__), path)
-        )
-
-    ipyvue.register_component_from_file(
-        "g-viewer-tab", "container.vue", jdaviz.__file__
-    )
+    registry = sys.modules["ipyvue.VueComponentRegistry"].vue_component_registry
+    with _lock:
+        if all(name in registry for name, __ in get_components()):
+            return False
+
+        ipysplitpanes.SplitPanes()
+        ipygoldenlayout.GoldenLayout()
+        for name, path in get_components():
+            ipyvue.register_component_from_string(name, read_template(path))
+    return True
 
 
 # custom css to fix jdaviz height display when embedding
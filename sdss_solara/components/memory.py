@@ -0,0 +1,90 @@
+import os
+import time
+import weakref
+from typing import NamedTuple
+
+from sdss_solara.io.cache import spectrum_nbytes
+
+
+def get_memory_budget() -> int:
+    """get the byte budget of the datasets loaded in one session, or 0 when unlimited"""
+    return int(os.getenv("SDSS_SOLARA_SESSION_MEMORY_BYTES", 1024**3))
+
+
+class LoadedDataset(NamedTuple):
+    """A dataset loaded into a jdaviz app"""
+
+    label: str
+    filename: str
+    nbytes: int
+    obj: object
+    viewed: float
+
+
+class SessionMemory:
+    """Memory accounting of the datasets loaded in one session
+
+    Tracks the size of each loaded dataset and when it was last viewed, and
+    picks the least recently viewed datasets to unload once the total is
+    over the byte budget.
+
+    Parameters
+    ----------
+    budget : int
+        the byte budget, or 0 for no limit
+    """
+
+    def __init__(self, budget: int = None):
+        self.budget = get_memory_budget() if budget is None else budget
+        self.datasets = {}
+
+    @property
+    def nbytes(self) -> int:
+        """the total bytes of the loaded datasets"""
+        return sum(i.nbytes for i in self.datasets.values())
+
+    def add(self, label: str, filename: str, obj, nbytes: int = None):
+        """Track a loaded dataset, as viewed now"""
+        nbytes = spectrum_nbytes(obj) if nbytes is None else nbytes
+        self.datasets[label] = LoadedDataset(label, filename, nbytes, obj, time.monotonic())
+
+    def touch(self, labels):
+        """Mark datasets as viewed now"""
+        now = time.monotonic()
+        for label in labels:
+            if label in self.datasets:
+                self.datasets[label] = self.datasets[label]._replace(viewed=now)
+
+    def discard(self, label: str) -> LoadedDataset:
+        """Stop tracking a dataset, returning it or None"""
+        return self.datasets.pop(label, None)
+
+    def over_budget(self, keep=()) -> list:
+        """Get the least recently viewed datasets to unload to fit in the budget
+
+        The datasets in ``keep`` are never picked, so the most recent load
+        always stays, even when it alone is over the budget.
+        """
+        if not self.budget:
+            return []
+        excess = self.nbytes - self.budget
+        unload = []
+        for item in sorted(self.datasets.values(), key=lambda i: i.viewed):
+            if excess <= 0:
+                break
+            if item.label in keep:
+                continue
+            unload.append(item)
+            excess -= item.nbytes
+        return unload
+
+
+_app_memory = weakref.WeakKeyDictionary()
+
+
+def get_app_memory(app) -> SessionMemory:
+    """Get the memory accounting of a jdaviz app or helper"""
+    app = getattr(app, "app", app)
+    if app not in _app_memory:
+        _app_memory[app] = SessionMemory()
+    return _app_memory[app]
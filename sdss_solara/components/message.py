@@ -1,12 +1,77 @@
 
+import logging
+import os
+import threading
 import urllib
+from typing import Callable
 
 import solara
 
+logger = logging.getLogger(__name__)
+
 # variable for storing outgoing messages to the parent
 outmsg = solara.Reactive[dict]({})
-# variable for storing incoming file updates from the parent
-new_files = solara.Reactive[list]([])
+# variable for storing incoming file updates from the parent, or None when
+# none is pending, as an empty list removes all the parent files
+new_files = solara.Reactive[list | None](None)
+
+
+def get_update_delay() -> float:
+    """get the time window, in seconds, for coalescing file updates"""
+    return float(os.getenv("SDSS_SOLARA_UPDATE_DELAY", 0.25))
+
+
+class Debouncer:
+    """Call a function with the latest value once a burst of pushes settles
+
+    Each push restarts the timer, so a burst of pushes within ``delay``
+    seconds results in a single call, with the last value.
+
+    Parameters
+    ----------
+    func : Callable
+        the function to call with the value
+    delay : float
+        the quiet time, in seconds, before calling
+    """
+
+    def __init__(self, func: Callable, delay: float = None):
+        self.func = func
+        self.delay = get_update_delay() if delay is None else delay
+        self.value = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def push(self, value):
+        """Queue a value, replacing any pending value"""
+        with self._lock:
+            self.value = value
+            if self._timer is not None:
+                self._timer.cancel()
+            # the timer thread inherits the solara context of the session
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Call the function now with the pending value, if any"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            value, self.value, self._timer = self.value, None, None
+        if value is not None:
+            self.func(value)
+
+
+# per-session debouncer of the incoming file updates
+file_updates = solara.reactive(None)
+
+
+def queue_files(files: list):
+    """Queue the files of an updateFiles message, coalescing bursts"""
+    if file_updates.value is None:
+        file_updates.value = Debouncer(new_files.set)
+    file_updates.value.push(list(files))
 
 
 @solara.component_vue('message.vue')
@@ -18,7 +83,7 @@ def Message(
 
 
 def check_theme(theme: str = None):
-    print('check_theme', theme)
+    logger.debug("check_theme %s", theme)
     if theme:
         solara.lab.theme.dark = theme == 'dark'
     else:
@@ -29,22 +94,29 @@ def check_theme(theme: str = None):
 def event_handler(data: dict):
     """ postMessage event handler """
 
-    print('event data', data)
+    logger.debug("event data %s", data)
     event_type = data.get('type')
     if event_type == 'themeChange':
         check_theme(data.get('theme'))
     elif event_type == 'updateFiles':
-        new_files.value = data.get('files') or []
+        queue_files(data.get('files') or [])
         outmsg.value = {'type': 'success', 'message': 'Files updated successfully'}
 
 
+def parse_params(search: str) -> dict:
+    """Parse a url query string into single values, or lists for repeated keys"""
+    pp = urllib.parse.parse_qs(search or "")
+    return {k: v[0] if len(v) == 1 else v for k, v in pp.items()}
+
+
 def set_initial_theme(params: solara.Reactive[dict] = None):
     """set the initial theme"""
     if params is None:
-        params = solara.use_reactive({})
         router = solara.use_router()
-        pp = urllib.parse.parse_qs(router.search)
-        params.value = {k: v[0] if len(v) == 1 else v for k, v in pp.items()}
+        query = solara.use_memo(lambda: parse_params(router.search), [router.search])
+        params = solara.use_reactive(query)
+        if params.value != query:
+            params.value = query
 
     theme = params.value.get("theme", None)
     check_theme(theme)
\ No newline at end of file
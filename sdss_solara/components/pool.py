@@ -0,0 +1,226 @@
+import collections
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Callable
+
+import comm
+import ipywidgets
+
+from sdss_solara.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def get_pool_size() -> int:
+    """get the number of pre-built jdaviz apps to keep warm"""
+    return int(os.getenv("SDSS_SOLARA_APP_POOL_SIZE", 0))
+
+
+def without_context():
+    """Context manager to build widgets outside of any solara kernel context"""
+    try:
+        from solara.server import kernel_context
+    except ImportError:
+        return contextlib.nullcontext()
+    return kernel_context.without_context()
+
+
+def staging_context():
+    """Create a private solara kernel context to build an app in, or None outside the server
+
+    Under the solara server, ipyvue templates are shared by all the widgets
+    of a kernel context.  Building each pooled app in its own context keeps
+    every widget it uses, templates included, owned by that app alone, so
+    adopting it cannot tie widgets shared with other apps to one session.
+    """
+    patch = sys.modules.get("solara.server.patch")
+    if patch is None or not getattr(patch, "_patched", False):
+        return None
+
+    from solara.server import kernel, kernel_context
+
+    with without_context():
+        return kernel_context.VirtualKernelContext(
+            id=f"app-pool-{uuid.uuid4()}", kernel=kernel.Kernel(), session_id=""
+        )
+
+
+def has_context() -> bool:
+    """Check if we are running inside a solara kernel context"""
+    try:
+        from solara.server import kernel_context
+    except ImportError:
+        return False
+    return kernel_context.has_current_context()
+
+
+class PooledApp:
+    """A pre-built app, with the widgets and comms created while building it"""
+
+    def __init__(self, value, widgets: list, comm_manager, context=None):
+        self.value = value
+        self.widgets = widgets
+        self.comm_manager = comm_manager
+        self.context = context
+        self.created = time.monotonic()
+
+
+class AppPool:
+    """Pool of pre-built jdaviz applications, refilled in the background
+
+    Apps are built by a background thread outside of any session, each in
+    a private staging context under the server, so their widgets are not
+    yet connected to a frontend.  On acquire, a pooled app
+    is adopted into the current solara kernel context by reopening the comm
+    of each of its widgets, then checked for health before being used.
+
+    Parameters
+    ----------
+    factory : Callable
+        a function returning a new ``(Application, Specviz)`` pair
+    size : int
+        the number of apps to keep ready
+    max_age : float
+        the time, in seconds, after which a pooled app is discarded
+    """
+
+    def __init__(self, factory: Callable, size: int = None, max_age: float = 3600):
+        self.factory = factory
+        self.size = get_pool_size() if size is None else size
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self.built = 0
+        self._items = collections.deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def start(self):
+        """Start the background refill thread"""
+        if self.size <= 0 or self._thread is not None:
+            return
+        with without_context():
+            self._thread = threading.Thread(
+                target=self._refill, daemon=True, name="sdss-solara-app-pool"
+            )
+        self._thread.start()
+
+    def _refill(self):
+        """Keep the pool filled up to its size"""
+        with without_context():
+            while True:
+                while len(self._items) < self.size:
+                    try:
+                        item = self._build()
+                    except Exception:
+                        logger.exception("failed to build a pooled app")
+                        time.sleep(10)
+                        continue
+                    with self._lock:
+                        self._items.append(item)
+                self._wake.wait()
+                self._wake.clear()
+
+    def _build(self) -> PooledApp:
+        """Build an app, tracking the widgets it creates"""
+        context = staging_context()
+        with context or without_context():
+            instances = ipywidgets.widgets.widget._instances
+            before = set(instances.keys())
+            value = self.factory()
+            widgets = [instances[i] for i in set(instances.keys()) - before]
+            manager = comm.get_comm_manager()
+        self.built += 1
+        return PooledApp(value, widgets, manager, context=context)
+
+    def _adopt(self, item: PooledApp):
+        """Reconnect the widgets of a pooled app to the current kernel context"""
+        if not has_context():
+            return
+
+        instances = ipywidgets.widgets.widget._instances
+        for widget in item.widgets:
+            old = widget.comm
+            if old is None:
+                continue
+            item.comm_manager.comms.pop(old.comm_id, None)
+            with item.context or without_context():
+                instances.pop(old.comm_id, None)
+            widget.comm = None
+            widget.open()
+
+        # the staging context now holds no widgets, so only its kernel is closed
+        if item.context is not None:
+            item.context.close()
+            item.context = None
+
+    def _discard(self, item: PooledApp):
+        """Drop a pooled app, closing the widgets of its staging context"""
+        self.discarded += 1
+        if item.context is not None:
+            with contextlib.suppress(Exception):
+                item.context.close()
+            item.context = None
+
+    def _healthy(self, item: PooledApp) -> bool:
+        """Check a pooled app is unused and connected to the current context"""
+        app, __ = item.value
+        if time.monotonic() - item.created > self.max_age:
+            return False
+        if len(app.data_collection) > 0:
+            return False
+        if has_context():
+            return app.comm is not None and app.model_id in ipywidgets.widgets.widget._instances
+        return True
+
+    def acquire(self):
+        """Take a warm app from the pool, or build a new one if none is ready"""
+        with self._lock:
+            item = self._items.popleft() if self._items else None
+        self._wake.set()
+
+        if item is not None:
+            try:
+                self._adopt(item)
+                if self._healthy(item):
+                    self.hits += 1
+                    return item.value
+            except Exception:
+                logger.exception("failed to adopt a pooled app")
+            self._discard(item)
+
+        self.misses += 1
+        return self.factory()
+
+    def stats(self) -> dict:
+        """Return the pool counters"""
+        return {
+            "size": self.size,
+            "ready": len(self._items),
+            "built": self.built,
+            "hits": self.hits,
+            "misses": self.misses,
+            "discarded": self.discarded,
+        }
+
+
+def build_app():
+    """Build a new styled jdaviz app for the embed page"""
+    from sdss_solara.pages.jdaviz_embed import build_app
+
+    return build_app()
+
+
+# process-wide pool of pre-built apps for the embed page
+app_pool = AppPool(build_app)
+metrics.add_counters("app_pool", app_pool.stats)
@@ -0,0 +1,120 @@
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sdss_access import Access
+
+from sdss_solara.io.remote import get_remote_cache, remote_url, use_remote
+
+
+@functools.lru_cache(maxsize=None)
+def get_access(release: str, remote: bool = False) -> Access:
+    """Get a cached sdss_access Access instance for a release
+
+    Parameters
+    ----------
+    release : str
+        the data release
+    remote : bool
+        if True, put the Access into remote mode, for building urls
+
+    Returns
+    -------
+    Access
+        the shared Access instance
+    """
+    access = Access(release=release)
+    if remote:
+        access.remote()
+    return access
+
+
+def get_stat_ttl() -> float:
+    """get the time, in seconds, to cache file existence checks"""
+    return float(os.getenv("SDSS_SOLARA_STAT_TTL", 30))
+
+
+class StatCache:
+    """Short-lived cache of file existence checks keyed by release and path
+
+    Parameters
+    ----------
+    ttl : float
+        the time, in seconds, to keep each result
+    maxsize : int
+        the maximum number of cached results
+    """
+
+    def __init__(self, ttl: float = None, maxsize: int = 100000):
+        self.ttl = get_stat_ttl() if ttl is None else ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get a cached result, or None when missing or expired"""
+        with self._lock:
+            hit = self._data.get(key)
+        if hit and hit[0] > time.monotonic():
+            return hit[1]
+        return None
+
+    def put(self, key, value: bool):
+        """Cache a result"""
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            while len(self._data) > self.maxsize:
+                self._data.pop(next(iter(self._data)))
+
+    def clear(self):
+        """Clear the cache"""
+        with self._lock:
+            self._data.clear()
+
+
+stat_cache = StatCache()
+
+# shared pool of threads for concurrent file stats
+stat_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="sdss-solara-stat")
+
+
+def file_exists(access: Access, path: str, release: str) -> bool:
+    """Check a file exists locally, or on the remote SAS when missing files are fetched"""
+    if access.exists("", full=path):
+        return True
+    return use_remote() and get_remote_cache().exists(remote_url(path, release))
+
+
+def exists_many(paths: list, release: str) -> dict:
+    """Check the existence of many files at once
+
+    Uses one cached Access per release, runs uncached checks concurrently,
+    and caches the results for a short time.  With remote access enabled,
+    files missing locally are checked on the remote SAS, so they can be
+    fetched when loaded.
+
+    Parameters
+    ----------
+    paths : list
+        the full file paths to check
+    release : str
+        the data release
+
+    Returns
+    -------
+    dict
+        a mapping of each path, in input order, to whether it exists
+    """
+    access = get_access(release)
+    results = {i: stat_cache.get((release, i)) for i in paths if i}
+    missing = [path for path, hit in results.items() if hit is None]
+
+    # fill the checks in place, so the results keep the order of the paths
+    checks = stat_executor.map(lambda p: file_exists(access, p, release), missing)
+    for path, exists in zip(missing, checks):
+        stat_cache.put((release, path), exists)
+        results[path] = exists
+    return results
@@ -0,0 +1,166 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from sdss_solara.metrics import metrics
+
+
+def get_cache_size() -> int:
+    """get the spectrum cache byte budget"""
+    return int(os.getenv("SDSS_SOLARA_SPECTRUM_CACHE_BYTES", 512 * 1024**2))
+
+
+def make_key(path: str, fmt: str, kind: str = "") -> tuple:
+    """Make a cache key from the file path, stat info and format"""
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size, fmt, kind)
+
+
+def spectrum_nbytes(obj) -> int:
+    """Estimate the memory footprint of a Spectrum or SpectrumList"""
+    if isinstance(obj, list):
+        return sum(spectrum_nbytes(i) for i in obj)
+
+    size = 0
+    for attr in ("flux", "spectral_axis", "mask"):
+        arr = getattr(obj, attr, None)
+        size += getattr(arr, "nbytes", 0)
+    unc = getattr(obj, "uncertainty", None)
+    if unc is not None:
+        size += getattr(unc.array, "nbytes", 0)
+    return size
+
+
+class SpectrumCache:
+    """Thread-safe LRU cache of parsed spectra bounded by a byte budget
+
+    Cached objects are shared between all sessions in the process and
+    must be treated as read-only.
+
+    Parameters
+    ----------
+    max_bytes : int
+        the total byte budget of the cache
+    sizeof : Callable
+        a function returning the size in bytes of a cached object
+    """
+
+    def __init__(self, max_bytes: int = None, sizeof: Callable = spectrum_nbytes):
+        self.max_bytes = get_cache_size() if max_bytes is None else max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.currsize = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key):
+        """Get an item from the cache, or None"""
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def put(self, key, value):
+        """Add an item to the cache, evicting old items over budget"""
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self.currsize -= self._data.pop(key)[1]
+            # do not cache objects larger than the whole budget
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self.currsize += size
+            while self.currsize > self.max_bytes:
+                __, (__, old) = self._data.popitem(last=False)
+                self.currsize -= old
+                self.evictions += 1
+
+    def get_or_load(self, key, loader: Callable):
+        """Get an item from the cache, or load and cache it
+
+        Concurrent requests for the same key wait on a single load.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+            klock = self._loading.setdefault(key, threading.Lock())
+
+        with klock:
+            with self._lock:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return self._data[key][0]
+                self.misses += 1
+
+            try:
+                value = loader()
+                self.put(key, value)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return value
+
+    def clear(self):
+        """Clear the cache and reset the counters"""
+        with self._lock:
+            self._data.clear()
+            self.currsize = self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return the cache counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "items": len(self._data),
+            "currsize": self.currsize,
+            "maxsize": self.max_bytes,
+        }
+
+
+# process-wide cache of parsed spectra
+spectrum_cache = SpectrumCache()
+metrics.add_counters("spectrum_cache", spectrum_cache.stats)
+
+
+def read_spectrum(cls, path: str, fmt: str):
+    """Read a Spectrum or SpectrumList through the shared store and cache
+
+    A file held by any session is returned from the shared store, so all
+    sessions use one read-only copy.  Misses are read from the binary
+    sidecar of the file when present.
+
+    Parameters
+    ----------
+    cls : type
+        the specutils class to read with, i.e. Spectrum or SpectrumList
+    path : str
+        the path to the file
+    fmt : str
+        the specutils format name
+    """
+    # imports specutils, so only when reading
+    from sdss_solara.io.shared import shared_store
+    from sdss_solara.io.sidecar import read_with_sidecar
+
+    key = make_key(path, fmt, cls.__name__)
+    obj = shared_store.get(key)
+    if obj is not None:
+        return obj
+    obj = spectrum_cache.get_or_load(key, lambda: read_with_sidecar(cls, path, fmt))
+    return shared_store.register(key, obj)
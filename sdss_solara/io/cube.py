@@ -0,0 +1,210 @@
+import functools
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+from astropy import units as u
+from astropy.io import fits
+from astropy.nddata import InverseVariance
+from specutils import Spectrum
+
+from sdss_solara.io.paths import get_cache_dir
+
+# MaNGA flux unit, per spaxel in the cube
+FLUX_UNIT = u.Unit("1e-17 erg / (Angstrom cm2 s)")
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def lazy_cubes() -> bool:
+    """Check if MaNGA cubes are loaded lazily, one spectrum at a time"""
+    return os.getenv("SDSS_SOLARA_LAZY_CUBES", "1").lower() not in ("0", "false", "no")
+
+
+def get_cube_selection(params: dict) -> dict:
+    """Get the cube spaxel and aperture selection from the query params
+
+    Uses ``spaxel=x,y`` for the spaxel, defaulting to the cube center, and
+    ``aperture=r`` for a radius, in spaxels, to sum over.
+    """
+    selection = {"spaxel": None, "radius": 0.0}
+    spaxel = (params or {}).get("spaxel")
+    if spaxel:
+        try:
+            x, y = (int(i) for i in str(spaxel).split(","))
+            selection["spaxel"] = (x, y)
+        except ValueError:
+            pass
+    try:
+        selection["radius"] = max(float((params or {}).get("aperture", 0)), 0.0)
+    except ValueError:
+        pass
+    return selection
+
+
+def uncompressed_path(path: str) -> str:
+    """Get a local uncompressed copy of a gzipped FITS file, so it can be memory-mapped
+
+    The file is decompressed once into the local cache, named by a hash of
+    its path, mtime and size, and written atomically.
+    """
+    if not path.endswith(".gz"):
+        return path
+
+    st = os.stat(path)
+    key = f"{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    cache = get_cache_dir("cubes")
+    target = cache / f"{digest}-{os.path.basename(path)[:-3]}"
+    if target.exists():
+        return target.as_posix()
+
+    with _locks_lock:
+        lock = _locks.setdefault(target, threading.Lock())
+    with lock:
+        if not target.exists():
+            fd, tmp = tempfile.mkstemp(dir=cache, suffix=".part")
+            try:
+                with gzip.open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+                    shutil.copyfileobj(src, dst, length=16 * 1024**2)
+                os.replace(tmp, target)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+    return target.as_posix()
+
+
+class CubeView:
+    """Memory-mapped view of a MaNGA LOGCUBE
+
+    The FLUX, IVAR and MASK cubes are memory-mapped, and only the requested
+    spaxels are read from disk, so resident memory does not grow with the
+    size of the cube.
+
+    Parameters
+    ----------
+    path : str
+        the path to an uncompressed LOGCUBE file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hdulist = fits.open(path, memmap=True, do_not_scale_image_data=True)
+        self.flux = self.hdulist["FLUX"].data
+        self.ivar = self.hdulist["IVAR"].data
+        self.mask = self.hdulist["MASK"].data
+        self.wave = np.array(self.hdulist["WAVE"].data, dtype=float) * u.AA
+        self.unit = FLUX_UNIT
+        self.meta = {"header": self.hdulist[0].header}
+
+    @property
+    def shape(self) -> tuple:
+        """the (nwave, ny, nx) shape of the cube"""
+        return self.flux.shape
+
+    @property
+    def center(self) -> tuple:
+        """the central (x, y) spaxel"""
+        __, ny, nx = self.shape
+        return nx // 2, ny // 2
+
+    def check_spaxel(self, x: int, y: int):
+        """Check a spaxel is within the cube
+
+        Raises
+        ------
+        ValueError
+            when the spaxel is outside the cube, rather than wrapping around
+            for negative indices or failing on an index error
+        """
+        __, ny, nx = self.shape
+        if not (0 <= x < nx and 0 <= y < ny):
+            raise ValueError(f"Spaxel ({x}, {y}) is outside the {nx}x{ny} spaxels of the cube")
+
+    def spaxel(self, x: int, y: int) -> Spectrum:
+        """Read the spectrum of a single spaxel"""
+        self.check_spaxel(x, y)
+        flux = np.asarray(self.flux[:, y, x], dtype=float)
+        ivar = np.asarray(self.ivar[:, y, x], dtype=float)
+        mask = np.asarray(self.mask[:, y, x]) != 0
+        return self._spectrum(flux, ivar, mask, spaxel=(x, y))
+
+    def aperture(self, x: int, y: int, radius: float) -> Spectrum:
+        """Read the summed spectrum of the spaxels within a radius of (x, y)"""
+        __, ny, nx = self.shape
+        yy, xx = np.mgrid[
+            max(int(y - radius), 0):min(int(y + radius) + 1, ny),
+            max(int(x - radius), 0):min(int(x + radius) + 1, nx),
+        ]
+        inside = (xx - x) ** 2 + (yy - y) ** 2 <= radius**2
+        ys, xs = yy[inside], xx[inside]
+
+        flux = np.asarray(self.flux[:, ys, xs], dtype=float)
+        ivar = np.asarray(self.ivar[:, ys, xs], dtype=float)
+        good = np.asarray(self.mask[:, ys, xs]) == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = np.where(good & (ivar > 0), 1 / ivar, 0).sum(axis=1)
+            total = np.where(good, flux, 0).sum(axis=1)
+            total_ivar = np.where(var > 0, 1 / var, 0)
+        mask = ~good.any(axis=1)
+        return self._spectrum(total, total_ivar, mask, spaxel=(x, y), radius=radius, nspaxels=int(inside.sum()))
+
+    def _spectrum(self, flux, ivar, mask, **meta) -> Spectrum:
+        """Build a Spectrum from the arrays of one extracted spectrum"""
+        return Spectrum(
+            flux=flux * self.unit,
+            spectral_axis=self.wave,
+            uncertainty=InverseVariance(ivar / self.unit**2),
+            mask=mask,
+            meta=dict(self.meta, **meta),
+        )
+
+    def extract(self, spaxel: tuple = None, radius: float = 0.0) -> Spectrum:
+        """Extract a spaxel, or aperture, spectrum, defaulting to the center"""
+        x, y = spaxel or self.center
+        self.check_spaxel(x, y)
+        if radius > 0:
+            return self.aperture(x, y, radius)
+        return self.spaxel(x, y)
+
+
+@functools.lru_cache(maxsize=16)
+def _open_cube(path: str, mtime: int) -> CubeView:
+    """Open a cube view, shared by all sessions, cached on its mtime"""
+    return CubeView(path)
+
+
+def open_cube(path: str) -> CubeView:
+    """Open a memory-mapped view of a, possibly gzipped, MaNGA cube"""
+    local = uncompressed_path(path)
+    return _open_cube(local, os.stat(local).st_mtime_ns)
+
+
+def read_cube_spectrum(path: str, spaxel: tuple = None, radius: float = 0.0) -> Spectrum:
+    """Read a single spaxel or aperture spectrum from a MaNGA cube
+
+    Parameters
+    ----------
+    path : str
+        the path to the LOGCUBE file
+    spaxel : tuple
+        the (x, y) spaxel, defaulting to the cube center
+    radius : float
+        the radius, in spaxels, of an aperture to sum over
+
+    Returns
+    -------
+    Spectrum
+        the extracted spectrum
+
+    Raises
+    ------
+    ValueError
+        when the spaxel is outside the cube
+    """
+    return open_cube(path).extract(spaxel=spaxel, radius=radius)
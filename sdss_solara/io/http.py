@@ -0,0 +1,38 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def create_session(
+    retries: int = 3, backoff: float = 0.5, pool_size: int = 10
+) -> requests.Session:
+    """Create a pooled, keep-alive requests session with retry and backoff
+
+    Parameters
+    ----------
+    retries : int
+        the number of retries on connection errors and 429/5xx responses
+    backoff : float
+        the exponential backoff factor, in seconds, between retries
+    pool_size : int
+        the number of connections kept alive per host
+
+    Returns
+    -------
+    requests.Session
+        the configured session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
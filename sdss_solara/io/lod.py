@@ -0,0 +1,213 @@
+import logging
+import os
+import threading
+
+import numpy as np
+from astropy import units as u
+from echo import delay_callback
+from specutils import Spectrum, SpectrumList
+
+logger = logging.getLogger(__name__)
+
+
+def get_lod_width(params: dict = None) -> int:
+    """Get the viewer pixel width to decimate spectra to, or 0 when disabled
+
+    Uses the ``lod`` query parameter, either a flag or a pixel width, then
+    the ``SDSS_SOLARA_LOD_WIDTH`` environment variable.  The rendered width
+    of the viewer is only known in the browser, so the width is configured,
+    defaulting to 1200 pixels, a typical full-width viewer.
+    """
+    value = (params or {}).get("lod") or os.getenv("SDSS_SOLARA_LOD_WIDTH") or 0
+    if str(value).lower() in ("true", "yes", "on"):
+        return 1200
+    try:
+        width = int(value)
+    except ValueError:
+        return 0
+    return 1200 if width == 1 else max(width, 0)
+
+
+def minmax_indices(y: np.ndarray, nbins: int) -> np.ndarray:
+    """Get the indices of the min and max value in each of nbins bins
+
+    Keeps the extrema of every bin, so peaks and absorption lines survive
+    decimation.  For a 2d array, bins use the min and max across all rows.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        the values to decimate, along the last axis
+    nbins : int
+        the number of bins
+
+    Returns
+    -------
+    np.ndarray
+        the sorted, unique indices to keep
+    """
+    y = np.asarray(y, dtype=float)
+    n = y.shape[-1]
+    if nbins <= 0 or n <= 2 * nbins:
+        return np.arange(n)
+
+    lo = np.nanmin(y, axis=0) if y.ndim > 1 else y
+    hi = np.nanmax(y, axis=0) if y.ndim > 1 else y
+
+    # pad to a whole number of equal bins
+    size = -(-n // nbins)
+    pad = size * nbins - n
+    lo = np.pad(np.where(np.isnan(lo), np.inf, lo), (0, pad), constant_values=np.inf)
+    hi = np.pad(np.where(np.isnan(hi), -np.inf, hi), (0, pad), constant_values=-np.inf)
+
+    offset = np.arange(nbins) * size
+    imin = lo.reshape(nbins, size).argmin(axis=1) + offset
+    imax = hi.reshape(nbins, size).argmax(axis=1) + offset
+    idx = np.unique(np.concatenate([imin, imax, [0, n - 1]]))
+    return idx[idx < n]
+
+
+def decimate_spectrum(spec: Spectrum, nbins: int) -> Spectrum:
+    """Decimate a spectrum, preserving the min and max of each bin
+
+    Parameters
+    ----------
+    spec : Spectrum
+        the full resolution spectrum
+    nbins : int
+        the number of bins, usually the viewer width in pixels
+
+    Returns
+    -------
+    Spectrum
+        the decimated spectrum, or the input if already small enough
+    """
+    idx = minmax_indices(spec.flux.value, nbins)
+    if idx.size == spec.flux.shape[-1]:
+        return spec
+
+    uncertainty = spec.uncertainty[..., idx] if spec.uncertainty is not None else None
+    mask = spec.mask[..., idx] if spec.mask is not None else None
+    return Spectrum(
+        flux=spec.flux[..., idx],
+        spectral_axis=spec.spectral_axis[idx],
+        uncertainty=uncertainty,
+        mask=mask,
+        meta=dict(spec.meta, lod_npix=spec.flux.shape[-1]),
+    )
+
+
+def decimate(obj, nbins: int):
+    """Decimate a Spectrum or every spectrum in a SpectrumList"""
+    if isinstance(obj, SpectrumList):
+        return SpectrumList([decimate_spectrum(i, nbins) for i in obj])
+    return decimate_spectrum(obj, nbins)
+
+
+def slice_spectrum(spec: Spectrum, xmin: u.Quantity, xmax: u.Quantity) -> Spectrum:
+    """Slice a full resolution spectrum to a spectral range"""
+    axis = spec.spectral_axis
+    bounds = [i.to_value(axis.unit, equivalencies=u.spectral()) for i in (xmin, xmax)]
+    lo, hi = np.searchsorted(axis.value, sorted(bounds))
+    index = (slice(None),) * (spec.flux.ndim - 1) + (slice(max(lo - 1, 0), hi + 1),)
+    return spec[index]
+
+
+class ZoomDetail:
+    """Load full resolution data into a viewer for the zoomed spectral range
+
+    Watches the x limits of the spectrum viewer.  When the visible range of
+    a decimated dataset holds at most ``max_points`` full resolution pixels,
+    the full resolution slice is loaded as ``"<label> [zoom]"``; zooming out
+    again removes it.  Limit changes are debounced on a timer thread, and
+    the slices swapped through ``run``, on the event loop of the session.
+
+    Parameters
+    ----------
+    specviz : Specviz
+        the jdaviz Specviz helper
+    load : Callable
+        a function ``load(label, spectrum)`` adding a spectrum to jdaviz
+    width : int
+        the viewer width in pixels
+    run : Callable
+        a function ``run(func)`` calling a function on the session event loop
+    """
+
+    def __init__(self, specviz, load, width: int, delay: float = 0.3, run=None):
+        self.specviz = specviz
+        self.load = load
+        self.run = run or (lambda func, *args: func(*args))
+        self.max_points = 4 * width
+        self.delay = delay
+        self.full = {}
+        self.zoomed = set()
+        self._timer = None
+        self._last = None
+        self._updating = False
+        viewer = specviz._spectrum_viewer
+        viewer.state.add_callback("x_min", self._on_limits)
+        viewer.state.add_callback("x_max", self._on_limits)
+
+    def add(self, label: str, spec: Spectrum):
+        """Track the full resolution version of a decimated dataset"""
+        self.full[label] = spec
+
+    def discard(self, label: str):
+        """Stop tracking a dataset, removing its zoomed slice"""
+        self.full.pop(label, None)
+        zlabel = f"{label} [zoom]"
+        if zlabel in self.zoomed:
+            dc = self.specviz.app.data_collection
+            if zlabel in dc.labels:
+                dc.remove(dc[zlabel])
+            self.zoomed.discard(zlabel)
+
+    def _on_limits(self, *args):
+        """Debounce viewer limit changes"""
+        if self._updating:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.delay, self.run, args=(self.update,))
+        self._timer.start()
+
+    def update(self):
+        """Swap full resolution slices in or out for the current x range"""
+        state = self.specviz._spectrum_viewer.state
+        limits = (state.x_min, state.x_max)
+        if None in limits or limits == self._last:
+            return
+        self._last = limits
+        unit = u.Unit(state.x_display_unit or "")
+        xmin, xmax = sorted(limits) * unit
+        dc = self.specviz.app.data_collection
+
+        self._updating = True
+        try:
+            self._swap(dc, xmin, xmax)
+        finally:
+            # keep the user's zoom when loading data resets the limits
+            with delay_callback(state, "x_min", "x_max"):
+                state.x_min, state.x_max = limits
+            self._updating = False
+
+    def _swap(self, dc, xmin: u.Quantity, xmax: u.Quantity):
+        """Replace the zoomed slice of each tracked dataset"""
+        # the loading threads add datasets meanwhile
+        for label, spec in list(self.full.items()):
+            zlabel = f"{label} [zoom]"
+            try:
+                piece = slice_spectrum(spec, xmin, xmax)
+            except u.UnitConversionError:
+                continue
+
+            if zlabel in self.zoomed:
+                dc.remove(dc[zlabel])
+                self.zoomed.discard(zlabel)
+            if 0 < piece.flux.shape[-1] <= self.max_points:
+                try:
+                    self.load(zlabel, piece)
+                    self.zoomed.add(zlabel)
+                except Exception:
+                    logger.exception("failed to load zoomed data for %s", label)
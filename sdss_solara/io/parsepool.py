@@ -0,0 +1,204 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class ParseError(RuntimeError):
+    """A file could not be parsed in a worker process, as it timed out or crashed it"""
+
+
+def get_parse_workers() -> int:
+    """get the number of file parsing worker processes, or 0 to parse in-process"""
+    return int(os.getenv("SDSS_SOLARA_PARSE_WORKERS", 2))
+
+
+def get_parse_timeout() -> float:
+    """get the seconds a worker process may take to parse a file"""
+    return float(os.getenv("SDSS_SOLARA_PARSE_TIMEOUT", 60))
+
+
+def use_parse_pool() -> bool:
+    """Check if files are parsed in worker processes"""
+    return get_parse_workers() > 0
+
+
+def _init_worker():
+    """Import the specutils readers once per worker process"""
+    import specutils  # noqa: F401
+
+
+def _read(kind: str, path: str, fmt: str, sidecar: str = None):
+    """Parse a file in a worker process
+
+    Writes the file sidecar to the ``sidecar`` directory, as resolved by the
+    parent process, and returns None, so the parent memory-maps the arrays.
+    Otherwise returns the payload of metadata and arrays.
+    """
+    from specutils import Spectrum, SpectrumList
+
+    from sdss_solara.io.sidecar import to_payload, write_sidecar
+
+    cls = SpectrumList if kind == "SpectrumList" else Spectrum
+    obj = cls.read(path, format=fmt)
+    if sidecar and write_sidecar(obj, path, fmt, target=sidecar):
+        return None
+    return to_payload(obj)
+
+
+class _Worker:
+    """A single worker process, replaced on its own when stuck or crashed"""
+
+    def __init__(self):
+        self.executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker
+        )
+        # start the process now, so spawning it is not timed as parsing
+        self.executor.submit(os.getpid).result()
+
+    def alive(self) -> bool:
+        """Check the worker process is running"""
+        processes = (getattr(self.executor, "_processes", None) or {}).values()
+        return bool(processes) and all(p.is_alive() for p in processes)
+
+    def kill(self):
+        """Terminate the worker process"""
+        for process in list(getattr(self.executor, "_processes", {}).values()):
+            process.terminate()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ParsePool:
+    """Pool of worker processes parsing data files off the web server process
+
+    Parsing FITS files is CPU-heavy and holds the GIL, so files are parsed
+    in spawned worker processes, which write the binary sidecar of each file
+    for the parent to memory-map.  Each call waits for an idle worker, and
+    only then is timed, so files queued behind others cannot time out.  A
+    file that takes longer than the timeout, or crashes its worker, raises a
+    ParseError and only that worker is replaced, so a bad file cannot freeze
+    or kill the server, or fail the files parsed by the other workers.
+
+    Parameters
+    ----------
+    workers : int
+        the number of worker processes
+    timeout : float
+        the seconds a worker may take per file
+    """
+
+    def __init__(self, workers: int = None, timeout: float = None):
+        self.workers = get_parse_workers() if workers is None else workers
+        self.timeout = get_parse_timeout() if timeout is None else timeout
+        self.restarts = 0
+        self._idle = queue.Queue()
+        self._live = set()
+        self._lock = threading.Lock()
+        # workers are started on first use
+        for __ in range(max(self.workers, 1)):
+            self._idle.put(None)
+
+    def _acquire(self) -> _Worker:
+        """Wait for an idle worker, starting it when not yet running"""
+        worker = self._idle.get()
+        if worker is not None:
+            if worker.alive():
+                return worker
+            # the worker died while idle, so start a new one
+            with self._lock:
+                self._live.discard(worker)
+            worker.kill()
+        try:
+            worker = _Worker()
+        except BaseException:
+            self._idle.put(None)
+            raise
+        with self._lock:
+            self._live.add(worker)
+        return worker
+
+    def _release(self, worker: _Worker, replace: bool = False):
+        """Return a worker to the pool, or kill it for a new one to be started"""
+        with self._lock:
+            live = worker in self._live
+            if replace or not live:
+                self._live.discard(worker)
+        if replace or not live:
+            worker.kill()
+            self._idle.put(None)
+        else:
+            self._idle.put(worker)
+
+    def run(self, func: Callable, *args, file: str = None):
+        """Run a function in a worker process, within the timeout
+
+        Raises
+        ------
+        ParseError
+            when the call times out or its worker process dies
+        """
+        worker = self._acquire()
+        replace = False
+        try:
+            future = worker.executor.submit(func, *args)
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            logger.warning("parsing %s timed out after %ss, restarting its worker", file, self.timeout)
+            replace = True
+            raise ParseError(f"Timed out after {self.timeout}s parsing {file or func.__name__}") from None
+        except BrokenProcessPool as e:
+            logger.warning("a parse worker died on %s, restarting it", file)
+            replace = True
+            raise ParseError(f"Parse worker crashed on {file or func.__name__}") from e
+        finally:
+            if replace:
+                self.restarts += 1
+            self._release(worker, replace=replace)
+
+    def read(self, cls, path: str, fmt: str):
+        """Parse a Spectrum or SpectrumList file in a worker process"""
+        from sdss_solara.io.sidecar import from_payload, read_sidecar, sidecar_dir, use_sidecars
+
+        sidecar = str(sidecar_dir(path, fmt, cls.__name__)) if use_sidecars() else None
+        payload = self.run(_read, cls.__name__, path, fmt, sidecar, file=path)
+        if payload is None:
+            obj = read_sidecar(cls, path, fmt)
+            if obj is not None:
+                return obj
+            # the sidecar was replaced meanwhile, so get the arrays instead
+            payload = self.run(_read, cls.__name__, path, fmt, None, file=path)
+        return from_payload(payload)
+
+    def shutdown(self):
+        """Stop the worker processes, letting running calls finish"""
+        with self._lock:
+            live, self._live = self._live, set()
+        for worker in live:
+            worker.executor.shutdown(wait=False, cancel_futures=True)
+        # new workers are started on next use, and busy ones stopped when released
+        for __ in range(self._idle.qsize()):
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._idle.put(None)
+
+
+_parse_pool = None
+_parse_lock = threading.Lock()
+
+
+def get_parse_pool() -> ParsePool:
+    """Get the shared file parsing pool"""
+    global _parse_pool
+    with _parse_lock:
+        if _parse_pool is None:
+            _parse_pool = ParsePool()
+        return _parse_pool
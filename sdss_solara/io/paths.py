@@ -0,0 +1,148 @@
+import functools
+import os
+import pathlib
+import re
+from typing import NamedTuple
+
+
+def get_cache_dir(name: str = "") -> pathlib.Path:
+    """Get a local cache directory for sdss_solara"""
+    root = os.getenv("SDSS_SOLARA_CACHE_DIR") or os.path.join(
+        os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "sdss_solara"
+    )
+    path = pathlib.Path(root) / name
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def get_release_name(release: str) -> str:
+    """Get the SAS directory name of a data release, e.g. ipl-3 for IPL3"""
+    if "IPL" in release.upper() and "-" not in release:
+        release = release.upper().replace("IPL", "IPL-")
+    return release.lower()
+
+
+def get_release_dir(release: str) -> pathlib.Path:
+    """Get the SAS directory of a data release"""
+    sas = os.getenv("SAS_BASE_DIR")
+    return pathlib.Path(sas) / get_release_name(release)
+
+
+# ordered rules of (glob pattern, specutils format, survey); the first match wins
+FORMAT_RULES = [
+    ("*apogee/*/dr17/visit*", "APOGEE apVisit", "apogee"),
+    ("*apogee/*/dr17/stars*", "APOGEE apStar", "apogee"),
+    ("*apogee/redux/1.*/stars*", "SDSS-V apStar", "apogee"),
+    ("*apogee/redux/1.*/visit*", "SDSS-V apVisit", "apogee"),
+    ("*dr17/eboss/spectro*", "SDSS-III/IV spec", "eboss"),
+    ("*dr17/sdss/spectro*", "SDSS-III/IV spec", "sdss"),
+    ("*boss/redux/v6*", "SDSS-V spec", "boss"),
+    # mwm and astra files load all extensions
+    ("*astra/*/mwmStar*", "SDSS-V mwm", "mwm"),
+    ("*astra/*/mwmVisit*", "SDSS-V mwm", "mwm"),
+    ("*astra/*/astraStar*", "SDSS-V astra", "mwm"),
+    ("*astra/*/astraVisit*", "SDSS-V astra", "mwm"),
+    ("*dr17/manga/*LOGCUBE*", "MaNGA cube", "manga"),
+    ("*dr17/manga/*LOGRSS*", "MaNGA rss", "manga"),
+]
+
+# file preference, by label prefix, for sorting the filemap
+PREFS = ["mwmStar", "spec", "apStar"]
+
+
+def _compile_rules(rules: list) -> re.Pattern:
+    """Compile the glob rules into a single regex with one named group per rule"""
+    groups = []
+    for i, (pattern, __, __) in enumerate(rules):
+        regex = re.escape(pattern).replace(r"\*", ".*")
+        groups.append(f"(?P<r{i}>{regex})")
+    return re.compile("|".join(groups), re.DOTALL)
+
+
+FORMAT_REGEX = _compile_rules(FORMAT_RULES)
+
+
+class PathInfo(NamedTuple):
+    """Classification of a data file path"""
+
+    format: str
+    label: str
+    priority: float
+    multi: bool
+    survey: str
+
+
+def label_priority(label: str) -> float:
+    """Get the sort priority of a data label"""
+    for i, pref in enumerate(PREFS):
+        if label.startswith(pref):
+            return i
+    return float("inf")
+
+
+def is_multi_extension(label: str) -> bool:
+    """Check if a data label is a multi-extension product"""
+    return (
+        label.startswith(("mwmVisit", "mwmStar")) or "apVisit" in label or "apStar" in label
+    )
+
+
+def _make_label(filepath: str) -> str:
+    """Make a data label that accounts for spec coadds"""
+    stem = pathlib.Path(filepath).stem
+    parts = stem.split("-", 1)
+    for coadd in ("daily", "epoch", "lite", "full"):
+        if f"spectra/{coadd}" in filepath:
+            parts.insert(1, coadd)
+            return "-".join(parts)
+    return stem
+
+
+@functools.lru_cache(maxsize=65536)
+def classify(filepath: str) -> PathInfo:
+    """Classify a data file path in a single pass
+
+    Parameters
+    ----------
+    filepath : str
+        the path to the data file
+
+    Returns
+    -------
+    PathInfo
+        the specutils format, data label, sort priority, multi-extension
+        flag and survey of the file
+    """
+    match = FORMAT_REGEX.fullmatch(filepath)
+    fmt, survey = (None, None)
+    if match:
+        __, fmt, survey = FORMAT_RULES[int(match.lastgroup[1:])]
+    label = _make_label(filepath)
+    return PathInfo(fmt, label, label_priority(label), is_multi_extension(label), survey)
+
+
+def classify_many(filepaths: list) -> list:
+    """Classify a list of data file paths"""
+    return [classify(i) for i in filepaths]
+
+
+def get_specformat(filepath: str) -> str:
+    """Get the Spectrum1D format based on the filepath"""
+    return classify(filepath).format
+
+
+def make_label(filepath):
+    """Make a data label that accounts for spec coadds"""
+    return classify(filepath).label
+
+
+def sort_filemap(data: dict) -> dict:
+    """Sort the filemap by file preference"""
+    skeys = sorted(data.keys(), key=label_priority)
+    return {key: data[key] for key in skeys}
+
+
+def get_sdssid(filepath: str) -> int:
+    """Get the sdss_id from a mwm or astra file path, if present"""
+    match = re.search(r"(?:mwm|astra)\w*-[^-/]+-(\d+)\.fits", filepath)
+    return int(match.group(1)) if match else None
@@ -0,0 +1,69 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def get_prefetch_count() -> int:
+    """Get the number of ranked files to prefetch after the first, 0 to disable"""
+    return int(os.getenv("SDSS_SOLARA_PREFETCH_COUNT", 3))
+
+
+def get_prefetch_workers() -> int:
+    """Get the max number of files prefetched at once, across all sessions"""
+    return int(os.getenv("SDSS_SOLARA_PREFETCH_WORKERS", 2))
+
+
+# shared pool of threads, limiting prefetch concurrency per process
+prefetch_executor = ThreadPoolExecutor(
+    max_workers=get_prefetch_workers(), thread_name_prefix="sdss-solara-prefetch"
+)
+
+
+class Prefetcher:
+    """Warm the caches for a list of files in the background
+
+    Each file is passed to ``warm`` in the shared prefetch threads.  Files
+    not yet started are skipped once cancelled, e.g. when the session ends.
+
+    Parameters
+    ----------
+    warm : Callable
+        a function ``warm(path)`` reading a file into the caches
+    executor : ThreadPoolExecutor
+        the threads to run in, defaulting to the shared prefetch threads
+    """
+
+    def __init__(self, warm: Callable, executor: ThreadPoolExecutor = None):
+        self.warm = warm
+        self.executor = executor or prefetch_executor
+        self.futures = []
+        self._cancelled = threading.Event()
+
+    def start(self, files: list) -> "Prefetcher":
+        """Queue the files for prefetching, in order"""
+        self.futures.extend(self.executor.submit(self._run, f) for f in files)
+        return self
+
+    def _run(self, path: str):
+        """Warm a single file, unless cancelled"""
+        if self._cancelled.is_set():
+            return
+        try:
+            self.warm(path)
+        except Exception as e:
+            logger.debug("failed to prefetch %s: %s", path, e)
+
+    def cancel(self):
+        """Cancel any files not yet prefetched"""
+        self._cancelled.set()
+        for future in self.futures:
+            future.cancel()
+
+    @property
+    def done(self) -> bool:
+        """whether all files have been prefetched or cancelled"""
+        return all(f.done() for f in self.futures)
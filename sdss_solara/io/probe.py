@@ -0,0 +1,60 @@
+import functools
+import os
+from typing import NamedTuple
+
+from astropy.io import fits
+
+
+class FitsProbe(NamedTuple):
+    """Header-only summary of a multi-extension FITS file"""
+
+    multispec: bool
+    ext_has_data: tuple
+    multi_spec_per_ext: tuple
+    fmt: str
+
+
+def get_nrows(header: fits.Header) -> int:
+    """Get the length of the first data axis from the header keywords"""
+    naxis = header.get("NAXIS", 0)
+    if not naxis:
+        return 0
+    if header.get("XTENSION", "").strip() in ("BINTABLE", "TABLE"):
+        return header.get("NAXIS2", 0)
+    # image arrays are stored with the last FITS axis first
+    return header.get(f"NAXIS{naxis}", 0)
+
+
+@functools.lru_cache(maxsize=1024)
+def _probe(path: str, mtime: int, size: int) -> FitsProbe:
+    """Probe the extension headers of a file, cached on its stat info"""
+    with fits.open(path, lazy_load_hdus=True) as hdulist:
+        rows = [get_nrows(hdu.header) for hdu in hdulist[1:]]
+
+    ext_has_data = tuple(i >= 1 for i in rows)
+    multi_spec_per_ext = tuple(i > 1 for i in rows)
+    multispec = any(ext_has_data) or any(multi_spec_per_ext)
+    fmt = "1D Spectrum List" if multispec else "1D Spectrum"
+    return FitsProbe(multispec, ext_has_data, multi_spec_per_ext, fmt)
+
+
+def probe_fits(path: str) -> FitsProbe:
+    """Probe a FITS file for multiple spectra without reading any data
+
+    Reads only the extension headers, using the NAXIS and NAXIS2 keywords,
+    to decide whether the file contains multiple spectra, and which
+    extensions have data.  Results are cached on the path, modification
+    time and size of the file.
+
+    Parameters
+    ----------
+    path : str
+        the path to the FITS file
+
+    Returns
+    -------
+    FitsProbe
+        the multispec flag, per-extension data flags and jdaviz loader format
+    """
+    st = os.stat(path)
+    return _probe(os.path.abspath(path), st.st_mtime_ns, st.st_size)
@@ -0,0 +1,239 @@
+import hashlib
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future
+
+import requests
+
+from sdss_solara.io.http import create_session
+from sdss_solara.io.paths import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteFetchError(OSError):
+    """A remote file could not be downloaded"""
+
+
+def use_remote() -> bool:
+    """Check if missing local files are fetched from the remote SAS"""
+    return os.getenv("SDSS_SOLARA_REMOTE", "0").lower() in ("1", "true", "yes")
+
+
+def get_remote_cache_size() -> int:
+    """get the remote file cache byte budget"""
+    return int(os.getenv("SDSS_SOLARA_REMOTE_CACHE_BYTES", 10 * 1024**3))
+
+
+def get_remote_timeout() -> float:
+    """get the remote download connect and read timeout, in seconds"""
+    return float(os.getenv("SDSS_SOLARA_REMOTE_TIMEOUT", 30))
+
+
+def remote_url(path: str, release: str = "IPL3") -> str:
+    """Get the https url of a SAS file path
+
+    Uses the ``SDSS_SOLARA_REMOTE_URL`` base url when set, otherwise the
+    public SAS for data releases and the SDSS-V SAS for internal releases.
+    """
+    base = os.getenv("SDSS_SOLARA_REMOTE_URL")
+    if not base:
+        public = release.upper().startswith("DR")
+        base = "https://data.sdss.org/sas/" if public else "https://data.sdss5.org/sas/"
+
+    sas = os.getenv("SAS_BASE_DIR", "")
+    rel = os.path.relpath(path, sas) if sas and os.path.isabs(path) else path
+    if rel.startswith(".."):
+        rel = path
+    return urllib.parse.urljoin(base.rstrip("/") + "/", rel.lstrip("/"))
+
+
+def _suffix(url: str) -> str:
+    """Get the file suffixes of a url, e.g. .fits or .fits.gz"""
+    name = pathlib.PurePosixPath(urllib.parse.urlparse(url).path).name
+    return "".join(pathlib.PurePosixPath(name).suffixes)
+
+
+class RemoteCache:
+    """Content-addressed on-disk cache of remote files
+
+    Files are streamed to a temporary file while hashed, and renamed into
+    ``objects/<sha256><suffix>`` only when complete, so readers never see a
+    partial file.  A ref per url points to its object, so files shared by
+    several urls are stored once.  Concurrent fetches of a url in the
+    process share one download, and the least recently used objects are
+    evicted once the byte budget is exceeded.
+
+    Parameters
+    ----------
+    directory : str
+        the cache directory, defaulting to the ``remote`` cache dir
+    max_bytes : int
+        the total byte budget of the cached objects
+    session : requests.Session
+        the http session to download with
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None, session: requests.Session = None):
+        self.directory = pathlib.Path(directory) if directory else get_cache_dir("remote")
+        self.objects = self.directory / "objects"
+        self.refs = self.directory / "refs"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.refs.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = get_remote_cache_size() if max_bytes is None else max_bytes
+        self.session = session or create_session()
+        self.timeout = get_remote_timeout()
+        self.hits = 0
+        self.misses = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _ref(self, url: str) -> pathlib.Path:
+        """Get the ref file of a url"""
+        return self.refs / hashlib.sha256(url.encode()).hexdigest()
+
+    def lookup(self, url: str) -> str:
+        """Get the cached path of a url, or None"""
+        try:
+            name = self._ref(url).read_text().strip()
+        except FileNotFoundError:
+            return None
+        path = self.objects / name
+        try:
+            # mark as recently used by the access time, keeping the mtime
+            # that the parsed spectrum caches are keyed on
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+        except FileNotFoundError:
+            return None
+        return path.as_posix()
+
+    def exists(self, url: str) -> bool:
+        """Check a remote file is cached, or else available, with a HEAD request"""
+        if self.lookup(url):
+            return True
+        try:
+            resp = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning("failed to check %s: %s", url, e)
+            return False
+        return resp.ok
+
+    def fetch(self, url: str) -> str:
+        """Get the local path of a remote file, downloading it if needed
+
+        Raises
+        ------
+        RemoteFetchError
+            when the file cannot be downloaded
+        """
+        path = self.lookup(url)
+        if path:
+            self.hits += 1
+            return path
+
+        with self._lock:
+            future = self._inflight.get(url)
+            owner = future is None
+            if owner:
+                future = self._inflight[url] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            path = self.lookup(url) or self._download(url)
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    def _download(self, url: str) -> str:
+        """Stream a url into the cache, returning the object path"""
+        self.misses += 1
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.objects, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                try:
+                    with self.session.get(url, stream=True, timeout=self.timeout) as resp:
+                        resp.raise_for_status()
+                        size = 0
+                        for chunk in resp.iter_content(chunk_size=1024**2):
+                            f.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+                        expected = resp.headers.get("Content-Length")
+                except requests.RequestException as e:
+                    raise RemoteFetchError(f"Failed to download {url}: {e}") from e
+            if expected is not None and "Content-Encoding" not in resp.headers and int(expected) != size:
+                raise RemoteFetchError(f"Incomplete download of {url}: {size} of {expected} bytes")
+
+            name = digest.hexdigest() + _suffix(url)
+            path = self.objects / name
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+        self._write_ref(url, name)
+        logger.info("downloaded %s (%d bytes)", url, size)
+        self.evict(keep=path)
+        return path.as_posix()
+
+    def _write_ref(self, url: str, name: str):
+        """Atomically point the ref of a url to an object"""
+        ref = self._ref(url)
+        fd, tmp = tempfile.mkstemp(dir=self.refs, suffix=".part")
+        with os.fdopen(fd, "w") as f:
+            f.write(name)
+        os.replace(tmp, ref)
+
+    def evict(self, keep: pathlib.Path = None):
+        """Remove the least recently used objects until within the byte budget"""
+        entries = []
+        for entry in os.scandir(self.objects):
+            if entry.name.endswith(".part"):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_atime, st.st_size, entry.path))
+
+        total = sum(i[1] for i in entries)
+        for __, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path == str(keep):
+                continue
+            try:
+                os.unlink(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    def size(self) -> int:
+        """Get the total bytes of the cached objects"""
+        return sum(e.stat().st_size for e in os.scandir(self.objects) if not e.name.endswith(".part"))
+
+
+_remote_cache = None
+_remote_lock = threading.Lock()
+
+
+def get_remote_cache() -> RemoteCache:
+    """Get the shared remote file cache"""
+    global _remote_cache
+    with _remote_lock:
+        if _remote_cache is None:
+            _remote_cache = RemoteCache()
+        return _remote_cache
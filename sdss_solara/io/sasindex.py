@@ -0,0 +1,251 @@
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+from sdss_solara.io.paths import (
+    get_cache_dir,
+    get_release_dir,
+    get_release_name,
+    get_sdssid,
+    get_specformat,
+    make_label,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    release TEXT NOT NULL,
+    dir TEXT NOT NULL,
+    size INTEGER,
+    mtime INTEGER,
+    format TEXT,
+    label TEXT,
+    sdssid INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_release ON files (release);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS files_sdssid ON files (sdssid);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    release TEXT NOT NULL,
+    parent TEXT,
+    mtime INTEGER
+);
+CREATE INDEX IF NOT EXISTS dirs_release ON dirs (release);
+CREATE TABLE IF NOT EXISTS refreshed (
+    release TEXT PRIMARY KEY,
+    time REAL
+);
+"""
+
+
+def is_fits(name: str) -> bool:
+    """Check if a file name is a FITS file"""
+    return name.endswith((".fits", ".fits.gz"))
+
+
+class SasIndex:
+    """On-disk SQLite index of the FITS files in a local SAS tree
+
+    Stores the path, size, mtime, specutils format, data label and sdss_id
+    of every FITS file in a release.  Refreshes are incremental: only
+    directories whose mtime changed since the last refresh are rescanned.
+    Releases are keyed by their SAS directory name, so all spellings of a
+    release, e.g. IPL3 and ipl-3, share their rows.
+
+    Parameters
+    ----------
+    path : str
+        the path to the SQLite index file
+    max_age : float
+        the time, in seconds, after which a query refreshes the release
+    """
+
+    def __init__(self, path: str = None, max_age: float = None):
+        self.path = str(
+            path
+            or os.getenv("SDSS_SOLARA_SAS_INDEX")
+            or get_cache_dir() / "sas_index.sqlite"
+        )
+        self.max_age = (
+            float(os.getenv("SDSS_SOLARA_SAS_INDEX_MAX_AGE", 300))
+            if max_age is None
+            else max_age
+        )
+        self._lock = threading.Lock()
+        with self.connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def connect(self):
+        """Open a connection to the index, committing on success"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def refresh(self, release: str, full: bool = False) -> int:
+        """Refresh the index of a release from the SAS tree
+
+        Parameters
+        ----------
+        release : str
+            the data release
+        full : bool
+            if True, rescan every directory regardless of its mtime
+
+        Returns
+        -------
+        int
+            the number of rescanned directories
+        """
+        release = get_release_name(release)
+        root = get_release_dir(release).as_posix()
+        with self._lock, self.connect() as conn:
+            known = {
+                path: (mtime, parent)
+                for path, mtime, parent in conn.execute(
+                    "SELECT path, mtime, parent FROM dirs WHERE release = ?", (release,)
+                )
+            }
+            children = {}
+            for path, (__, parent) in known.items():
+                children.setdefault(parent, []).append(path)
+
+            seen = set()
+            scanned = 0
+            stack = [(root, None)]
+            while stack:
+                dirpath, parent = stack.pop()
+                try:
+                    mtime = os.stat(dirpath).st_mtime_ns
+                except OSError:
+                    continue
+                seen.add(dirpath)
+
+                if not full and dirpath in known and known[dirpath][0] == mtime:
+                    stack.extend((i, dirpath) for i in children.get(dirpath, []))
+                    continue
+
+                subdirs = self._scan_dir(conn, release, dirpath)
+                conn.execute(
+                    "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                    (dirpath, release, parent, mtime),
+                )
+                stack.extend((i, dirpath) for i in subdirs)
+                scanned += 1
+
+            # drop directories which no longer exist
+            gone = [(i,) for i in known if i not in seen]
+            conn.executemany("DELETE FROM dirs WHERE path = ?", gone)
+            conn.executemany("DELETE FROM files WHERE dir = ?", gone)
+            conn.execute(
+                "INSERT OR REPLACE INTO refreshed VALUES (?, ?)", (release, time.time())
+            )
+        return scanned
+
+    def _scan_dir(self, conn: sqlite3.Connection, release: str, dirpath: str) -> list:
+        """Rescan the FITS files of a single directory, returning its subdirectories"""
+        subdirs = []
+        rows = []
+        with os.scandir(dirpath) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif is_fits(entry.name):
+                    st = entry.stat()
+                    rows.append(
+                        (
+                            entry.path,
+                            release,
+                            dirpath,
+                            st.st_size,
+                            st.st_mtime_ns,
+                            get_specformat(entry.path),
+                            make_label(entry.path),
+                            get_sdssid(entry.name),
+                        )
+                    )
+        conn.execute("DELETE FROM files WHERE dir = ?", (dirpath,))
+        conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return subdirs
+
+    def is_stale(self, release: str) -> bool:
+        """Check if a release has not been refreshed within max_age"""
+        release = get_release_name(release)
+        with self.connect() as conn:
+            row = conn.execute(
+                "SELECT time FROM refreshed WHERE release = ?", (release,)
+            ).fetchone()
+        return row is None or time.time() - row[0] > self.max_age
+
+    def query(
+        self,
+        release: str = None,
+        sdssid: int = None,
+        pattern: str = None,
+        refresh: bool = True,
+    ) -> list:
+        """Query the index for file paths
+
+        Parameters
+        ----------
+        release : str
+            the data release to select
+        sdssid : int
+            the sdss_id to select
+        pattern : str
+            a glob pattern matched against the full path
+        refresh : bool
+            if True, refresh the release first when it is stale
+
+        Returns
+        -------
+        list
+            the sorted file paths
+        """
+        if release and refresh and self.is_stale(release):
+            self.refresh(release)
+
+        where, args = [], []
+        if release:
+            where.append("release = ?")
+            args.append(get_release_name(release))
+        if sdssid is not None:
+            where.append("sdssid = ?")
+            args.append(int(sdssid))
+        if pattern:
+            where.append("path GLOB ?")
+            args.append(pattern)
+        sql = "SELECT path FROM files"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self.connect() as conn:
+            return [i for (i,) in conn.execute(sql + " ORDER BY path", args)]
+
+    def records(self, paths: list) -> list:
+        """Get the indexed records for a list of file paths"""
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [
+                dict(row)
+                for i in paths
+                for row in conn.execute("SELECT * FROM files WHERE path = ?", (i,))
+            ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_sas_index() -> SasIndex:
+    """Get the process-wide SAS index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SasIndex()
+        return _index
@@ -0,0 +1,151 @@
+import collections
+import logging
+import sys
+import threading
+import weakref
+
+from sdss_solara.metrics import current_session
+
+logger = logging.getLogger(__name__)
+
+
+class SharedStore:
+    """Process-wide index of parsed spectra, pinned by the sessions using them
+
+    Every live parsed object is indexed weakly by its file key, so sessions
+    reading a file another session holds get the same, read-only, object
+    rather than a private copy.  Sessions pin the objects loaded into their
+    viewer, with a reference count per session, and release them all when
+    the session closes, so memory grows with the number of distinct files
+    rather than the number of sessions.
+    """
+
+    def __init__(self):
+        self._objects = weakref.WeakValueDictionary()
+        self._keys = {}
+        self._pins = collections.defaultdict(collections.Counter)
+        self._pinned = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, key):
+        """Get the live object of a file key, or None"""
+        obj = self._objects.get(key)
+        if obj is not None:
+            self.hits += 1
+        return obj
+
+    def register(self, key, obj):
+        """Index a parsed object by its file key, returning the indexed object
+
+        When another thread registered the key first, its object is returned
+        so all sessions share one copy.
+        """
+        with self._lock:
+            current = self._objects.get(key)
+            if current is not None:
+                return current
+            freeze(obj)
+            self._objects[key] = obj
+            oid = id(obj)
+            self._keys[oid] = key
+            weakref.finalize(obj, self._keys.pop, oid, None)
+        return obj
+
+    def pin(self, obj, session: str = None) -> bool:
+        """Hold an indexed object for a session, returning whether it is indexed
+
+        The session defaults to that of the current solara context, and its
+        pins are released when the session closes.
+        """
+        session = current_session() if session is None else session
+        with self._lock:
+            key = self._keys.get(id(obj))
+            if key is None or not session:
+                return False
+            first = session not in self._pins
+            self._pins[session][key] += 1
+            self._pinned[key] = obj
+        if first and session == current_session():
+            on_session_close(lambda: self.release(session))
+        return True
+
+    def unpin(self, obj, session: str = None):
+        """Drop one hold of an object by a session"""
+        session = current_session() if session is None else session
+        with self._lock:
+            key = self._keys.get(id(obj))
+            pins = self._pins.get(session)
+            if key is None or not pins or not pins[key]:
+                return
+            pins[key] -= 1
+            if not pins[key]:
+                del pins[key]
+            self._drop_unused([key])
+
+    def release(self, session: str):
+        """Drop all holds of a session"""
+        with self._lock:
+            pins = self._pins.pop(session, None)
+            if pins:
+                self._drop_unused(list(pins))
+        logger.debug("released shared spectra of session %s", session)
+
+    def _drop_unused(self, keys: list):
+        """Unpin the keys no session holds, under the lock"""
+        for key in keys:
+            if not any(key in pins for pins in self._pins.values()):
+                self._pinned.pop(key, None)
+
+    def refcount(self, key) -> int:
+        """Get the number of session holds of a file key"""
+        with self._lock:
+            return sum(pins[key] for pins in self._pins.values())
+
+    def clear(self):
+        """Drop all indexed objects and session holds"""
+        with self._lock:
+            self._objects.clear()
+            self._keys.clear()
+            self._pins.clear()
+            self._pinned.clear()
+            self.hits = 0
+
+    def stats(self) -> dict:
+        """Return the store counters"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "objects": len(self._objects),
+                "pinned": len(self._pinned),
+                "sessions": len(self._pins),
+            }
+
+
+def freeze(obj):
+    """Make the arrays of a Spectrum or SpectrumList read-only"""
+    if isinstance(obj, list):
+        for i in obj:
+            freeze(i)
+        return
+
+    # the flux is a new view of the data on each access, so freeze the data
+    unc = getattr(obj, "uncertainty", None)
+    arrays = [getattr(obj, "data", None), getattr(obj, "spectral_axis", None), getattr(obj, "mask", None)]
+    arrays.append(unc.array if unc is not None else None)
+    for arr in arrays:
+        if arr is not None and getattr(arr, "flags", None) is not None:
+            arr.flags.writeable = False
+
+
+def on_session_close(func) -> bool:
+    """Call a function when the current solara kernel context closes"""
+    kernel_context = sys.modules.get("solara.server.kernel_context")
+    if kernel_context is None or not kernel_context.has_current_context():
+        return False
+    kernel_context.get_current_context().on_close(func)
+    return True
+
+
+# process-wide store of parsed spectra shared by all sessions
+shared_store = SharedStore()
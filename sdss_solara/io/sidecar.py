@@ -0,0 +1,300 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from astropy import nddata
+from astropy import units as u
+from astropy.io import fits
+from astropy.wcs import WCS
+from specutils import Spectrum, SpectrumList
+
+from sdss_solara.io.paths import get_cache_dir
+from sdss_solara.io.parsepool import get_parse_pool, use_parse_pool
+
+logger = logging.getLogger(__name__)
+
+# bump when the sidecar layout changes, to ignore old sidecars
+VERSION = 2
+
+# the age, in seconds, of a temporary sidecar directory left by an interrupted write
+TMP_MAX_AGE = 3600
+
+
+def use_sidecars() -> bool:
+    """Check if parsed spectra are cached in binary sidecars"""
+    return os.getenv("SDSS_SOLARA_SIDECARS", "1").lower() not in ("0", "false", "no")
+
+
+def get_sidecar_cache_size() -> int:
+    """get the sidecar cache byte budget, or 0 when unlimited"""
+    return int(os.getenv("SDSS_SOLARA_SIDECAR_CACHE_BYTES", 10 * 1024**3))
+
+
+def sidecar_dir(path: str, fmt: str, kind: str) -> pathlib.Path:
+    """Get the sidecar directory of a data file, format and specutils class"""
+    key = f"{os.path.abspath(path)}:{fmt}:{kind}"
+    return get_cache_dir("sidecars") / hashlib.sha1(key.encode()).hexdigest()[:24]
+
+
+def _native(arr: np.ndarray) -> np.ndarray:
+    """Get an array in native byte order, as FITS data is big-endian"""
+    arr = np.asarray(arr)
+    return arr.astype(arr.dtype.newbyteorder("=")) if not arr.dtype.isnative else arr
+
+
+def _split_spectrum(spec: Spectrum) -> tuple:
+    """Split a spectrum into its metadata and native byte order arrays
+
+    A FITS WCS is kept as its header, while a lookup table WCS is rebuilt
+    from the spectral axis array.  The rest frame is kept as the redshift,
+    velocity convention and rest value.
+    """
+    rest = spec.rest_value
+    info = {
+        "flux_unit": spec.flux.unit.to_string(),
+        "spectral_unit": spec.spectral_axis.unit.to_string(),
+        "wcs": spec.wcs.to_header_string() if isinstance(spec.wcs, WCS) else None,
+        "redshift": float(spec.redshift),
+        "velocity_convention": spec.velocity_convention,
+        "rest_value": (float(rest.value), rest.unit.to_string()) if rest is not None else None,
+        "uncertainty": None,
+        "mask": spec.mask is not None,
+        "meta": spec.meta,
+    }
+    arrays = {"flux": _native(spec.flux.value), "wave": _native(spec.spectral_axis.value)}
+    if spec.uncertainty is not None:
+        unc = spec.uncertainty
+        info["uncertainty"] = (type(unc).__name__, unc.unit.to_string() if unc.unit is not None else None)
+        arrays["unc"] = _native(unc.array)
+    if spec.mask is not None:
+        arrays["mask"] = np.asarray(spec.mask)
+    return info, arrays
+
+
+def _build_spectrum(info: dict, load) -> Spectrum:
+    """Rebuild a spectrum from its metadata and a function loading each array"""
+    uncertainty = None
+    if info["uncertainty"]:
+        name, unit = info["uncertainty"]
+        uncertainty = getattr(nddata, name)(load("unc"), unit=unit)
+    if info["wcs"] is not None:
+        axis = {"wcs": WCS(fits.Header.fromstring(info["wcs"]))}
+    else:
+        axis = {"spectral_axis": u.Quantity(load("wave"), info["spectral_unit"], copy=False)}
+    rest = info["rest_value"]
+    return Spectrum(
+        flux=u.Quantity(load("flux"), info["flux_unit"], copy=False),
+        uncertainty=uncertainty,
+        mask=load("mask") if info["mask"] else None,
+        meta=info["meta"],
+        redshift=info["redshift"],
+        velocity_convention=info["velocity_convention"],
+        rest_value=u.Quantity(*rest) if rest is not None else None,
+        **axis,
+    )
+
+
+def _encode(obj):
+    """Encode the FITS headers, arrays and quantities of spectrum meta as JSON"""
+    if isinstance(obj, fits.Header):
+        return {"__header__": obj.tostring()}
+    if isinstance(obj, u.Quantity):
+        return {"__quantity__": _encode(obj.value), "unit": obj.unit.to_string()}
+    if isinstance(obj, np.ndarray):
+        bytes_ = obj.dtype.kind == "S"
+        values = np.char.decode(obj, "latin-1") if bytes_ else obj
+        return {
+            "__array__": values.tolist(),
+            "dtype": obj.dtype.str,
+            "chararray": isinstance(obj, np.char.chararray),
+        }
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, bytes):
+        return {"__bytes__": obj.decode("latin-1")}
+    raise TypeError(f"cannot store {type(obj).__name__} in a sidecar")
+
+
+def _decode(obj: dict):
+    """Decode the objects encoded by _encode"""
+    if "__header__" in obj:
+        return fits.Header.fromstring(obj["__header__"])
+    if "__quantity__" in obj:
+        return u.Quantity(obj["__quantity__"], obj["unit"])
+    if "__array__" in obj:
+        dtype = np.dtype(obj["dtype"])
+        if dtype.kind == "S":
+            arr = np.char.encode(np.array(obj["__array__"], dtype=str), "latin-1").astype(dtype)
+        else:
+            arr = np.array(obj["__array__"], dtype=dtype)
+        return arr.view(np.char.chararray) if obj["chararray"] else arr
+    if "__bytes__" in obj:
+        return obj["__bytes__"].encode("latin-1")
+    return obj
+
+
+def _write_spectrum(directory: pathlib.Path, i: int, spec: Spectrum) -> dict:
+    """Write the arrays of a spectrum, returning its metadata"""
+    info, arrays = _split_spectrum(spec)
+    for name, arr in arrays.items():
+        np.save(directory / f"{i}_{name}.npy", arr)
+    return info
+
+
+def _read_spectrum(directory: pathlib.Path, i: int, info: dict) -> Spectrum:
+    """Rebuild a spectrum from memory-mapped arrays"""
+
+    def load(name):
+        # read-only, so the pages are shared by all sessions and processes
+        return np.load(directory / f"{i}_{name}.npy", mmap_mode="r")
+
+    return _build_spectrum(info, load)
+
+
+def to_payload(obj) -> dict:
+    """Split a Spectrum or SpectrumList into picklable metadata and arrays"""
+    spectra = list(obj) if isinstance(obj, SpectrumList) else [obj]
+    return {"kind": type(obj).__name__, "spectra": [_split_spectrum(i) for i in spectra]}
+
+
+def from_payload(payload: dict):
+    """Rebuild a Spectrum or SpectrumList from its payload"""
+    spectra = [_build_spectrum(info, arrays.__getitem__) for info, arrays in payload["spectra"]]
+    return SpectrumList(spectra) if payload["kind"] == "SpectrumList" else spectra[0]
+
+
+def write_sidecar(obj, path: str, fmt: str, target: pathlib.Path = None) -> bool:
+    """Write the sidecar of a parsed Spectrum or SpectrumList
+
+    The arrays are saved as .npy files, with the units, WCS, rest frame,
+    uncertainty type, meta and source file stat as JSON, so no code is
+    loaded from a shared cache directory.  Spectra with meta that JSON
+    cannot hold get no sidecar.  The sidecar is written to a temporary
+    directory and renamed into place, at ``target`` when given.
+
+    Returns
+    -------
+    bool
+        whether the sidecar was written
+    """
+    kind = type(obj).__name__
+    target = pathlib.Path(target) if target else sidecar_dir(path, fmt, kind)
+    st = os.stat(path)
+    spectra = list(obj) if isinstance(obj, SpectrumList) else [obj]
+    tmp = pathlib.Path(tempfile.mkdtemp(dir=target.parent, prefix=".tmp-"))
+    try:
+        infos = [_write_spectrum(tmp, i, s) for i, s in enumerate(spectra)]
+        meta = {"version": VERSION, "mtime": st.st_mtime_ns, "size": st.st_size, "kind": kind, "spectra": infos}
+        with open(tmp / "meta.json", "w") as f:
+            json.dump(meta, f, default=_encode)
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+        os.rename(tmp, target)
+    except Exception as e:
+        logger.debug("failed to write sidecar for %s: %s", path, e)
+        shutil.rmtree(tmp, ignore_errors=True)
+        return False
+
+    evict_sidecars(target.parent, keep=target)
+    return True
+
+
+def _dir_size(path: str) -> int:
+    """Get the total bytes of the files in a directory"""
+    size = 0
+    for entry in os.scandir(path):
+        with contextlib.suppress(FileNotFoundError):
+            size += entry.stat().st_size
+    return size
+
+
+def evict_sidecars(directory: pathlib.Path = None, max_bytes: int = None, keep: pathlib.Path = None):
+    """Remove the least recently used sidecars until within the byte budget
+
+    Also removes the temporary directories left by interrupted writes.
+    Sidecars still memory-mapped by a process stay readable by it until
+    unmapped, and are parsed again on the next read.
+    """
+    directory = pathlib.Path(directory) if directory else get_cache_dir("sidecars")
+    max_bytes = get_sidecar_cache_size() if max_bytes is None else max_bytes
+    now = time.time()
+    entries = []
+    for entry in os.scandir(directory):
+        try:
+            st = entry.stat()
+            if entry.name.startswith(".tmp-"):
+                if now - st.st_mtime > TMP_MAX_AGE:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            elif entry.is_dir():
+                entries.append((st.st_atime, _dir_size(entry.path), entry.path))
+        except FileNotFoundError:
+            continue
+
+    if not max_bytes:
+        return
+    total = sum(i[1] for i in entries)
+    for __, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep is not None and path == str(keep):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def read_sidecar(cls, path: str, fmt: str):
+    """Read a Spectrum or SpectrumList from its sidecar
+
+    Returns None when there is no sidecar, or it is stale because the
+    source file mtime or size changed.
+    """
+    directory = sidecar_dir(path, fmt, cls.__name__)
+    try:
+        with open(directory / "meta.json") as f:
+            meta = json.load(f, object_hook=_decode)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    st = os.stat(path)
+    if (meta.get("version"), meta["mtime"], meta["size"]) != (VERSION, st.st_mtime_ns, st.st_size):
+        return None
+
+    try:
+        spectra = [_read_spectrum(directory, i, info) for i, info in enumerate(meta["spectra"])]
+    except (FileNotFoundError, ValueError) as e:
+        logger.debug("failed to read sidecar for %s: %s", path, e)
+        return None
+
+    # mark as recently used by the access time
+    with contextlib.suppress(OSError):
+        os.utime(directory, ns=(time.time_ns(), directory.stat().st_mtime_ns))
+    return SpectrumList(spectra) if cls is SpectrumList else spectra[0]
+
+
+def read_with_sidecar(cls, path: str, fmt: str):
+    """Read a spectrum from its sidecar, or parse it and write the sidecar
+
+    Spectra read from a sidecar are backed by read-only memory maps.  Files
+    are parsed in the parsing worker processes when enabled.
+    """
+    if use_sidecars():
+        obj = read_sidecar(cls, path, fmt)
+        if obj is not None:
+            return obj
+
+    if use_parse_pool():
+        # parse, and write the sidecar, in a worker process
+        return get_parse_pool().read(cls, path, fmt)
+
+    obj = cls.read(path, format=fmt)
+    if use_sidecars() and write_sidecar(obj, path, fmt):
+        # use the file-backed arrays, rather than a private copy
+        return read_sidecar(cls, path, fmt) or obj
+    return obj
@@ -0,0 +1,162 @@
+import threading
+import weakref
+from typing import NamedTuple
+
+import numpy as np
+from astropy import units as u
+from specutils import SpectrumList
+
+# the quantiles kept for each dataset; the last is the maximum
+QUANTILES = (0.01, 0.5, 0.99, 1.0)
+
+
+class FluxStats(NamedTuple):
+    """Robust flux statistics of a dataset, in its flux unit"""
+    lo: float
+    median: float
+    hi: float
+    max: float
+    n: int
+    unit: u.UnitBase = None
+    # the median spectral axis value, to convert between flux density units
+    wave: u.Quantity = None
+
+
+def flux_stats(flux, mask=None, spectral_axis=None) -> FluxStats:
+    """Compute the flux quantiles and max of good pixels in one pass
+
+    Works on the raw float values, without Quantity temporaries, and uses a
+    single partition for all quantiles.
+
+    Parameters
+    ----------
+    flux : array-like
+        the flux values, a Quantity or array
+    mask : array-like
+        an optional mask, True for bad pixels
+    spectral_axis : Quantity
+        the spectral axis, to convert the stats to other flux density units
+
+    Returns
+    -------
+    FluxStats
+        the 1st, 50th and 99th percentile, max and number of good pixels, or
+        None when there are no good pixels
+    """
+    values = np.asarray(getattr(flux, "value", flux), dtype=float).ravel()
+    good = np.isfinite(values)
+    if mask is not None:
+        good &= ~np.asarray(mask, dtype=bool).ravel()
+    values = values[good]
+    if not values.size:
+        return None
+    lo, median, hi, top = np.quantile(values, QUANTILES)
+    wave = np.nanmedian(spectral_axis) if spectral_axis is not None and np.size(spectral_axis) else None
+    return FluxStats(lo, median, hi, top, values.size, getattr(flux, "unit", None), wave)
+
+
+def convert(stats: FluxStats, unit: u.UnitBase) -> FluxStats:
+    """Convert stats to a flux unit, or None when the units are incompatible
+
+    Flux densities per frequency and per wavelength are converted at the
+    median spectral axis value of the dataset.
+    """
+    if stats is None or unit is None or stats.unit is None or stats.unit == unit:
+        return stats
+    equivalencies = u.spectral_density(stats.wave) if stats.wave is not None else []
+    try:
+        factor = stats.unit.to(unit, equivalencies=equivalencies)
+    except u.UnitConversionError:
+        return None
+    lo, median, hi, top = (i * factor for i in stats[:4])
+    return stats._replace(lo=lo, median=median, hi=hi, max=top, unit=unit)
+
+
+def combine(stats: list, unit: u.UnitBase = None) -> FluxStats:
+    """Combine the stats of several datasets
+
+    Converts the stats to ``unit``, by default that of the first dataset,
+    skipping datasets in incompatible units, then takes the widest
+    percentile range, the overall max and the pixel weighted median of the
+    medians.
+    """
+    stats = [i for i in stats if i is not None]
+    if not stats:
+        return None
+    unit = stats[0].unit if unit is None else unit
+    stats = [i for i in (convert(i, unit) for i in stats) if i is not None]
+    if not stats:
+        return None
+    arr = np.array([i[:5] for i in stats], dtype=float)
+    order = np.argsort(arr[:, 1])
+    cumulative = np.cumsum(arr[order, 4])
+    middle = order[np.searchsorted(cumulative, cumulative[-1] / 2)]
+    return FluxStats(
+        arr[:, 0].min(),
+        arr[middle, 1],
+        arr[:, 2].max(),
+        arr[:, 3].max(),
+        int(cumulative[-1]),
+        unit,
+        stats[middle].wave,
+    )
+
+
+# stats of each spectrum object, by id as SpectrumLists are unhashable, shared by
+# all sessions using the cached objects and dropped when the object is collected
+_object_stats = {}
+_object_lock = threading.Lock()
+
+
+def get_stats(obj) -> FluxStats:
+    """Get the, cached, flux stats of a Spectrum or SpectrumList"""
+    key = id(obj)
+    with _object_lock:
+        if key in _object_stats:
+            return _object_stats[key]
+
+    if isinstance(obj, SpectrumList):
+        stats = combine([flux_stats(i.flux, i.mask, i.spectral_axis) for i in obj])
+    else:
+        stats = flux_stats(obj.flux, obj.mask, obj.spectral_axis)
+
+    with _object_lock:
+        if key not in _object_stats:
+            _object_stats[key] = stats
+            weakref.finalize(obj, _object_stats.pop, key, None)
+    return stats
+
+
+class DatasetStats:
+    """Flux stats of the datasets loaded in one app, kept up to date incrementally"""
+
+    def __init__(self):
+        self.datasets = {}
+        self._combined = None
+
+    def add(self, label: str, obj):
+        """Add, or replace, the stats of a loaded dataset"""
+        self.datasets[label] = get_stats(obj)
+        self._combined = None
+
+    def discard(self, label: str):
+        """Remove the stats of an unloaded dataset"""
+        if self.datasets.pop(label, None) is not None:
+            self._combined = None
+
+    def combined(self, unit: u.UnitBase = None) -> FluxStats:
+        """Get the combined stats of all loaded datasets, in a flux unit"""
+        if self._combined is None or self._combined[0] != unit:
+            self._combined = (unit, combine(list(self.datasets.values()), unit))
+        return self._combined[1]
+
+
+_app_stats = weakref.WeakKeyDictionary()
+
+
+def get_app_stats(app) -> DatasetStats:
+    """Get the dataset stats of a jdaviz app or helper"""
+    app = getattr(app, "app", app)
+    if app not in _app_stats:
+        _app_stats[app] = DatasetStats()
+    return _app_stats[app]
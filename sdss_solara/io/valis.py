@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import dotenv
+
+from sdss_solara.io.http import create_session
+
+
+def get_url():
+    """get the valis api url"""
+    url = os.getenv("VALIS_API_URL")
+    if url:
+        return url
+
+    env = os.getenv("VALIS_ENV") or os.getenv("SOLARA_ENV") or "development"
+    name = (
+        ".env.dev"
+        if env.startswith("dev")
+        else ".env.test"
+        if env.startswith("test")
+        else ".env.prod"
+    )
+    dotenv.load_dotenv(dotenv.find_dotenv(name))
+    return os.getenv("VALIS_API_URL") or "http://localhost:8000"
+
+
+class ValisClient:
+    """Client for the Valis API with pooled connections and a TTL cache
+
+    Concurrent requests for the same sdssid and release share a single
+    in-flight call, and successful responses are cached for ``ttl`` seconds.
+
+    Parameters
+    ----------
+    url : str
+        the base url of the Valis API
+    timeout : float
+        the connect and read timeout of each request, in seconds
+    ttl : float
+        the time, in seconds, to cache responses
+    maxsize : int
+        the maximum number of cached responses
+    """
+
+    def __init__(
+        self,
+        url: str = None,
+        timeout: float = None,
+        ttl: float = None,
+        maxsize: int = 1024,
+    ):
+        self.url = (url or get_url()).rstrip("/")
+        self.timeout = timeout or float(os.getenv("SDSS_SOLARA_VALIS_TIMEOUT", 10))
+        self.ttl = ttl or float(os.getenv("SDSS_SOLARA_VALIS_TTL", 300))
+        self.maxsize = maxsize
+        self.session = create_session()
+        self._cache = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, sdssid, release: str) -> list:
+        """Request the pipeline files for a target"""
+        resp = self.session.get(
+            self.url + f"/target/pipelines/{sdssid}",
+            json={"release": release},
+            timeout=self.timeout,
+        )
+        if resp.status_code >= 500:
+            resp.raise_for_status()
+        if not resp.ok:
+            return []
+        return sum(resp.json()["files"].values(), [])
+
+    def get_pipeline_files(self, sdssid, release: str) -> list:
+        """Get the list of pipeline data files for a target
+
+        Parameters
+        ----------
+        sdssid : int | str
+            the sdss_id of the target
+        release : str
+            the data release
+
+        Returns
+        -------
+        list
+            the file paths of all pipeline products for the target
+        """
+        key = (str(sdssid), release)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and hit[0] > time.monotonic():
+                return list(hit[1])
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            return list(future.result())
+
+        try:
+            files = self._fetch(sdssid, release)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(files)
+            with self._lock:
+                self._cache[key] = (time.monotonic() + self.ttl, files)
+                while len(self._cache) > self.maxsize:
+                    self._cache.pop(next(iter(self._cache)))
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return list(files)
+
+    def clear(self):
+        """Clear the response cache"""
+        with self._lock:
+            self._cache.clear()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ValisClient:
+    """Get the process-wide Valis client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ValisClient()
+        return _client
@@ -0,0 +1,187 @@
+import bisect
+import collections
+import contextlib
+import logging
+import sys
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf"))
+
+# the url path of the plain text Prometheus endpoint
+METRICS_PATH = "/_sdss_solara/metrics"
+
+# sentinel to look up the session of the current solara context
+CURRENT = object()
+
+
+def current_session() -> str:
+    """Get the session id of the current solara context, or an empty string"""
+    kernel_context = sys.modules.get("solara.server.kernel_context")
+    if kernel_context is None or not kernel_context.has_current_context():
+        return ""
+    return kernel_context.get_current_context().session_id
+
+
+class Histogram:
+    """A cumulative histogram of durations, in the style of Prometheus"""
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Add an observation"""
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self) -> list:
+        """Get the (upper bound, cumulative count) of each bucket"""
+        with self._lock:
+            counts = list(self.counts)
+        total, out = 0, []
+        for bound, count in zip(self.buckets, counts):
+            total += count
+            out.append((bound, total))
+        return out
+
+
+class Metrics:
+    """Timing spans of each loading stage, per session and per file
+
+    Each span is logged, added to a histogram of its stage, and kept in a
+    short history of recent spans.
+
+    Parameters
+    ----------
+    maxlen : int
+        the number of recent spans to keep
+    """
+
+    def __init__(self, maxlen: int = 2000):
+        self.histograms = collections.defaultdict(Histogram)
+        self.recent = collections.deque(maxlen=maxlen)
+        self.sources = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, session=CURRENT, file: str = None, error: bool = False):
+        """Record the duration of a stage"""
+        if session is CURRENT:
+            session = current_session()
+        with self._lock:
+            hist = self.histograms[stage]
+        hist.observe(seconds)
+        self.recent.append(
+            {"time": time.time(), "stage": stage, "seconds": seconds, "session": session or "",
+             "file": file or "", "error": error}
+        )
+        logger.info(
+            "stage=%s seconds=%.4f session=%s file=%s error=%s", stage, seconds, session or "-", file or "-", error
+        )
+
+    @contextlib.contextmanager
+    def span(self, stage: str, session=CURRENT, file: str = None):
+        """Time a block of code as a stage
+
+        The session defaults to that of the current solara context; pass
+        ``session=None`` in worker threads, which do not own a session.
+        """
+        t0 = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - t0, session=session, file=file, error=error)
+
+    def spans(self, session: str = None) -> list:
+        """Get the recent spans, optionally of a single session"""
+        spans = list(self.recent)
+        if session is not None:
+            spans = [i for i in spans if i["session"] == session]
+        return spans
+
+    def add_counters(self, name: str, stats: Callable):
+        """Export the counters of a component, from a function returning a dict of numbers"""
+        with self._lock:
+            self.sources[name] = stats
+
+    def counters(self) -> dict:
+        """Get the current counters of each component"""
+        with self._lock:
+            sources = sorted(self.sources.items())
+        return {name: stats() for name, stats in sources}
+
+    def summary(self) -> dict:
+        """Get the count, total and mean seconds of each stage"""
+        with self._lock:
+            items = sorted(self.histograms.items())
+        return {
+            stage: {"count": h.count, "sum": h.sum, "mean": h.sum / h.count if h.count else 0.0}
+            for stage, h in items
+        }
+
+    def to_prometheus(self, name: str = "sdss_solara_stage_seconds") -> str:
+        """Export the stage histograms and component counters in the Prometheus text format"""
+        with self._lock:
+            items = sorted(self.histograms.items())
+        lines = [f"# HELP {name} Duration of data loading stages.", f"# TYPE {name} histogram"]
+        for stage, hist in items:
+            for bound, count in hist.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {hist.sum}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {hist.count}')
+        for source, values in self.counters().items():
+            for key, value in values.items():
+                metric = f"sdss_solara_{source}_{key}"
+                lines.extend([f"# TYPE {metric} gauge", f"{metric} {value}"])
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Clear all recorded spans"""
+        with self._lock:
+            self.histograms.clear()
+            self.recent.clear()
+
+
+metrics = Metrics()
+span = metrics.span
+
+
+async def metrics_endpoint(request):
+    """Starlette endpoint serving the metrics in the Prometheus text format"""
+    from starlette.responses import PlainTextResponse
+
+    return PlainTextResponse(metrics.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def add_metrics_endpoint(path: str = METRICS_PATH) -> bool:
+    """Add the plain text metrics endpoint to the running solara server
+
+    Returns True when added, or False outside the solara starlette server
+    or when already present.
+    """
+    server = sys.modules.get("solara.server.starlette")
+    if server is None:
+        return False
+
+    from starlette.routing import Route
+
+    routes = server.app.router.routes
+    if any(getattr(i, "path", None) == path for i in routes):
+        return False
+    # ahead of the catch-all page routes
+    routes.insert(0, Route(path, endpoint=metrics_endpoint))
+    return True
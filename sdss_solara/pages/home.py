@@ -1,8 +1,19 @@
 import solara
 
-from sdss_solara.pages.jdaviz_embed import Page as Embed
-from sdss_explorer.dashboard import Page as Dashboard, Layout as DashLayout
 from sdss_solara.components.message import Message, event_handler, set_initial_theme
+from sdss_solara.components.pool import app_pool
+from sdss_solara.io.cache import spectrum_cache  # noqa: F401, exports the cache counters
+from sdss_solara.metrics import add_metrics_endpoint, current_session, metrics
+
+# The embed and dashboard pages pull in jdaviz, specutils, astropy and the
+# explorer dashboard.  They are only imported when their route is first
+# visited, to keep server startup fast.
+
+# start pre-building jdaviz apps in the background, when a pool size is set
+app_pool.start()
+
+# serve the stage timings as plain text for Prometheus
+add_metrics_endpoint()
 
 
 @solara.component
@@ -19,18 +30,60 @@ def Home():
     Message(event_update=event_handler)
 
 
+@solara.component
+def Embed():
+    """lazily loaded jdaviz embed page"""
+    from sdss_solara.pages.jdaviz_embed import Page
+
+    return Page()
+
+
+@solara.component
+def DashLayout(children=[]):
+    """lazily loaded dashboard layout"""
+    from sdss_explorer.dashboard import Layout as DashLayout
+
+    return DashLayout(children=children)
+
+
 @solara.component
 def NewDash():
     """hack to insert the iframe message event handler into the dashboard"""
+    from sdss_explorer.dashboard import Page as Dashboard
+
     set_initial_theme()
     with solara.Column():
         Message(event_update=event_handler)
         Dashboard()
 
 
+@solara.component
+def Metrics():
+    """data loading stage timings"""
+    solara.Title("Metrics")
+    solara.Markdown("### Loading stages")
+    rows = [f"| {k} | {v['count']} | {v['mean']:.3f} | {v['sum']:.2f} |" for k, v in metrics.summary().items()]
+    solara.Markdown("\n".join(["| stage | count | mean (s) | total (s) |", "|---|---|---|---|", *rows]))
+
+    # the recent spans of this session
+    spans = metrics.spans(session=current_session())[-50:]
+    if spans:
+        solara.Markdown("### This session")
+        rows = [f"| {i['stage']} | {i['file']} | {i['seconds']:.3f} |" for i in spans]
+        solara.Markdown("\n".join(["| stage | file | seconds |", "|---|---|---|", *rows]))
+
+    solara.Markdown("### Caches")
+    rows = [f"| {k} | {c} | {v} |" for k, values in metrics.counters().items() for c, v in values.items()]
+    solara.Markdown("\n".join(["| component | counter | value |", "|---|---|---|", *rows]))
+
+    solara.Markdown("### Prometheus")
+    solara.Preformatted(metrics.to_prometheus())
+
+
 routes = [
     solara.Route(path="/", component=Home, label="Home", layout=Layout),
     solara.Route(path="embed", component=Embed, label="Embed"),
+    solara.Route(path="metrics", component=Metrics, label="Metrics"),
     solara.Route(
         path="dashboard",
         layout=DashLayout,
@@ -1,29 +1,49 @@
-import fnmatch
+import asyncio
+import logging
 import os
 import pathlib
-import urllib
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
-import dotenv
 import numpy as np
-import requests
 import solara
+from astropy import units as u
 from jdaviz import Specviz
 from jdaviz.app import Application
-from sdss_access import Access
 from specutils import Spectrum, SpectrumList
 from ipypopout import PopoutButton
-from astropy.io import fits
 
+from sdss_solara.components.bulk import base_label, batch_load, get_label_index
 from sdss_solara.components.common import create_shared_widgets, css
+from sdss_solara.components.memory import get_app_memory
+from sdss_solara.components.pool import app_pool
+from sdss_solara.io.access import exists_many, get_access
+from sdss_solara.io.cache import read_spectrum
+from sdss_solara.io.cube import get_cube_selection, lazy_cubes, read_cube_spectrum
+from sdss_solara.io.lod import ZoomDetail, decimate, get_lod_width
+from sdss_solara.io.parsepool import ParseError
+from sdss_solara.io.paths import classify, get_specformat, make_label, sort_filemap
+from sdss_solara.io.prefetch import Prefetcher, get_prefetch_count
+from sdss_solara.io.probe import FitsProbe, probe_fits
+from sdss_solara.io.remote import RemoteFetchError, get_remote_cache, remote_url, use_remote
+from sdss_solara.io.sasindex import get_sas_index
+from sdss_solara.io.shared import shared_store
+from sdss_solara.io.stats import get_app_stats, get_stats
+from sdss_solara.io.valis import get_client
+from sdss_solara.metrics import span
 from sdss_solara.components.message import (
     Message,
     event_handler,
     new_files,
     outmsg,
+    parse_params,
     set_initial_theme,
 )
 
 
+logger = logging.getLogger(__name__)
+
+
 def local_check():
     """Check localality"""
     local = False
@@ -38,32 +58,8 @@ def local_check():
 def load_test_data(release: str):
     """Load test data from the SAS"""
 
-    if "IPL" in release.upper() and "-" not in release:
-        release = release.upper().replace("IPL", "IPL-")
-    sas = os.getenv("SAS_BASE_DIR")
-    files = (pathlib.Path(sas) / release.lower()).rglob("*.fits")
-    return ",".join((i.as_posix() for i in files))
-
-
-def get_url():
-    """get the valis api url"""
-    url = os.getenv("VALIS_API_URL")
-    if url:
-        return url
-
-    env = os.getenv("VALIS_ENV") or os.getenv("SOLARA_ENV") or "development"
-    name = (
-        ".env.dev"
-        if env.startswith("dev")
-        else ".env.test"
-        if env.startswith("test")
-        else ".env.prod"
-    )
-    dotenv.load_dotenv(dotenv.find_dotenv(name))
-    return os.getenv("VALIS_API_URL") or "http://localhost:8000"
-
-
-api_url = get_url()
+    files = get_sas_index().query(release=release, pattern="*.fits")
+    return ",".join(files)
 
 
 def get_config():
@@ -86,100 +82,24 @@ def get_config():
     return config
 
 
-def get_specformat(filepath: str) -> str:
-    """Get the Spectrum1D format based on the filepath"""
-    if fnmatch.fnmatch(filepath, "*apogee/*/dr17/visit*"):
-        return "APOGEE apVisit"
-    elif fnmatch.fnmatch(filepath, "*apogee/*/dr17/stars*"):
-        return "APOGEE apStar"
-    elif fnmatch.fnmatch(filepath, "*apogee/redux/1.*/stars*"):
-        return "SDSS-V apStar"
-    elif fnmatch.fnmatch(filepath, "*apogee/redux/1.*/visit*"):
-        return "SDSS-V apVisit"
-    elif fnmatch.fnmatch(filepath, "*dr17/eboss/spectro*"):
-        return "SDSS-III/IV spec"
-    elif fnmatch.fnmatch(filepath, "*dr17/sdss/spectro*"):
-        return "SDSS-III/IV spec"
-    elif fnmatch.fnmatch(filepath, "*boss/redux/v6*"):
-        return "SDSS-V spec"
-    elif fnmatch.fnmatch(filepath, "*astra/*/mwmStar*"):
-        # loads all extensions
-        return "SDSS-V mwm"
-    elif fnmatch.fnmatch(filepath, "*astra/*/mwmVisit*"):
-        # loads all extensions
-        return "SDSS-V mwm"
-    elif fnmatch.fnmatch(filepath, "*astra/*/astraStar*"):
-        # loads all extensions
-        return "SDSS-V astra"
-    elif fnmatch.fnmatch(filepath, "*astra/*/astraVisit*"):
-        # loads all extensions
-        return "SDSS-V astra"
-    elif fnmatch.fnmatch(filepath, "*dr17/manga/*LOGCUBE*"):
-        # loads all extensions
-        return "MaNGA cube"
-    elif fnmatch.fnmatch(filepath, "*dr17/manga/*LOGRSS*"):
-        # loads all extensions
-        return "MaNGA rss"
-    else:
-        return None
-
-
-def sort_filemap(data: dict) -> dict:
-    """Sort the filemap by file preference"""
-    prefs = ["mwmStar", "spec", "apStar"]
-    prior = dict(zip(prefs, range(len(prefs))))
-
-    def get_prior(x):
-        for i in prefs:
-            if x.startswith(i):
-                return prior[i]
-        return float("inf")
-
-    skeys = sorted(data.keys(), key=get_prior)
-    return {key: data[key] for key in skeys}
-
-
 # reactive variables
 spec = solara.reactive(None)
 selected = solara.reactive([])
 all_files = solara.reactive([])
 filemap = solara.reactive({})
 params = solara.reactive({})
+load_errors = solara.reactive([])
+zoom_detail = solara.reactive(None)
+parent_files = solara.reactive([])
+unloaded_files = solara.reactive({})
 
 
 def get_spectrum(label: str):
     """Get the specutils Spectrum object"""
-    lal = (
-        True
-        if label.startswith(("mwmVisit", "mwmStar"))
-        or "apVisit" in label
-        or "apStar" in label
-        else False
-    )
-    spec_format = get_specformat(filemap.value[label])
-    if lal:
-        return SpectrumList.read(filemap.value[label], format=spec_format)
-    return Spectrum.read(filemap.value[label], format=spec_format)
-
-
-def make_label(filepath):
-    """Make a data label that accounts for spec coadds"""
-    stem = pathlib.Path(filepath).stem
-    parts = stem.split("-", 1)
-    if "spectra/daily" in filepath:
-        parts.insert(1, "daily")
-        return "-".join(parts)
-    elif "spectra/epoch" in filepath:
-        parts.insert(1, "epoch")
-        return "-".join(parts)
-    elif "spectra/lite" in filepath:
-        parts.insert(1, "lite")
-        return "-".join(parts)
-    elif "spectra/full" in filepath:
-        parts.insert(1, "full")
-        return "-".join(parts)
-    else:
-        return stem
+    info = classify(filemap.value[label])
+    if info.multi:
+        return read_spectrum(SpectrumList, filemap.value[label], info.format)
+    return read_spectrum(Spectrum, filemap.value[label], info.format)
 
 
 def sync_file_state():
@@ -189,195 +109,599 @@ def sync_file_state():
     selected.value = current_selected or ([all_files.value[0]] if all_files.value else [])
 
 
-@solara.component
-def DataSelect():
-    """component for a dropdown select menu"""
-    sdssid = params.value.get("sdssid", "")
-    release = params.value.get("release", "IPL3")
-    qp_files = params.value.get("files", "")
-    # allowing test data
-    if local_check():
-        sdssid = 123456
-        qp_files = load_test_data(release)
+def find_files(sdssid, release: str, qp_files: str, test: bool = False) -> list:
+    """Find the spectral data files of a target, setting the filemap
 
-    def make_request():
-        """make a valis request to get the spectral data files"""
-        if not sdssid:
-            return []
-
-        resp = requests.get(
-            api_url + f"/target/pipelines/{sdssid}", json={"release": release}
-        )
-        if not resp.ok:
-            return []
-
-        vals = {make_label(i): i for i in sum(resp.json()["files"].values(), [])}
-        filemap.value = sort_filemap(vals) if not set(vals) == {""} else {}
+    Checks the files given in the url, or else requests the pipeline files
+    from valis.  Does not run when the filemap is already set.
+    """
+    if filemap.value:
         sync_file_state()
         return list(all_files.value)
 
-    def get_files():
-        """get the spectral data files"""
-        if filemap.value:
-            sync_file_state()
-            return
+    # allowing test data
+    if test:
+        sdssid = 123456
+        qp_files = load_test_data(release)
 
-        if sdssid and not qp_files:
-            res = make_request()
-            print("finished req", res)
-        elif sdssid and qp_files:
-            print("getting files", sdssid, qp_files)
-            filemap.value = sort_filemap(
-                {make_label(i): i for i in qp_files.split(",") if check_file_exists(i, release)}
-            )
-            sync_file_state()
+    if not sdssid:
+        return []
 
-    if not all_files.value:
-        get_files()
+    if qp_files:
+        logger.info("checking files for sdssid=%s: %s", sdssid, qp_files)
+        with span("check_files"):
+            exists = exists_many(qp_files.split(","), release)
+        filemap.value = sort_filemap({make_label(i): i for i, ok in exists.items() if ok})
+    else:
+        with span("valis"):
+            files = get_client().get_pipeline_files(sdssid, release)
+        vals = {make_label(i): i for i in files}
+        filemap.value = sort_filemap(vals) if not set(vals) == {""} else {}
+        logger.info("found %d files for sdssid=%s release=%s", len(filemap.value), sdssid, release)
+    sync_file_state()
+    return list(all_files.value)
 
-    solara.SelectMultiple("Select Data Files", selected, all_files.value, dense=True)
 
+@solara.component
+def DataSelect():
+    """component for a dropdown select menu"""
+    sdssid = params.value.get("sdssid", "")
+    release = params.value.get("release", "IPL3")
+    qp_files = params.value.get("files", "")
+    test = bool(local_check())
 
-def load_data(app: Application, filename: str, resize: bool = False):
-    """Load the data into Jdaviz"""
-    label = make_label(filename)
-    lal = (
-        True
-        if label.startswith(("mwmVisit", "mwmStar"))
-        or "apVisit" in label
-        or "apStar" in label
-        else False
+    # find the files in the background, off the render path
+    request = solara.lab.use_task(
+        lambda: find_files(sdssid, release, qp_files, test),
+        dependencies=[sdssid, release, qp_files, test],
+        raise_error=False,
     )
 
-    if not os.path.exists(filename):
-        print('File does not exist:', filename)
-        return
+    if request.pending:
+        solara.ProgressLinear(True)
+    elif request.error:
+        solara.Alert(f"Failed to get data files: {request.exception}", color="danger", dense=True)
+    solara.SelectMultiple("Select Data Files", selected, all_files.value, dense=True)
 
-    multispec = False
-    if lal:
-        with fits.open(filename) as hdu:
-            tmp = [(len(i.data)>=1, i.data.shape[0]>1) for i in hdu[1:]]
-            ext_has_data, multi_spec_per_ext = zip(*tmp)
-            multispec = any([any(i) for i in tmp])
 
-    # 4.5.1
-    ldr = app.loaders['object']
-    if multispec:
+def read_data(filename: str, spec_format: str, probe: FitsProbe = None):
+    """Read the data file, using the header probe to pick the reader"""
+    if probe is not None and probe.multispec:
         try:
-            s = SpectrumList.read(filename, format=get_specformat(filename))
-            fmt = '1D Spectrum List'
+            return read_spectrum(SpectrumList, filename, spec_format), probe.fmt
         except ValueError:
-            s = Spectrum.read(filename, format=get_specformat(filename))
-            fmt = '1D Spectrum'
-    else:
-        s = Spectrum.read(filename, format=get_specformat(filename))
-        fmt = '1D Spectrum'
+            pass
+    return read_spectrum(Spectrum, filename, spec_format), "1D Spectrum"
+
+
+def local_file(filename: str, release: str = None) -> str:
+    """Get a local path to a data file, fetching it from the remote SAS when missing"""
+    if os.path.exists(filename) or not (release and use_remote()):
+        return filename
+    with span("fetch", session=None, file=filename):
+        return get_remote_cache().fetch(remote_url(filename, release))
+
+
+def read_file(filename: str, cube: dict = None, release: str = None) -> tuple:
+    """Read a data file into a specutils object and loader format, with its flux stats
+
+    When a ``release`` is given and remote access is enabled, files missing
+    locally are read from the remote file cache.
+    """
+    info = classify(filename)
+    path = local_file(filename, release)
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File does not exist: {filename}")
+
+    # may run in a worker thread, which does not own a session
+    with span("read", session=None, file=filename):
+        if info.format == "MaNGA cube" and lazy_cubes():
+            s, fmt = read_cube_spectrum(path, **(cube or {})), "1D Spectrum"
+        else:
+            # probe the headers only, and read the file once
+            probe = probe_fits(path) if info.multi else None
+            s, fmt = read_data(path, info.format, probe)
+
+    # compute the flux stats off the main thread
+    with span("stats", session=None, file=filename):
+        get_stats(s)
+    return s, fmt
+
+
+def parse_data(filename: str, lod: int = 0, cube: dict = None, release: str = None) -> tuple:
+    """Parse a data file into a label, specutils object and loader format
+
+    Does not touch the Jdaviz app or any reactive state, so it can safely
+    run in a worker thread.  When ``lod`` is a pixel width, the spectra are
+    decimated for display, and the full resolution object is also returned.
+    MaNGA cubes are memory-mapped, and only the ``cube`` spaxel or aperture
+    selection is read.  Files missing locally may be fetched remotely for the
+    ``release``.
+    """
+    info = classify(filename)
+    s, fmt = read_file(filename, cube, release)
+    full = None
+    if lod:
+        with span("decimate", session=None, file=filename):
+            full, s = s, decimate(s, lod)
+    return info.label, s, fmt, full
+
+
+def add_data(app: Application, label: str, s, fmt: str, full=None, stats: bool = True, filename: str = None):
+    """Add a parsed spectrum to Jdaviz
+
+    Datasets are tracked for the flux stats and session memory budget,
+    unless ``stats`` is False, as for zoomed slices.
+    """
+    # 4.5.1
+    ldr = app.loaders['object']
     ldr.object = s
-    if multispec and '1D Spectrum List' in ldr.format.choices:
+    if fmt == '1D Spectrum List' and fmt in ldr.format.choices:
         ldr.format = fmt
         ldr.importer.sources='*'
     else:
         ldr.format = fmt
     ldr.importer.data_label=label
-    ldr.load()
+    with span("jdaviz_load", file=label):
+        ldr.load()
+
+    # hold the shared parsed data while the session shows it
+    shared_store.pin(s if full is None else full)
+
+    # keep the flux stats of the full resolution data for auto-scaling
+    if stats:
+        get_app_stats(app).add(label, s if full is None else full)
+        get_app_memory(app).add(label, filename, s if full is None else full)
+        if label in unloaded_files.value:
+            unloaded_files.value = {k: v for k, v in unloaded_files.value.items() if k != label}
+
+    # track decimated spectra to load full resolution data on zoom
+    if isinstance(full, Spectrum) and zoom_detail.value:
+        zoom_detail.value.add(label, full)
+
+
+def get_parse_args(filename: str) -> tuple:
+    """Get the parse_data arguments of a file for the current session"""
+    return (
+        filename,
+        get_lod_width(params.value),
+        get_cube_selection(params.value),
+        params.value.get("release", "IPL3"),
+    )
+
+
+def add_parsed(app: Application, filename: str, parsed: tuple, resize: bool = False):
+    """Add a parsed file to Jdaviz, within the memory budget"""
+    add_data(app, *parsed, filename=filename)
+    run_in_session_loop(enforce_budget, app, {parsed[0]})
 
     # resize the plot axes
     if resize:
-        smart_resize(app)
+        with span("smart_resize"):
+            smart_resize(app)
+
+
+# errors of a single data file, shown to the user instead of failing the load
+FILE_ERRORS = (FileNotFoundError, RemoteFetchError, ParseError, ValueError)
+
+
+def file_error(filename: str, error: Exception) -> str:
+    """Log a data file error, returning the message to show"""
+    logger.warning("failed to load %s: %s", filename, error)
+    return f"Failed to load {pathlib.Path(filename).name}: {error}"
+
+
+def load_data(app: Application, filename: str, resize: bool = False):
+    """Load the data into Jdaviz"""
+    try:
+        parsed = parse_data(*get_parse_args(filename))
+    except FILE_ERRORS as e:
+        load_errors.value = [*load_errors.value, file_error(filename, e)]
+        return
+    add_parsed(app, filename, parsed, resize=resize)
+
+
+async def load_first(app: Application, label: str):
+    """Load the first data file into an empty viewer
+
+    The file is parsed in the loading threads, and added to Jdaviz on the
+    event loop of the session.
+    """
+    if app is None or not label or label not in filemap.value or len(app.app.data_collection):
+        return
+    filename = filemap.value[label]
+    with span("load_first", file=label):
+        loop = asyncio.get_running_loop()
+        try:
+            parsed = await loop.run_in_executor(load_executor, parse_data, *get_parse_args(filename))
+        except FILE_ERRORS as e:
+            load_errors.value = [*load_errors.value, file_error(filename, e)]
+            return
+        add_parsed(app, filename, parsed, resize=True)
+
+
+def get_load_workers() -> int:
+    """get the number of background data loading threads"""
+    return int(os.getenv("SDSS_SOLARA_LOAD_WORKERS", 4))
+
+
+# shared pool of threads for parsing data files in the background
+load_executor = ThreadPoolExecutor(
+    max_workers=get_load_workers(), thread_name_prefix="sdss-solara-load"
+)
+
+
+def session_runner():
+    """Get a function running a function on the event loop of the current session
+
+    glue schedules some viewer updates, e.g. when removing the reference
+    data of a viewer, on the running event loop of the session, so such
+    changes cannot run in the loading or timer threads.  The returned
+    ``run(func, *args)`` calls the function on the loop of the session
+    current when it was created, and waits for its result.  Outside of a
+    session, or on the loop itself, the function runs directly.
+    """
+    kernel_context = sys.modules.get("solara.server.kernel_context")
+    if kernel_context is None or not kernel_context.has_current_context():
+        return lambda func, *args: func(*args)
+    context = kernel_context.get_current_context()
+    loop = context.event_loop
+
+    def run(func, *args):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is running or not loop.is_running():
+            with context:
+                return func(*args)
+
+        future = Future()
+
+        def call():
+            try:
+                with context:
+                    future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        loop.call_soon_threadsafe(call)
+        return future.result()
+
+    return run
+
+
+def run_in_session_loop(func, *args):
+    """Run a function on the event loop of the current session, and wait for its result"""
+    return session_runner()(func, *args)
+
+
+def add_many(app: Application, items: list) -> list:
+    """Add several parsed spectra to Jdaviz in one batched update
+
+    The data collection links and viewer layers are updated once at the end,
+    rather than after each dataset, and then the memory budget is enforced.
+
+    Parameters
+    ----------
+    app : Application
+        the jdaviz app or helper
+    items : list
+        the (filename, parsed data) of each file
+
+    Returns
+    -------
+    list
+        the (index, exception) of each dataset that failed to load
+    """
+    errors = []
+    with batch_load(app):
+        for i, (filename, parsed) in enumerate(items):
+            try:
+                add_data(app, *parsed, filename=filename)
+            except Exception as e:
+                errors.append((i, e))
+    run_in_session_loop(enforce_budget, app, {parsed[0] for __, parsed in items})
+    return errors
+
+
+def forget_data(app: Application, label: str):
+    """Stop tracking a dataset no longer in Jdaviz, releasing its shared data"""
+    get_app_stats(app).discard(label)
+    if zoom_detail.value:
+        zoom_detail.value.discard(label)
+    item = get_app_memory(app).discard(label)
+    if item is not None:
+        shared_store.unpin(item.obj)
+
+
+def unload_data(app: Application, labels: list) -> list:
+    """Remove datasets from Jdaviz, and stop tracking them
+
+    A dataset that fails to be removed is still tracked, so the tracking
+    never drifts from the data collection.
+
+    Returns
+    -------
+    list
+        the labels removed
+    """
+    dc = app.app.data_collection if hasattr(app, "app") else app.data_collection
+    removed = []
+    for label in labels:
+        try:
+            for data in [i for i in dc if base_label(i.label) == label]:
+                dc.remove(data)
+        except Exception:
+            logger.exception("failed to unload %s", label)
+            continue
+        forget_data(app, label)
+        removed.append(label)
+    return removed
+
+
+def enforce_budget(app: Application, keep=()) -> list:
+    """Unload the least recently viewed datasets over the session memory budget
+
+    Datasets visible in the spectrum viewer count as viewed now, and the
+    ``keep`` labels are never unloaded.  The unloaded files are kept in
+    ``unloaded_files`` so they can be reloaded.
+
+    Returns
+    -------
+    list
+        the unloaded labels
+    """
+    memory = get_app_memory(app)
+    if not memory.budget:
+        return []
+
+    # forget datasets removed outside of the budget, e.g. by the user
+    index = get_label_index(app)
+    for label in [i for i in memory.datasets if i not in index]:
+        forget_data(app, label)
+
+    try:
+        viewer = app._spectrum_viewer
+        memory.touch(base_label(i.layer.label) for i in viewer.layers if i.visible)
+    except Exception:
+        pass
+
+    unload = memory.over_budget(keep)
+    if not unload:
+        return []
+
+    removed = unload_data(app, [i.label for i in unload])
+    files = {i.label: i.filename for i in unload if i.filename and i.label in removed}
+    unloaded_files.value = {**unloaded_files.value, **files}
+    logger.info("unloaded %d datasets over the session memory budget: %s", len(removed), removed)
+    return removed
+
+
+def get_flush_interval() -> float:
+    """get the seconds to collect parsed files before adding them to Jdaviz"""
+    return float(os.getenv("SDSS_SOLARA_FLUSH_INTERVAL", 0.5))
+
+
+@solara.lab.task
+def load_files(files: list):
+    """Parse the data files in parallel and add them to Jdaviz in batches
+
+    The files parsed since the last batch are added together, so loading many
+    files redraws the viewer a few times instead of once per file.  Batches
+    are added on the event loop of the session, which glue schedules viewer
+    updates on.
+    """
+    app = spec.value
+    errors = []
+    load_errors.value = []
+    lod = get_lod_width(params.value)
+    cube = get_cube_selection(params.value)
+    release = params.value.get("release", "IPL3")
+    futures = {load_executor.submit(parse_data, f, lod, cube, release): f for f in files}
+    pending = set(futures)
+    interval = get_flush_interval()
+    try:
+        while pending:
+            # wait for the first file, then collect the others ready in time
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if pending and interval:
+                more, pending = wait(pending, timeout=interval)
+                done |= more
+            if not load_files.is_current():
+                return
+
+            ready, failed = [], []
+            for future in done:
+                try:
+                    ready.append((futures[future], future.result()))
+                except Exception as e:
+                    failed.append((futures[future], e))
+            added = run_in_session_loop(add_many, app, ready)
+            failed += [(ready[i][0], e) for i, e in added]
+
+            for f, e in failed:
+                errors.append(file_error(f, e))
+            if failed:
+                load_errors.value = list(errors)
+            load_files.progress = 100 * (len(futures) - len(pending)) / len(futures)
+    finally:
+        # drop any files not yet started when cancelled
+        for future in futures:
+            future.cancel()
+
+
+def load_selected():
+    """Load the selected files not yet in Jdaviz, in the background"""
+    speclabels = get_label_index(spec.value)
+    files = {}
+    for f in selected.value:
+        label = make_label(filemap.value[f])
+        if label not in speclabels:
+            files[label] = filemap.value[f]
+    if files:
+        load_files(list(files.values()))
 
 
 @solara.component
 def DataLoader():
     """component for data loading button"""
+    with solara.Column(gap="0px"):
+        with solara.Row(gap="5px"):
+            solara.Button(
+                "Load Data", color="primary", on_click=load_selected, disabled=load_files.pending
+            )
+            if load_files.pending:
+                solara.Button("Cancel", on_click=load_files.cancel, text=True)
+        solara.ProgressLinear((load_files.progress or True) if load_files.pending else False)
+
 
-    def load():
-        for f in selected.value:
-            label = make_label(filemap.value[f])
-            speclabels = set(
-                i.split(" ", 1)[0] for i in spec.value.app.data_collection.labels
+@solara.component
+def UnloadedData():
+    """component listing the datasets unloaded over the memory budget, to reload them"""
+    if not unloaded_files.value:
+        return
+
+    files = dict(unloaded_files.value)
+    with solara.Row(gap="5px", style="flex-wrap: wrap; align-items: center"):
+        solara.Text(f"Unloaded {len(files)} datasets to stay within the memory budget:")
+        for label, filename in files.items():
+            solara.Button(
+                label, icon_name="mdi-reload", text=True, small=True,
+                on_click=lambda f=filename: load_files([f]), disabled=load_files.pending,
+            )
+        if len(files) > 1:
+            solara.Button(
+                "Reload all", text=True, small=True,
+                on_click=lambda: load_files(list(files.values())), disabled=load_files.pending,
             )
-            if label not in speclabels:
-                load_data(spec.value, filemap.value[f])
 
-    solara.Button("Load Data", color="primary", on_click=load)
+
+@solara.component
+def LoadErrors():
+    """component for displaying per-file loading errors"""
+    for error in load_errors.value:
+        solara.Alert(error, color="warning", dense=True)
 
 
 def check_file_exists(filepath: str, release: str) -> bool:
     """ Add a file check existence """
-    access = Access(release=release)
-    return access.exists('', full=filepath)
+    return exists_many([filepath], release).get(filepath, False)
 
 
 def get_urls(files: list, release: str):
     """Get the access urls for the files"""
-    access = Access(release=release)
-    access.remote()
+    access = get_access(release, remote=True)
     sasdir = "sas" if access.access_mode == "curl" else ""
     return [access.url("", full=f, sasdir=sasdir) for f in files if f]
 
 
 def smart_resize(specviz):
-    """placeholder function to resize init data"""
-    # get spectra
-    ss = specviz.get_spectra()
-    key = next(iter(ss))
-    spec = ss[key]
+    """Resize the y axis to the robust flux range of all loaded spectra"""
+    # use the cached stats of each loaded dataset, in the displayed flux unit
+    unit = specviz._spectrum_viewer.state.y_display_unit
+    stats = get_app_stats(specviz).combined(u.Unit(unit) if unit else None)
+    if stats is None:
+        return
 
     # skip smart resize if the outlier threshold is low
-    threshold = np.abs(np.nanmax(spec.flux) / np.nanmedian(spec.flux)).value
-    if threshold < 100:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        threshold = np.abs(np.divide(stats.max, stats.median))
+    if not threshold >= 100:
         return
 
     # adjust plot y limits to 99th percentile
     scale = 1.5
     plot_options = specviz.plugins["Plot Options"]
-    plot_options.y_min.value = np.nanpercentile(spec.flux, 1).value * scale
-    plot_options.y_max.value = np.nanpercentile(spec.flux, 99).value * scale
+    plot_options.y_min.value = stats.lo * scale
+    plot_options.y_max.value = stats.hi * scale
 
 
-def load_app():
-    """Load the application and data"""
+def build_app():
+    """Build a styled jdaviz application and its Specviz helper"""
     config = get_config()
     app = Application(configuration=config)
     style_path = pathlib.Path(__file__).parent / "custom_jdaviz.vue"
     app._add_style(str(style_path))
-    spec.value = Specviz(app)
+    return app, Specviz(app)
+
+
+def acquire_app():
+    """Get a jdaviz application, without loading data"""
+    # take a pre-built app from the warm pool when available
+    with span("app_acquire"):
+        app, spec.value = app_pool.acquire()
     error = None
-    if filemap.value:
-        label = list(filemap.value.keys())[0]
-        load_data(spec.value, filemap.value[label], resize=True)
 
+    # load full resolution data on zoom when spectra are decimated
+    width = get_lod_width(params.value)
+    if width:
+        specviz = spec.value
+        zoom_detail.value = ZoomDetail(
+            specviz,
+            lambda label, s: add_data(specviz, label, s, "1D Spectrum", stats=False),
+            width,
+            run=session_runner(),
+        )
     return app, error
 
 
+def diff_files(previous: list, current: list) -> tuple:
+    """Get the paths added to and removed from a file list, in order"""
+    prev, cur = set(previous), set(current)
+    added = [i for i in dict.fromkeys(current) if i not in prev]
+    removed = [i for i in previous if i not in cur]
+    return added, removed
+
+
 def consume_new_files():
-    """Consume new_files updates and clear the queue."""
-    if not new_files.value:
+    """Apply the coalesced file list from the parent and clear the queue
+
+    Only the paths added since the last list from the parent are classified
+    and checked, and paths it no longer lists are dropped, in one update of
+    the filemap, so an empty list drops them all.  The first file is then
+    loaded by the Jdaviz component if the viewer is empty.
+    """
+    if new_files.value is None:
         return
 
     files = new_files.value
+    added, removed = diff_files(parent_files.value, files)
+    parent_files.value = list(files)
+
+    # check only the files not already known
+    known = set(filemap.value.values())
+    added = [i for i in added if i not in known]
+    incoming = {}
+    if added:
+        release = params.value.get("release", "IPL3")
+        with span("check_files"):
+            exists = exists_many(added, release)
+        incoming = {make_label(i): i for i, ok in exists.items() if ok}
+
+    if incoming or removed:
+        # merge the changes into the filemap
+        drop = set(removed)
+        merged = {k: v for k, v in filemap.value.items() if v not in drop}
+        merged.update(incoming)
+        filemap.value = sort_filemap(merged)
+        sync_file_state()
 
-    # make a new filemap with the new files
-    release = params.value.get("release", "IPL3")
-    incoming = {make_label(i): i for i in files if i and check_file_exists(i, release)}
-    if not incoming:
-        return
-
-    # check if the filemap was previously empty
-    empty_prior = not filemap.value
+    # reset the new files
+    new_files.value = None
 
-    # merge the two dictionaries
-    merged = dict(filemap.value)
-    merged.update(incoming)
-    filemap.value = sort_filemap(merged)
-    sync_file_state()
 
-    # load the first data file if the viewer was empty before
-    if empty_prior and selected.value:
-        load_data(spec.value, filemap.value[selected.value[0]], resize=True)
+def prefetch_files():
+    """Warm the caches for the next ranked files, cancelled on change or session end"""
+    files = list(filemap.value.values())[1:get_prefetch_count() + 1]
+    if not files:
+        return
 
-    # reset the new files
-    new_files.value = []
+    cube = get_cube_selection(params.value)
+    release = params.value.get("release", "IPL3")
+    prefetcher = Prefetcher(lambda f: read_file(f, cube, release)).start(files)
+    return prefetcher.cancel
 
 
 @solara.component
@@ -385,12 +709,24 @@ def Jdaviz():
     """component for displaying Jdaviz"""
     # prevents infinite recursion
     solara.use_memo(create_shared_widgets, [])
-    app, error = solara.use_memo(load_app, [])
+    app, error = solara.use_memo(acquire_app, [])
+
+    # load the first file in the background once the files are known
+    first = next(iter(filemap.value), None)
+
+    async def first_load():
+        await load_first(spec.value, first)
+
+    loading = solara.lab.use_task(first_load, dependencies=[first], raise_error=False)
 
     children = []
     if error:
         children.append(solara.Alert(error, color="danger", dense=True))
     else:
+        if loading.pending:
+            children.append(solara.ProgressLinear(True))
+        elif loading.error:
+            children.append(solara.Alert(f"Failed to load {first}: {loading.exception}", color="danger", dense=True))
         children.append(app)
     return solara.Column(children=children).meta(ref="jdaviz")
 
@@ -398,12 +734,12 @@ def Jdaviz():
 @solara.component
 def Page():
     """main page component"""
-    # extract query params
+    # extract query params, updating them only when the url changes
     router = solara.use_router()
-    pp = urllib.parse.parse_qs(router.search)
-    params.value = {k: v[0] if len(v) == 1 else v for k, v in pp.items()}
-
-    print(params.value)
+    query = solara.use_memo(lambda: parse_params(router.search), [router.search])
+    if params.value != query:
+        logger.debug("query params: %s", query)
+        params.value = query
 
     # set the target popout model id
     target_model_id = solara.use_reactive("")
@@ -425,10 +761,16 @@ def Page():
                     with solara.Column():
                         PopoutButton.element(target_model_id=target_model_id.value, window_features='popup,width=1200,height=800')
 
+        LoadErrors()
+        UnloadedData()
+
         Jdaviz()
 
     # refresh available files when parent sends updateFiles postMessage
-    solara.use_effect(consume_new_files, [new_files.value])
+    solara.lab.use_task(consume_new_files, dependencies=[new_files.value], raise_error=False)
+
+    # read the likely next files in the background
+    solara.use_effect(prefetch_files, [tuple(filemap.value.values())])
 
     # with solara we have to use use_effect + get_widget to get the widget id
     solara.use_effect(lambda: target_model_id.set(solara.get_widget(control)._model_id), [])
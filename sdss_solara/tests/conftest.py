@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """keep the sidecar and file caches of every test out of the user cache"""
+    monkeypatch.setenv("SDSS_SOLARA_CACHE_DIR", str(tmp_path / "cache"))
@@ -0,0 +1,39 @@
+from sdss_solara.io.access import exists_many, get_access, stat_cache
+
+
+def test_get_access_cached():
+    """test we reuse one Access per release"""
+    assert get_access("DR17") is get_access("DR17")
+    assert get_access("DR17") is not get_access("DR17", remote=True)
+
+
+def test_exists_many(tmp_path):
+    """test we can check many files at once"""
+    stat_cache.clear()
+    files = [tmp_path / f"spec-{i}.fits" for i in range(10)]
+    for path in files[:5]:
+        path.touch()
+
+    paths = [i.as_posix() for i in files]
+    result = exists_many(paths + [""], "DR17")
+    assert list(result) == paths
+    assert [result[i] for i in paths] == [True] * 5 + [False] * 5
+
+
+def test_exists_many_cached(tmp_path):
+    """test existence checks are cached"""
+    stat_cache.clear()
+    path = (tmp_path / "spec-1.fits").as_posix()
+    assert exists_many([path], "DR17") == {path: False}
+    (tmp_path / "spec-1.fits").touch()
+    assert exists_many([path], "DR17") == {path: False}
+    stat_cache.clear()
+    assert exists_many([path], "DR17") == {path: True}
+
+
+def test_exists_many_order(tmp_path):
+    """test the results keep the input order whatever is cached"""
+    stat_cache.clear()
+    paths = [(tmp_path / f"spec-{i}.fits").as_posix() for i in range(4)]
+    exists_many(paths[2:], "DR17")
+    assert list(exists_many(paths, "DR17")) == paths
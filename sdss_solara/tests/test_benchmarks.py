@@ -0,0 +1,105 @@
+import warnings
+
+import pytest
+
+from sdss_solara.benchmarks.embed import compare
+from sdss_solara.benchmarks.fixtures import make_tree
+
+pytest.importorskip("specutils")
+
+
+def test_fixtures_classify_and_read(tmp_path):
+    """test the synthetic files classify as, and read with, their SDSS formats"""
+    from sdss_solara.io.paths import classify
+    from sdss_solara.pages.jdaviz_embed import read_file
+
+    files = make_tree(tmp_path, scale=0.1)
+    expected = {
+        "spec": "SDSS-V spec",
+        "apStar": "SDSS-V apStar",
+        "apVisit": "SDSS-V apVisit",
+        "mwmStar": "SDSS-V mwm",
+        "mwmVisit": "SDSS-V mwm",
+        "cube": "MaNGA cube",
+    }
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for kind, fmt in expected.items():
+            path = files[kind][0]
+            assert classify(path).format == fmt
+            s, loader = read_file(path)
+            assert loader == ("1D Spectrum" if kind in ("spec", "cube") else "1D Spectrum List")
+
+
+def test_compare_baseline():
+    """test regressions need both a relative and absolute slowdown"""
+    baseline = {"a": {"median_s": 0.1}, "b": {"median_s": 0.0001}}
+    results = {"a": {"median_s": 0.25}, "b": {"median_s": 0.001}, "c": {"median_s": 1.0}}
+    assert compare(results, baseline) == [("a", 0.1, 0.25)]
+    assert compare(results, baseline, tolerance=3) == []
+
+
+def test_loadtest_valis_stub(tmp_path):
+    """test the stub Valis server answers the pipeline files of the synthetic targets"""
+    from sdss_solara.benchmarks.loadtest import ValisStub, make_targets
+    from sdss_solara.io.valis import ValisClient
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        targets = make_targets(tmp_path, ntargets=2, scale=0.1)
+    assert set(targets) == {"100000", "100001"}
+
+    stub = ValisStub(targets).start()
+    try:
+        client = ValisClient(url=stub.url)
+        files = client.get_pipeline_files("100001", "IPL3")
+        assert files == sum(targets["100001"].values(), [])
+        assert all(i.endswith(".fits") and "100001" in i for i in files)
+        assert client.get_pipeline_files("1", "IPL3") == []
+    finally:
+        stub.shutdown()
+
+
+def test_loadtest_percentiles_and_sampler():
+    """test the latency percentiles and resource sampling"""
+    from sdss_solara.benchmarks.loadtest import ResourceSampler, percentiles
+
+    p = percentiles([float(i) for i in range(1, 101)])
+    assert p["n"] == 100
+    assert p["p50_s"] == pytest.approx(50.5)
+    assert p["p50_s"] < p["p95_s"] < p["p99_s"] <= 100
+    assert percentiles([]) == {}
+
+    with ResourceSampler(interval=0.01) as sampler:
+        sum(i * i for i in range(10**5))
+    summary = sampler.summary(sessions=2)
+    assert summary["rss_peak_mb"] >= summary["rss_start_mb"] > 0
+    assert summary["cpu_s"] >= 0 and summary["wall_s"] > 0
+
+
+def test_loadtest_session(tmp_path, monkeypatch):
+    """test a simulated session runs the page loading path against the stub Valis"""
+    pytest.importorskip("solara.server.starlette")
+    from sdss_solara.benchmarks.loadtest import ValisStub, make_targets, simulate_session
+    from sdss_solara.io import valis
+
+    monkeypatch.setenv("SAS_BASE_DIR", str(tmp_path / "sas"))
+    monkeypatch.setenv("SDSS_SOLARA_CACHE_DIR", str(tmp_path / "cache"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        targets = make_targets(tmp_path / "sas", ntargets=1, scale=0.1)
+
+    stub = ValisStub(targets).start()
+    monkeypatch.setattr(valis, "_client", valis.ValisClient(url=stub.url))
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            result = simulate_session("100000", timeout=120)
+        result.pop("context").close()
+    finally:
+        stub.shutdown()
+
+    assert stub.requests == 1
+    assert result["error"] is None
+    assert result["first_spectrum_s"] > 0 and result["load_data_s"] > 0
+    assert result["datasets"] >= len(sum(targets["100000"].values(), []))
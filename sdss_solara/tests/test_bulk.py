@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from glue.core import Data, DataCollection
+
+from sdss_solara.components.bulk import LabelIndex, base_label
+
+
+@pytest.mark.parametrize(
+    "label, expected",
+    [
+        ("spec-015000-59000-100000", "spec-015000-59000-100000"),
+        ("mwmStar-0.6.0-100000_index-3", "mwmStar-0.6.0-100000"),
+        ("apStar-1.3-apo25m-2M00100000 [zoom]", "apStar-1.3-apo25m-2M00100000"),
+        ("spec-015000-59000-100000 (1)", "spec-015000-59000-100000"),
+    ],
+)
+def test_base_label(label, expected):
+    assert base_label(label) == expected
+
+
+def test_label_index():
+    dc = DataCollection([Data(x=np.arange(3), label="spec-a")])
+    index = LabelIndex(dc)
+    assert "spec-a" in index
+
+    dc.append(Data(x=np.arange(3), label="mwm-b_index-0"))
+    dc.append(Data(x=np.arange(3), label="mwm-b_index-1"))
+    assert "mwm-b" in index
+    assert len(index) == 2
+
+    # the label stays indexed until all of its datasets are removed
+    dc.remove(dc["mwm-b_index-0"])
+    assert "mwm-b" in index
+    dc.remove(dc["mwm-b_index-1"])
+    assert "mwm-b" not in index
+    assert "spec-a" in index
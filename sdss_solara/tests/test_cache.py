@@ -0,0 +1,53 @@
+import pytest
+
+from sdss_solara.io.cache import SpectrumCache, make_key
+
+
+@pytest.fixture()
+def files(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"spec-{i}.fits"
+        path.write_bytes(b"0" * 10)
+        paths.append(str(path))
+    return paths
+
+
+def test_cache_hits(files):
+    """test we only load a file once"""
+    cache = SpectrumCache(max_bytes=100, sizeof=len)
+    key = make_key(files[0], "SDSS-V spec")
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "a" * 10
+
+    assert cache.get_or_load(key, loader) == "a" * 10
+    assert cache.get_or_load(key, loader) == "a" * 10
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_eviction(files):
+    """test we evict the least recently used item over budget"""
+    cache = SpectrumCache(max_bytes=20, sizeof=len)
+    keys = [make_key(f, "SDSS-V spec") for f in files]
+    cache.get_or_load(keys[0], lambda: "a" * 10)
+    cache.get_or_load(keys[1], lambda: "b" * 10)
+    cache.get(keys[0])
+    cache.get_or_load(keys[2], lambda: "c" * 10)
+
+    assert keys[0] in cache
+    assert keys[1] not in cache
+    assert cache.stats()["evictions"] == 1
+    assert cache.currsize == 20
+
+
+def test_cache_key_mtime(files):
+    """test the cache key changes when the file changes"""
+    key = make_key(files[0], "SDSS-V spec")
+    with open(files[0], "ab") as f:
+        f.write(b"1")
+    assert make_key(files[0], "SDSS-V spec") != key
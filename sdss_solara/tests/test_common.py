@@ -0,0 +1,18 @@
+import sys
+
+from sdss_solara.components.common import create_shared_widgets, read_template
+
+
+def test_create_shared_widgets_once():
+    """test the shared widgets are only registered once per registry"""
+    registry = sys.modules["ipyvue.VueComponentRegistry"].vue_component_registry
+    comp = registry.pop("g-viewer-tab", None)
+    try:
+        assert create_shared_widgets()
+        misses = read_template.cache_info().misses
+        assert not create_shared_widgets()
+        assert "g-viewer-tab" in registry
+        assert read_template.cache_info().misses == misses
+    finally:
+        if comp is not None:
+            registry["g-viewer-tab"] = comp
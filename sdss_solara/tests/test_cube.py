@@ -0,0 +1,96 @@
+import gzip
+import shutil
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from sdss_solara.io.cube import get_cube_selection, open_cube, read_cube_spectrum, uncompressed_path
+
+
+@pytest.fixture
+def cube(tmp_path, monkeypatch):
+    """create a small gzipped MaNGA-like LOGCUBE"""
+    monkeypatch.setenv("SDSS_SOLARA_CACHE_DIR", str(tmp_path / "cache"))
+    nwave, ny, nx = 50, 9, 9
+    flux = np.arange(nwave * ny * nx, dtype="f4").reshape(nwave, ny, nx)
+    ivar = np.ones_like(flux)
+    mask = np.zeros(flux.shape, dtype="i4")
+    mask[:, 0, 0] = 1024
+    hdr = fits.Header({"BUNIT": "1E-17 erg/s/cm^2/Ang/spaxel"})
+    hdus = fits.HDUList([
+        fits.PrimaryHDU(),
+        fits.ImageHDU(flux, header=hdr, name="FLUX"),
+        fits.ImageHDU(ivar, name="IVAR"),
+        fits.ImageHDU(mask, name="MASK"),
+        fits.ImageHDU(np.linspace(3600, 10000, nwave), name="WAVE"),
+    ])
+    path = tmp_path / "manga-8485-1901-LOGCUBE.fits"
+    hdus.writeto(path)
+    gzpath = tmp_path / "manga-8485-1901-LOGCUBE.fits.gz"
+    gzpath.write_bytes(gzip.compress(path.read_bytes()))
+    return gzpath.as_posix(), flux
+
+
+def test_uncompressed_once(cube):
+    """test gzipped cubes are decompressed once into the cache"""
+    path, __ = cube
+    local = uncompressed_path(path)
+    assert not local.endswith(".gz")
+    assert uncompressed_path(path) == local
+    assert fits.getdata(local, "FLUX").shape == (50, 9, 9)
+
+
+def test_spaxel_and_aperture(cube):
+    """test we only read the selected spaxel or aperture"""
+    path, flux = cube
+    view = open_cube(path)
+    assert not view.flux.flags.owndata
+
+    spec = read_cube_spectrum(path)
+    assert spec.flux.shape == (50,)
+    assert np.allclose(spec.flux.value, flux[:, 4, 4])
+    assert spec.meta["spaxel"] == (4, 4)
+
+    spec = read_cube_spectrum(path, spaxel=(0, 0))
+    assert spec.mask.all()
+
+    spec = read_cube_spectrum(path, spaxel=(4, 4), radius=1)
+    expected = flux[:, 3, 4] + flux[:, 5, 4] + flux[:, 4, 3] + flux[:, 4, 5] + flux[:, 4, 4]
+    assert spec.meta["nspaxels"] == 5
+    assert np.allclose(spec.flux.value, expected)
+    assert np.allclose(spec.uncertainty.array, 1 / 5)
+
+
+def test_cube_selection():
+    """test we can get the cube selection from the query params"""
+    assert get_cube_selection({}) == {"spaxel": None, "radius": 0.0}
+    assert get_cube_selection({"spaxel": "3,4", "aperture": "2.5"}) == {"spaxel": (3, 4), "radius": 2.5}
+    assert get_cube_selection({"spaxel": "x", "aperture": "y"}) == {"spaxel": None, "radius": 0.0}
+
+
+@pytest.mark.parametrize("spaxel", [(-1, 4), (4, -1), (9, 4), (4, 9)])
+def test_spaxel_out_of_bounds(cube, spaxel):
+    """test spaxels outside the cube raise a clear error instead of wrapping around"""
+    path, __ = cube
+    with pytest.raises(ValueError, match="outside the 9x9 spaxels"):
+        read_cube_spectrum(path, spaxel=spaxel)
+    with pytest.raises(ValueError, match="outside"):
+        read_cube_spectrum(path, spaxel=spaxel, radius=2)
+
+
+def test_spaxel_error_shown(cube, tmp_path):
+    """test a bad spaxel in the url is shown as a load error"""
+    from sdss_solara.pages import jdaviz_embed as je
+
+    # a path classified as a MaNGA cube
+    path = tmp_path / "dr17/manga/spectro/redux/v3_1_1/8485/stack/manga-8485-1901-LOGCUBE.fits.gz"
+    path.parent.mkdir(parents=True)
+    shutil.copy(cube[0], path)
+    path = path.as_posix()
+
+    je.params.value = {"spaxel": "-1,4"}
+    je.load_errors.value = []
+    je.load_data(None, path)
+    assert len(je.load_errors.value) == 1
+    assert "Spaxel (-1, 4) is outside" in je.load_errors.value[0]
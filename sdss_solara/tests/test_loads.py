@@ -1,5 +1,6 @@
 import pytest
 
+from sdss_solara.io.paths import classify_many
 from sdss_solara.pages.jdaviz_embed import get_specformat, make_label, sort_filemap
 
 
@@ -71,6 +72,20 @@ def test_get_specformat(filepath, expected):
     assert get_specformat(filepath) == expected
 
 
+def test_classify_many():
+    """test we can classify many paths at once"""
+    paths, formats = zip(*TEST_FILES)
+    infos = classify_many(list(paths) + ["unknown/file.fits"])
+    assert [i.format for i in infos[:-1]] == list(formats)
+    assert infos[-1].format is None
+    assert infos[-1].priority == float("inf")
+
+    info = infos[-2]
+    assert info.label == "mwmVisit-0.8.0-54459273"
+    assert info.multi
+    assert info.survey == "mwm"
+
+
 @pytest.mark.parametrize(
     "filepath, expected",
     [
@@ -0,0 +1,105 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from astropy import units as u
+from echo import CallbackProperty, HasCallbackProperties
+from specutils import Spectrum
+
+from sdss_solara.io.lod import ZoomDetail, decimate_spectrum, get_lod_width, minmax_indices, slice_spectrum
+
+
+def test_minmax_indices():
+    """test decimation keeps the extrema of each bin"""
+    y = np.random.default_rng(1).normal(size=10000)
+    y[1234], y[5678] = 100, -100
+    y[10:20] = np.nan
+    idx = minmax_indices(y, 100)
+    assert idx.size <= 202
+    assert 1234 in idx and 5678 in idx
+    assert idx[0] == 0 and idx[-1] == 9999
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_decimate_spectrum():
+    """test we can decimate a spectrum and slice the full resolution"""
+    spec = Spectrum(
+        flux=np.random.rand(2, 5000) * u.Jy, spectral_axis=np.linspace(4000, 9000, 5000) * u.AA
+    )
+    small = decimate_spectrum(spec, 100)
+    assert small.flux.shape[0] == 2
+    assert small.flux.shape[-1] <= 202
+    assert small.meta["lod_npix"] == 5000
+
+    piece = slice_spectrum(spec, 5000 * u.AA, 0.51 * u.micron)
+    assert piece.flux.shape == (2, 102)
+
+
+@pytest.mark.parametrize(
+    "params, expected", [({}, 0), ({"lod": "1"}, 1200), ({"lod": "true"}, 1200), ({"lod": "800"}, 800), ({"lod": "x"}, 0)]
+)
+def test_get_lod_width(params, expected, monkeypatch):
+    """test we can get the lod width from the query params"""
+    monkeypatch.delenv("SDSS_SOLARA_LOD_WIDTH", raising=False)
+    assert get_lod_width(params) == expected
+
+
+class FakeState(HasCallbackProperties):
+    x_min = CallbackProperty()
+    x_max = CallbackProperty()
+    x_display_unit = CallbackProperty("Angstrom")
+
+
+def test_zoom_detail_runs_swap():
+    """test zoomed slices are swapped through the session runner, not the timer thread"""
+    state = FakeState()
+    dc = SimpleNamespace(labels=[])
+    specviz = SimpleNamespace(_spectrum_viewer=SimpleNamespace(state=state), app=SimpleNamespace(data_collection=dc))
+    loaded, threads = {}, []
+    done = threading.Event()
+
+    def run(func, *args):
+        threads.append(threading.current_thread())
+        func(*args)
+        done.set()
+
+    zoom = ZoomDetail(specviz, lambda label, s: loaded.update({label: s}), width=100, delay=0.01, run=run)
+    zoom.add("a", Spectrum(flux=np.ones(5000) * u.Jy, spectral_axis=np.linspace(4000, 9000, 5000) * u.AA))
+    state.x_min, state.x_max = 5000, 5100
+    assert done.wait(5)
+    time.sleep(0.05)
+
+    assert threads and threads[0] is not threading.main_thread()
+    assert list(loaded) == ["a [zoom]"]
+    assert loaded["a [zoom]"].flux.shape[-1] <= 400
+    assert (state.x_min, state.x_max) == (5000, 5100)
+
+
+def test_session_runner():
+    """test the runner captured in a session calls functions on its loop from other threads"""
+    pytest.importorskip("solara.server.starlette")
+    import asyncio
+    import uuid
+
+    from solara.server import kernel, kernel_context
+
+    from sdss_solara.pages.jdaviz_embed import session_runner
+
+    async def session():
+        context = kernel_context.VirtualKernelContext(
+            id=str(uuid.uuid4()), kernel=kernel.Kernel(), session_id=str(uuid.uuid4())
+        )
+        with context:
+            run = session_runner()
+        loop_thread = threading.current_thread()
+        result = await asyncio.to_thread(
+            run, lambda: (threading.current_thread(), kernel_context.get_current_context())
+        )
+        context.close()
+        return loop_thread, context, result
+
+    loop_thread, context, (thread, current) = asyncio.run(session())
+    assert thread is loop_thread
+    assert current is context
@@ -0,0 +1,126 @@
+import asyncio
+import uuid
+import warnings
+
+import pytest
+
+from sdss_solara.components.memory import SessionMemory, get_memory_budget
+
+
+def test_memory_budget(monkeypatch):
+    monkeypatch.setenv("SDSS_SOLARA_SESSION_MEMORY_BYTES", "1000")
+    assert get_memory_budget() == 1000
+    assert SessionMemory().budget == 1000
+
+
+def test_over_budget():
+    """test the least recently viewed datasets are unloaded first"""
+    memory = SessionMemory(budget=250)
+    for label in ("a", "b", "c"):
+        memory.add(label, f"{label}.fits", None, nbytes=100)
+    assert memory.nbytes == 300
+
+    memory.touch(["a"])
+    assert [i.label for i in memory.over_budget()] == ["b"]
+    assert [i.label for i in memory.over_budget(keep={"b"})] == ["c"]
+
+    memory.add("d", "d.fits", None, nbytes=200)
+    assert [i.label for i in memory.over_budget(keep={"d"})] == ["b", "c", "a"]
+
+    memory.discard("b")
+    memory.discard("c")
+    assert memory.over_budget(keep={"d"}) == [memory.datasets["a"]]
+
+
+@pytest.mark.parametrize("budget", [0, 10**9])
+def test_within_budget(budget):
+    """test nothing is unloaded without a budget or within it"""
+    memory = SessionMemory(budget=budget)
+    memory.add("a", "a.fits", None, nbytes=10**6)
+    assert memory.over_budget() == []
+
+
+def test_load_files_over_budget(tmp_path, monkeypatch):
+    """test loading files over the budget unloads the oldest, keeping the tracking in sync"""
+    pytest.importorskip("solara.server.starlette")
+    from solara.server import kernel, kernel_context
+
+    from sdss_solara.benchmarks.fixtures import make_tree
+    from sdss_solara.components.bulk import base_label
+    from sdss_solara.components.memory import get_app_memory
+    from sdss_solara.io.cache import make_key
+    from sdss_solara.io.shared import shared_store
+    from sdss_solara.pages import jdaviz_embed as je
+
+    monkeypatch.setenv("SDSS_SOLARA_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("SDSS_SOLARA_PARSE_WORKERS", "0")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        files = make_tree(tmp_path / "sas", ntargets=4, scale=0.1, cube=False)["spec"]
+
+    async def session():
+        context = kernel_context.VirtualKernelContext(
+            id=str(uuid.uuid4()), kernel=kernel.Kernel(), session_id=str(uuid.uuid4())
+        )
+        with context:
+            app, specviz = je.build_app()
+            je.spec.value = specviz
+            memory = get_app_memory(specviz)
+            je.params.value = {"release": "IPL3"}
+
+            # load one file, then the others, over the budget
+            je.load_files(files[:1])
+            while je.load_files.pending:
+                await asyncio.sleep(0.05)
+            memory.budget = int(memory.nbytes * 2.5)
+            je.load_files(files[1:])
+            while je.load_files.pending:
+                await asyncio.sleep(0.05)
+
+            assert not je.load_files.error, je.load_files.exception
+            assert je.load_errors.value == []
+            loaded = {base_label(i.label) for i in app.data_collection}
+            assert loaded == set(memory.datasets)
+            # the first file, the reference data of the viewer, is unloaded
+            assert je.unloaded_files.value == {je.make_label(files[0]): files[0]}
+            assert loaded == {je.make_label(f) for f in files[1:]}
+            # only the loaded files are held in the shared store
+            held = {je.make_label(f) for f in files if shared_store.refcount(make_key(f, "SDSS-V spec", "Spectrum"))}
+            assert held == loaded
+        context.close()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        asyncio.run(session())
+
+
+class FakeData:
+    def __init__(self, label):
+        self.label = label
+
+
+class FakeCollection(list):
+    def remove(self, data):
+        if data.label == "b":
+            raise RuntimeError("cannot remove")
+        super().remove(data)
+
+
+class FakeApp:
+    def __init__(self, labels):
+        self.data_collection = FakeCollection(FakeData(i) for i in labels)
+
+
+def test_unload_data_failure():
+    """test a dataset that fails to be removed stays tracked"""
+    from sdss_solara.components.memory import get_app_memory
+    from sdss_solara.pages.jdaviz_embed import unload_data
+
+    app = FakeApp(["a", "b"])
+    memory = get_app_memory(app)
+    for label in ("a", "b"):
+        memory.add(label, f"{label}.fits", None, nbytes=100)
+
+    assert unload_data(app, ["a", "b"]) == ["a"]
+    assert [i.label for i in app.data_collection] == ["b"]
+    assert list(memory.datasets) == ["b"]
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from sdss_solara.components.message import Debouncer
+
+
+def test_debouncer_coalesces_bursts():
+    """test a burst of pushes results in one call with the last value"""
+    calls = []
+    done = threading.Event()
+
+    def func(value):
+        calls.append(value)
+        done.set()
+
+    debouncer = Debouncer(func, delay=0.1)
+    for i in range(5):
+        debouncer.push([i])
+    assert done.wait(2)
+    assert calls == [[4]]
+
+    debouncer.push(["a"])
+    debouncer.flush()
+    debouncer.flush()
+    assert calls == [[4], ["a"]]
+
+
+def test_consume_new_files_diff(monkeypatch):
+    """test only new files are checked, and removed files dropped"""
+    je = pytest.importorskip("sdss_solara.pages.jdaviz_embed")
+    checked = []
+
+    def exists_many(paths, release):
+        checked.append(list(paths))
+        return {p: True for p in paths}
+
+    monkeypatch.setattr(je, "exists_many", exists_many)
+    valis = "/sas/ipl-3/spectro/boss/redux/v6_1_3/spectra/lite/015000/59000/spec-015000-59000-1.fits"
+    a = "/sas/ipl-3/spectro/astra/0.6.0/spectra/star/00/mwmStar-0.6.0-1.fits"
+    b = "/sas/ipl-3/spectro/apogee/redux/1.3/stars/apo25m/00/apStar-1.3-apo25m-2M00000001.fits"
+    je.filemap.value = {je.make_label(valis): valis}
+    je.parent_files.value = []
+
+    je.new_files.value = [a, b]
+    je.consume_new_files()
+    assert checked == [[a, b]]
+    assert list(je.filemap.value.values()) == [a, valis, b]
+    assert je.new_files.value is None
+
+    je.new_files.value = [b]
+    je.consume_new_files()
+    assert checked == [[a, b]]
+    assert list(je.filemap.value.values()) == [valis, b]
+
+
+def test_update_files_removes_all(monkeypatch):
+    """test a burst of updates ending with an empty list drops all the parent files"""
+    je = pytest.importorskip("sdss_solara.pages.jdaviz_embed")
+    from sdss_solara.components import message
+
+    monkeypatch.setattr(je, "exists_many", lambda paths, release: {p: True for p in paths})
+    valis = "/sas/ipl-3/spectro/boss/redux/v6_1_3/spectra/lite/015000/59000/spec-015000-59000-1.fits"
+    a = "/sas/ipl-3/spectro/astra/0.6.0/spectra/star/00/mwmStar-0.6.0-1.fits"
+    je.filemap.value = {je.make_label(valis): valis}
+    je.parent_files.value = []
+    message.file_updates.value = None
+
+    message.event_handler({"type": "updateFiles", "files": [a]})
+    message.file_updates.value.flush()
+    je.consume_new_files()
+    assert list(je.filemap.value.values()) == [a, valis]
+
+    for files in ([valis], [a], []):
+        message.event_handler({"type": "updateFiles", "files": files})
+    message.file_updates.value.flush()
+    assert je.new_files.value == []
+    je.consume_new_files()
+    assert list(je.filemap.value.values()) == [valis]
+    assert je.parent_files.value == []
+    assert je.new_files.value is None
+
+
+def test_parse_params():
+    from sdss_solara.components.message import parse_params
+
+    assert parse_params("sdssid=1&release=IPL3&files=a&files=b") == {
+        "sdssid": "1", "release": "IPL3", "files": ["a", "b"]
+    }
+    assert parse_params("") == parse_params(None) == {}
+
+
+def test_find_files(monkeypatch):
+    """test the url files are checked once, and kept while the filemap is set"""
+    je = pytest.importorskip("sdss_solara.pages.jdaviz_embed")
+    checked = []
+
+    def exists_many(paths, release):
+        checked.append(list(paths))
+        return {p: not p.endswith("missing.fits") for p in paths}
+
+    monkeypatch.setattr(je, "exists_many", exists_many)
+    a = "/sas/ipl-3/spectro/astra/0.6.0/spectra/star/00/mwmStar-0.6.0-1.fits"
+    b = "/sas/ipl-3/spectro/boss/redux/v6_1_3/spectra/lite/015000/59000/missing.fits"
+    je.filemap.value = {}
+    je.selected.value = []
+
+    assert je.find_files("", "IPL3", f"{a},{b}") == []
+    assert je.find_files("1", "IPL3", f"{a},{b}") == [je.make_label(a)]
+    assert je.selected.value == [je.make_label(a)]
+    assert je.find_files("1", "IPL3", f"{a},{b}") == [je.make_label(a)]
+    assert checked == [[a, b]]
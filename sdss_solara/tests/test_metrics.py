@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from sdss_solara.metrics import METRICS_PATH, Histogram, Metrics, add_metrics_endpoint, metrics, metrics_endpoint
+
+
+def test_histogram_cumulative():
+    """test observations fall in cumulative buckets"""
+    hist = Histogram(buckets=(0.1, 1, float("inf")))
+    for value in (0.05, 0.1, 0.5, 5):
+        hist.observe(value)
+    assert hist.cumulative() == [(0.1, 2), (1, 3), (float("inf"), 4)]
+    assert hist.count == 4 and hist.sum == pytest.approx(5.65)
+
+
+def test_span_records_stage():
+    """test spans record per file and session, including failures"""
+    m = Metrics()
+    with m.span("read", session="abc", file="a.fits"):
+        pass
+    with pytest.raises(ValueError):
+        with m.span("read", session=None, file="b.fits"):
+            raise ValueError("bad file")
+
+    assert m.summary()["read"]["count"] == 2
+    spans = m.spans(session="abc")
+    assert len(spans) == 1 and spans[0]["file"] == "a.fits" and not spans[0]["error"]
+    assert m.spans()[-1]["error"]
+
+    text = m.to_prometheus()
+    assert 'sdss_solara_stage_seconds_bucket{stage="read",le="+Inf"} 2' in text
+    assert 'sdss_solara_stage_seconds_count{stage="read"} 2' in text
+
+
+def test_metrics_endpoint():
+    """test the plain text endpoint is served ahead of the page routes"""
+    pytest.importorskip("solara.server.starlette")
+    from solara.server.starlette import app
+
+    add_metrics_endpoint()
+    assert not add_metrics_endpoint()
+    assert app.router.routes[0].path == METRICS_PATH
+
+    metrics.observe("valis", 0.2, session="test")
+    response = asyncio.run(metrics_endpoint(None))
+    assert response.media_type.startswith("text/plain")
+    assert 'stage="valis"' in response.body.decode()
+
+
+def test_counters():
+    """test component counters are exported, including the app pool and spectrum cache"""
+    import sdss_solara.components.pool  # noqa: F401
+    import sdss_solara.io.cache  # noqa: F401
+
+    m = Metrics()
+    m.add_counters("test", lambda: {"hits": 3, "misses": 1})
+    assert m.counters() == {"test": {"hits": 3, "misses": 1}}
+    text = m.to_prometheus()
+    assert "# TYPE sdss_solara_test_hits gauge\nsdss_solara_test_hits 3" in text
+    assert "sdss_solara_test_misses 1" in text
+
+    text = metrics.to_prometheus()
+    for name in ("app_pool_hits", "app_pool_misses", "spectrum_cache_hits", "spectrum_cache_evictions"):
+        assert f"sdss_solara_{name} " in text
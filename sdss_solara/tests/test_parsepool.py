@@ -0,0 +1,102 @@
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from specutils import Spectrum, SpectrumList
+
+from sdss_solara.benchmarks.fixtures import make_tree
+from sdss_solara.io.parsepool import ParseError, ParsePool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ParsePool(workers=1, timeout=30)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    """create synthetic data files, with a sidecar cache in the tmp dir"""
+    monkeypatch.setenv("SDSS_SOLARA_CACHE_DIR", str(tmp_path / "cache"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield make_tree(tmp_path / "sas", scale=0.1, cube=False)
+
+
+@pytest.mark.parametrize("sidecars", ["1", "0"])
+@pytest.mark.parametrize(
+    "kind, cls, fmt", [("spec", Spectrum, "SDSS-V spec"), ("mwmVisit", SpectrumList, "SDSS-V mwm")]
+)
+def test_read(pool, files, monkeypatch, sidecars, kind, cls, fmt):
+    """test files parsed in a worker match files parsed in-process"""
+    monkeypatch.setenv("SDSS_SOLARA_SIDECARS", sidecars)
+    path = files[kind][0]
+    parsed = pool.read(cls, path, fmt)
+    assert type(parsed) is cls
+
+    expected = cls.read(path, format=fmt)
+    pairs = zip(parsed, expected) if cls is SpectrumList else [(parsed, expected)]
+    for a, b in pairs:
+        assert np.array_equal(a.flux, b.flux) and a.flux.unit == b.flux.unit
+        assert np.array_equal(a.spectral_axis, b.spectral_axis)
+
+
+def test_read_error(pool, tmp_path):
+    """test reader errors are raised from the worker"""
+    path = tmp_path / "bad.fits"
+    path.write_bytes(b"not a fits file")
+    with pytest.raises(Exception) as exc:
+        pool.read(Spectrum, str(path), "SDSS-V spec")
+    assert not isinstance(exc.value, ParseError)
+
+
+def test_timeout():
+    """test a stuck worker times out and the pool recovers"""
+    pool = ParsePool(workers=1, timeout=0.5)
+    try:
+        with pytest.raises(ParseError, match="Timed out"):
+            pool.run(time.sleep, 10)
+        assert pool.restarts == 1
+        # spawning the new worker is not timed
+        assert pool.run(abs, -1) == 1
+    finally:
+        pool.shutdown()
+
+
+def test_crash():
+    """test a crashed worker raises and the pool recovers"""
+    pool = ParsePool(workers=1, timeout=30)
+    try:
+        with pytest.raises(ParseError, match="crashed"):
+            pool.run(os._exit, 1)
+        assert pool.restarts == 1
+        assert pool.run(abs, -2) == 2
+
+        # a worker that died while idle is replaced without failing the call
+        for process in next(iter(pool._live)).executor._processes.values():
+            process.kill()
+            process.join()
+        assert pool.run(abs, -3) == 3
+    finally:
+        pool.shutdown()
+
+
+def test_timeout_excludes_queue():
+    """test calls waiting for a busy worker do not time out, and a stuck call only replaces its worker"""
+    pool = ParsePool(workers=2, timeout=2)
+    try:
+        with ThreadPoolExecutor(4) as threads:
+            stuck = threads.submit(pool.run, time.sleep, 10)
+            time.sleep(0.5)
+            # queued behind each other on the one other worker, for longer than the timeout
+            slow = [threads.submit(pool.run, time.sleep, 1) for __ in range(3)]
+            assert [i.result() for i in slow] == [None] * 3
+            with pytest.raises(ParseError, match="Timed out"):
+                stuck.result()
+        assert pool.restarts == 1
+    finally:
+        pool.shutdown()
@@ -0,0 +1,95 @@
+import asyncio
+import time
+import uuid
+import warnings
+
+import numpy as np
+import pytest
+from astropy import units as u
+from specutils import Spectrum
+
+from sdss_solara.components.pool import AppPool
+
+
+class FakeApp:
+    def __init__(self):
+        self.data_collection = []
+
+
+def factory():
+    return FakeApp(), None
+
+
+def wait_ready(pool, n, timeout=5):
+    start = time.monotonic()
+    while len(pool) < n and time.monotonic() - start < timeout:
+        time.sleep(0.01)
+
+
+def test_pool_hits():
+    """test we take warm apps from the pool, and it refills"""
+    pool = AppPool(factory, size=2)
+    pool.start()
+    wait_ready(pool, 2)
+
+    app, __ = pool.acquire()
+    assert isinstance(app, FakeApp)
+    wait_ready(pool, 2)
+    assert pool.stats()["hits"] == 1
+    assert pool.stats()["ready"] == 2
+    assert pool.stats()["built"] == 3
+
+
+def test_pool_discards_used():
+    """test we discard an unhealthy pooled app"""
+    pool = AppPool(factory, size=1)
+    pool.start()
+    wait_ready(pool, 1)
+    pool._items[0].value[0].data_collection.append("spec")
+
+    app, __ = pool.acquire()
+    assert app.data_collection == []
+    assert pool.stats()["discarded"] == 1
+    assert pool.stats()["misses"] == 1
+
+
+def test_pool_disabled():
+    """test an empty pool builds on demand"""
+    pool = AppPool(factory, size=0)
+    pool.start()
+    assert pool.acquire()[0].data_collection == []
+    assert pool.stats()["misses"] == 1
+
+
+def test_pool_adopts_app():
+    """test a pooled jdaviz app is adopted into each session, and the pool survives their close"""
+    pytest.importorskip("solara.server.starlette")
+    from solara.server import kernel, kernel_context
+
+    from sdss_solara.pages.jdaviz_embed import build_app
+
+    pool = AppPool(build_app, size=1)
+    pool.start()
+
+    async def session():
+        context = kernel_context.VirtualKernelContext(
+            id=str(uuid.uuid4()), kernel=kernel.Kernel(), session_id=str(uuid.uuid4())
+        )
+        with context:
+            wait_ready(pool, 1, timeout=120)
+            app, specviz = pool.acquire()
+            # the app widgets now talk to the session kernel
+            assert app.comm.kernel is context.kernel
+            assert app.model_id in context.widgets
+            specviz.load_data(
+                Spectrum(flux=np.ones(10) * u.Jy, spectral_axis=(np.arange(10) + 1.0) * u.AA), data_label="spec"
+            )
+            assert len(app.data_collection) == 1
+        context.close()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for __ in range(2):
+            asyncio.run(session())
+    assert pool.stats()["hits"] == 2
+    assert pool.stats()["discarded"] == 0
@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sdss_solara.io.prefetch import Prefetcher
+
+
+def test_prefetch_warms_files():
+    """test the prefetcher warms each file, ignoring failures"""
+    warmed = []
+
+    def warm(path):
+        if path == "bad":
+            raise OSError("missing")
+        warmed.append(path)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        prefetcher = Prefetcher(warm, executor).start(["a", "bad", "b"])
+    assert prefetcher.done
+    assert warmed == ["a", "b"]
+
+
+def test_prefetch_cancel():
+    """test cancelling skips the files not yet started"""
+    started, release = threading.Event(), threading.Event()
+    warmed = []
+
+    def warm(path):
+        started.set()
+        release.wait(5)
+        warmed.append(path)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        prefetcher = Prefetcher(warm, executor).start(["a", "b", "c"])
+        started.wait(5)
+        prefetcher.cancel()
+        release.set()
+    assert warmed == ["a"]
@@ -0,0 +1,30 @@
+import numpy as np
+from astropy.io import fits
+
+from sdss_solara.io.probe import probe_fits
+
+
+def test_probe_multispec(tmp_path):
+    """test we can find multiple spectra from the headers"""
+    path = tmp_path / "mwmVisit-0.8.0-54459273.fits"
+    empty = fits.BinTableHDU.from_columns([fits.Column(name="flux", format="10E")])
+    full = fits.BinTableHDU.from_columns(
+        [fits.Column(name="flux", format="10E", array=np.ones((3, 10)))]
+    )
+    fits.HDUList([fits.PrimaryHDU(), empty, full]).writeto(path)
+
+    probe = probe_fits(str(path))
+    assert probe.multispec
+    assert probe.ext_has_data == (False, True)
+    assert probe.multi_spec_per_ext == (False, True)
+    assert probe.fmt == "1D Spectrum List"
+
+
+def test_probe_single(tmp_path):
+    """test a single image spectrum is not multispec"""
+    path = tmp_path / "apStar-1.5-apo25m-2M00490869+6205128.fits"
+    fits.HDUList([fits.PrimaryHDU(), fits.ImageHDU()]).writeto(path)
+
+    probe = probe_fits(str(path))
+    assert not probe.multispec
+    assert probe.fmt == "1D Spectrum"
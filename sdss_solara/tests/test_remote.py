@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sdss_solara.io.remote import RemoteCache, RemoteFetchError, remote_url
+
+FILES = {"/sas/a.fits": b"a" * 1000, "/sas/b.fits": b"b" * 1000, "/sas/copy.fits": b"a" * 1000}
+
+
+class StubSas(BaseHTTPRequestHandler):
+    """stub handler serving files from the SAS"""
+
+    calls = []
+
+    def do_GET(self):
+        self.calls.append(self.path)
+        time.sleep(0.1)
+        body = FILES.get(self.path)
+        if self.path == "/sas/short.fits":
+            # promise more bytes than sent, as when a connection drops
+            self.send_response(200)
+            self.send_header("Content-Length", "2000")
+            self.end_headers()
+            self.wfile.write(b"x" * 100)
+            return
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(200 if self.path in FILES else 404)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def sas():
+    StubSas.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSas)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_fetch_cached_and_deduplicated(sas, tmp_path):
+    """test concurrent fetches share one download, and identical files one object"""
+    cache = RemoteCache(tmp_path)
+    with ThreadPoolExecutor(4) as pool:
+        paths = list(pool.map(cache.fetch, [f"{sas}/sas/a.fits"] * 4))
+    assert len(set(paths)) == 1
+    assert StubSas.calls == ["/sas/a.fits"]
+    with open(paths[0], "rb") as f:
+        assert f.read() == FILES["/sas/a.fits"]
+    assert paths[0].endswith(".fits")
+
+    assert cache.fetch(f"{sas}/sas/copy.fits") == paths[0]
+    assert cache.fetch(f"{sas}/sas/a.fits") == paths[0]
+    assert len(StubSas.calls) == 2
+    assert cache.size() == 1000
+
+
+def test_fetch_errors_leave_no_partial_files(sas, tmp_path):
+    """test failed and truncated downloads are not cached"""
+    cache = RemoteCache(tmp_path)
+    with pytest.raises(RemoteFetchError):
+        cache.fetch(f"{sas}/sas/missing.fits")
+    with pytest.raises(RemoteFetchError):
+        cache.fetch(f"{sas}/sas/short.fits")
+    assert os.listdir(cache.objects) == []
+
+
+def test_evict_least_recently_used(sas, tmp_path):
+    """test the oldest objects are evicted over the byte budget"""
+    cache = RemoteCache(tmp_path, max_bytes=1500)
+    a = cache.fetch(f"{sas}/sas/a.fits")
+    os.utime(a, (time.time() - 100, os.stat(a).st_mtime))
+    b = cache.fetch(f"{sas}/sas/b.fits")
+    assert not os.path.exists(a) and os.path.exists(b)
+    assert cache.lookup(f"{sas}/sas/a.fits") is None
+
+
+def test_remote_url(monkeypatch):
+    """test we map SAS paths to remote urls"""
+    monkeypatch.setenv("SAS_BASE_DIR", "/data/sas")
+    monkeypatch.delenv("SDSS_SOLARA_REMOTE_URL", raising=False)
+    path = "/data/sas/ipl-3/spectro/astra/mwmStar-0.6.0-1.fits"
+    assert remote_url(path, "IPL3") == "https://data.sdss5.org/sas/ipl-3/spectro/astra/mwmStar-0.6.0-1.fits"
+    assert remote_url("/data/sas/dr17/x.fits", "DR17") == "https://data.sdss.org/sas/dr17/x.fits"
+    monkeypatch.setenv("SDSS_SOLARA_REMOTE_URL", "http://localhost:8000/sas")
+    assert remote_url(path) == "http://localhost:8000/sas/ipl-3/spectro/astra/mwmStar-0.6.0-1.fits"
+
+
+def test_exists_many_remote(sas, tmp_path, monkeypatch):
+    """test files missing locally are checked on the remote SAS in remote mode"""
+    from sdss_solara.io import remote
+    from sdss_solara.io.access import exists_many, stat_cache
+
+    monkeypatch.setenv("SAS_BASE_DIR", str(tmp_path / "sas"))
+    monkeypatch.setenv("SDSS_SOLARA_REMOTE_URL", f"{sas}/sas")
+    monkeypatch.setattr(remote, "_remote_cache", RemoteCache(tmp_path / "cache"))
+    paths = [(tmp_path / "sas" / i).as_posix() for i in ("a.fits", "missing.fits")]
+
+    stat_cache.clear()
+    assert exists_many(paths, "IPL3") == {paths[0]: False, paths[1]: False}
+
+    stat_cache.clear()
+    monkeypatch.setenv("SDSS_SOLARA_REMOTE", "1")
+    assert exists_many(paths, "IPL3") == {paths[0]: True, paths[1]: False}
+    stat_cache.clear()
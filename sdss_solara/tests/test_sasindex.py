@@ -0,0 +1,66 @@
+import pytest
+
+from sdss_solara.io.sasindex import SasIndex
+
+
+FILES = [
+    "spectro/astra/spectra/star/92/73/mwmStar-0.8.0-54459273.fits",
+    "spectro/astra/spectra/visit/92/73/mwmVisit-0.8.0-54459273.fits",
+    "spectro/boss/redux/v6_2_1/spectra/epoch/lite/112XXX/112360/60287/spec-112360-60287-27021603143302004.fits",
+]
+
+
+@pytest.fixture()
+def sas(tmp_path, monkeypatch):
+    root = tmp_path / "sas"
+    for i in FILES:
+        path = root / "ipl-3" / i
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    monkeypatch.setenv("SAS_BASE_DIR", root.as_posix())
+    return root / "ipl-3"
+
+
+@pytest.fixture()
+def index(tmp_path):
+    return SasIndex(path=tmp_path / "index.sqlite", max_age=0)
+
+
+def test_query(sas, index):
+    """test we can query the index by release, sdssid and glob"""
+    files = sorted((sas / i).as_posix() for i in FILES)
+    assert index.query(release="IPL3", pattern="*.fits") == files
+    assert index.query(release="IPL3", sdssid=54459273, refresh=False) == files[:2]
+    assert index.query(pattern="*/spec-*", refresh=False) == files[2:]
+
+    rec = index.records(files[:1])[0]
+    assert rec["format"] == "SDSS-V mwm"
+    assert rec["label"] == "mwmStar-0.8.0-54459273"
+
+
+def test_incremental_refresh(sas, index):
+    """test a refresh only rescans changed directories"""
+    index.refresh("IPL3")
+    assert index.refresh("IPL3") == 0
+
+    new = sas / "spectro/astra/spectra/star/92/73/mwmStar-0.8.0-54459274.fits"
+    new.touch()
+    assert index.refresh("IPL3") == 1
+    assert new.as_posix() in index.query(release="IPL3", refresh=False)
+
+    new.unlink()
+    (sas / FILES[1]).unlink()
+    (sas / FILES[1]).parent.rmdir()
+    index.refresh("IPL3")
+    assert len(index.query(release="IPL3", refresh=False)) == 2
+
+
+def test_release_spellings(sas, index):
+    """test spellings of the same release share the index rows"""
+    files = sorted((sas / i).as_posix() for i in FILES)
+    assert index.refresh("IPL3") > 0
+    assert index.refresh("ipl-3") == 0
+    assert not SasIndex(path=index.path, max_age=300).is_stale("ipl-3")
+    assert index.query(release="ipl-3", refresh=False) == files
+    assert index.query(release="IPL3", refresh=False) == files
+    assert index.query(release="IPL-3", refresh=False) == files
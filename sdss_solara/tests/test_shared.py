@@ -0,0 +1,76 @@
+import gc
+import warnings
+
+import numpy as np
+import pytest
+from astropy import units as u
+from specutils import Spectrum
+
+from sdss_solara.benchmarks.fixtures import make_tree
+from sdss_solara.io.cache import read_spectrum, spectrum_cache
+from sdss_solara.io.shared import SharedStore, shared_store
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    """create a synthetic spec file, with a sidecar cache in the tmp dir"""
+    monkeypatch.setenv("SDSS_SOLARA_CACHE_DIR", str(tmp_path / "cache"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield make_tree(tmp_path / "sas", scale=0.1, cube=False)["spec"][0]
+
+
+def make_spectrum():
+    return Spectrum(flux=np.ones(10) * u.Jy, spectral_axis=(np.arange(10) + 1.0) * u.AA)
+
+
+def test_read_spectrum_shared(path):
+    """test sessions share one read-only, file-backed copy of a file"""
+    a = read_spectrum(Spectrum, path, "SDSS-V spec")
+    spectrum_cache.clear()
+    b = read_spectrum(Spectrum, path, "SDSS-V spec")
+    assert a is b
+    assert not a.flux.flags.writeable
+    assert isinstance(a.flux.base, np.memmap) or not a.flux.flags.owndata
+
+
+def test_pin_release():
+    """test pinned objects are held until every session releases them"""
+    store = SharedStore()
+    spec = store.register("key", make_spectrum())
+    assert not spec.flux.flags.writeable
+    assert store.register("key", make_spectrum()) is spec
+
+    assert store.pin(spec, "s1") and store.pin(spec, "s1") and store.pin(spec, "s2")
+    assert store.refcount("key") == 3
+    assert not store.pin(make_spectrum(), "s1")
+
+    # the store only holds a weak reference once unpinned
+    del spec
+    gc.collect()
+    store.unpin(store.get("key"), "s1")
+    store.release("s2")
+    assert store.refcount("key") == 1
+    assert store.get("key") is not None
+    store.release("s1")
+    gc.collect()
+    assert store.get("key") is None
+    assert store.stats()["pinned"] == 0
+
+
+def test_pin_without_session():
+    """test objects are not pinned outside of a session"""
+    spec = shared_store.register(("test", 0), make_spectrum())
+    assert not shared_store.pin(spec)
+    assert shared_store.refcount(("test", 0)) == 0
+
+
+def test_clear():
+    """test clearing the store drops the indexed objects and holds"""
+    store = SharedStore()
+    spec = store.register("key", make_spectrum())
+    store.pin(spec, "s1")
+    store.clear()
+    assert store.get("key") is None
+    assert store.refcount("key") == 0
+    assert store.stats() == {"hits": 0, "objects": 0, "pinned": 0, "sessions": 0}
@@ -0,0 +1,132 @@
+import os
+import time
+import warnings
+
+import numpy as np
+import pytest
+from astropy import units as u
+from astropy.io import fits
+from astropy.wcs import WCS
+from specutils import Spectrum, SpectrumList
+
+from sdss_solara.benchmarks.fixtures import make_tree
+from sdss_solara.io.sidecar import (
+    TMP_MAX_AGE,
+    evict_sidecars,
+    read_sidecar,
+    read_with_sidecar,
+    sidecar_dir,
+    write_sidecar,
+)
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    """create synthetic data files, with a sidecar cache in the tmp dir"""
+    monkeypatch.setenv("SDSS_SOLARA_CACHE_DIR", str(tmp_path / "cache"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield make_tree(tmp_path / "sas", scale=0.1, cube=False)
+
+
+@pytest.mark.parametrize(
+    "kind, cls, fmt", [("spec", Spectrum, "SDSS-V spec"), ("mwmStar", SpectrumList, "SDSS-V mwm")]
+)
+def test_sidecar_roundtrip(files, kind, cls, fmt):
+    """test spectra rebuilt from the sidecar match the parsed spectra"""
+    path = files[kind][0]
+    assert read_sidecar(cls, path, fmt) is None
+
+    parsed = read_with_sidecar(cls, path, fmt)
+    assert (sidecar_dir(path, fmt, cls.__name__) / "meta.json").exists()
+    cached = read_sidecar(cls, path, fmt)
+    assert type(cached) is cls
+
+    pairs = zip(parsed, cached) if cls is SpectrumList else [(parsed, cached)]
+    for a, b in pairs:
+        assert np.array_equal(a.flux, b.flux) and a.flux.unit == b.flux.unit
+        assert np.array_equal(a.spectral_axis, b.spectral_axis)
+        assert np.array_equal(a.mask, b.mask)
+        assert type(a.uncertainty) is type(b.uncertainty)
+        assert np.array_equal(a.uncertainty.array, b.uncertainty.array)
+        assert type(a.wcs) is type(b.wcs)
+        assert_meta_equal(a.meta, b.meta)
+
+
+def assert_meta_equal(a: dict, b: dict):
+    assert a.keys() == b.keys()
+    for key, value in a.items():
+        assert type(value) is type(b[key]), key
+        if isinstance(value, np.ndarray):
+            assert value.dtype == b[key].dtype and np.array_equal(value, b[key]), key
+        else:
+            assert value == b[key], key
+
+
+def test_sidecar_wcs_and_rest_frame(tmp_path):
+    """test a FITS WCS, the rest frame and meta survive the sidecar"""
+    path = tmp_path / "spec.fits"
+    path.write_bytes(b"")
+    wcs = WCS(naxis=1)
+    wcs.wcs.ctype, wcs.wcs.crval, wcs.wcs.cdelt, wcs.wcs.crpix, wcs.wcs.cunit = ["WAVE"], [4000], [2], [1], ["Angstrom"]
+    header = fits.Header({"OBJECT": "star", "EXPTIME": 900.0})
+    meta = {"header": header, "snr": np.arange(3.0), "obs": np.array([b"apo", b"lco"]), "z": 1.5 * u.km, "n": 3}
+    spec = Spectrum(
+        flux=np.ones(10) * u.Jy, wcs=wcs, redshift=0.1, velocity_convention="optical", rest_value=6563 * u.AA, meta=meta
+    )
+
+    assert write_sidecar(spec, str(path), "test")
+    cached = read_sidecar(Spectrum, str(path), "test")
+    assert isinstance(cached.wcs, WCS)
+    assert np.allclose(cached.spectral_axis, spec.spectral_axis)
+    assert float(cached.redshift) == pytest.approx(0.1)
+    assert cached.radial_velocity == spec.radial_velocity
+    assert cached.velocity_convention == "optical"
+    assert cached.rest_value == 6563 * u.AA
+    assert_meta_equal(spec.meta, cached.meta)
+
+
+def test_sidecar_unsupported_meta(tmp_path):
+    """test spectra with meta JSON cannot hold get no sidecar"""
+    path = tmp_path / "spec.fits"
+    path.write_bytes(b"")
+    spec = Spectrum(flux=np.ones(10) * u.Jy, spectral_axis=np.arange(1, 11) * u.AA, meta={"x": object()})
+    assert not write_sidecar(spec, str(path), "test")
+    assert read_sidecar(Spectrum, str(path), "test") is None
+
+
+def test_sidecar_invalidated(files):
+    """test a sidecar is ignored once the source file changes"""
+    path = files["spec"][0]
+    read_with_sidecar(Spectrum, path, "SDSS-V spec")
+    assert read_sidecar(Spectrum, path, "SDSS-V spec") is not None
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert read_sidecar(Spectrum, path, "SDSS-V spec") is None
+
+
+def test_evict_sidecars(files, tmp_path):
+    """test the least recently used sidecars and stale temporary dirs are removed"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        paths = make_tree(tmp_path / "sas3", ntargets=3, scale=0.1, cube=False)["spec"]
+    dirs = [sidecar_dir(i, "SDSS-V spec", "Spectrum") for i in paths]
+    for path in paths:
+        read_with_sidecar(Spectrum, path, "SDSS-V spec")
+    size = sum(f.stat().st_size for f in dirs[0].iterdir())
+
+    # the first sidecar was used last
+    for i, d in enumerate(dirs):
+        os.utime(d, (time.time() - 100 + i, time.time()))
+    read_sidecar(Spectrum, paths[0], "SDSS-V spec")
+
+    stale = dirs[0].parent / ".tmp-stale"
+    fresh = dirs[0].parent / ".tmp-fresh"
+    stale.mkdir()
+    fresh.mkdir()
+    os.utime(stale, (time.time() - 2 * TMP_MAX_AGE, time.time() - 2 * TMP_MAX_AGE))
+
+    evict_sidecars(dirs[0].parent, max_bytes=int(size * 2.5))
+    assert [d.exists() for d in dirs] == [True, False, True]
+    assert not stale.exists() and fresh.exists()
+    assert read_sidecar(Spectrum, paths[1], "SDSS-V spec") is None
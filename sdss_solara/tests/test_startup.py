@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from sdss_solara.benchmarks.startup import import_time_report, measure_import
+
+pytest.importorskip("solara")
+
+# import time budget, in seconds, for the app routes
+BUDGET = float(os.getenv("SDSS_SOLARA_IMPORT_BUDGET", 3))
+
+
+def test_routes_import_lazily():
+    """test the routes do not import the embed or dashboard stacks"""
+    elapsed, loaded = measure_import()
+    assert loaded == []
+    assert elapsed < BUDGET
+
+
+def test_import_time_report():
+    """test we can report the slowest imports"""
+    rows = import_time_report(top=5)
+    assert len(rows) == 5
+    assert rows[0][0] >= rows[-1][0]
+    assert any(name == "sdss_solara.pages.home" for __, __, name in rows)
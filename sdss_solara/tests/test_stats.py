@@ -0,0 +1,100 @@
+import numpy as np
+from astropy import units as u
+from specutils import Spectrum, SpectrumList
+
+from sdss_solara.io.stats import DatasetStats, combine, flux_stats, get_stats
+
+
+def make_spectrum(flux, mask=None):
+    """create a spectrum with a simple wavelength axis"""
+    flux = np.asarray(flux, dtype=float)
+    wave = np.linspace(4000, 9000, flux.size) * u.AA
+    return Spectrum(flux=flux * u.Jy, spectral_axis=wave, mask=mask)
+
+
+def test_flux_stats():
+    """test the stats match numpy and skip bad pixels"""
+    flux = np.random.default_rng(0).normal(10, 1, 1000)
+    flux[:10] = np.nan
+    mask = np.zeros(flux.size, dtype=bool)
+    mask[10] = True
+    flux[10] = 1e6
+    stats = flux_stats(flux * u.Jy, mask)
+    good = flux[11:]
+    assert stats.n == good.size
+    assert np.isclose(stats.lo, np.percentile(good, 1))
+    assert np.isclose(stats.median, np.median(good))
+    assert np.isclose(stats.hi, np.percentile(good, 99))
+    assert stats.max == good.max()
+    assert flux_stats([np.nan, np.inf]) is None
+
+
+def test_get_stats_cached():
+    """test stats are cached per object and combine over lists"""
+    a, b = make_spectrum(np.arange(100)), make_spectrum(np.arange(100, 300))
+    stats = get_stats(SpectrumList([a, b]))
+    assert stats.max == 299 and stats.n == 300
+    assert get_stats(a) is get_stats(a)
+
+
+def test_dataset_stats_incremental():
+    """test the combined stats update as datasets are added and removed"""
+    ds = DatasetStats()
+    assert ds.combined() is None
+    ds.add("a", make_spectrum(np.ones(100)))
+    assert ds.combined().max == 1
+    ds.add("b", make_spectrum(np.full(300, 500.0)))
+    combined = ds.combined()
+    assert combined.max == 500 and combined.median == 500 and combined.n == 400
+    assert combined == combine(list(ds.datasets.values()))
+    ds.discard("b")
+    assert ds.combined().max == 1
+
+
+def test_combine_mixed_units():
+    """test stats in other flux units are converted, and incompatible ones skipped"""
+    flam = u.Unit("1e-17 erg / (s cm2 Angstrom)")
+    wave = np.linspace(4000, 9000, 100) * u.AA
+    boss = Spectrum(flux=np.full(100, 10.0) * flam, spectral_axis=wave)
+    jy = boss.flux.to(u.Jy, equivalencies=u.spectral_density(6500 * u.AA))
+    mwm = Spectrum(flux=jy.value * 1000 * u.Jy, spectral_axis=wave)
+    counts = Spectrum(flux=np.full(100, 1e6) * u.ct, spectral_axis=wave)
+
+    ds = DatasetStats()
+    for label, spec in (("boss", boss), ("mwm", mwm), ("counts", counts)):
+        ds.add(label, spec)
+    combined = ds.combined(flam)
+    assert combined.unit == flam and combined.n == 200
+    assert np.isclose(combined.lo, 10) and np.isclose(combined.max, 1e4, rtol=0.01)
+
+    # in erg units, the limits scale, and the skipped counts stay skipped
+    scaled = ds.combined(u.Unit("erg / (s cm2 Angstrom)"))
+    assert np.isclose(scaled.lo, 1e-16) and scaled.n == 200
+    # the default unit is that of the first dataset
+    assert ds.combined().unit == flam
+
+
+def test_smart_resize_display_unit():
+    """test the y limits are set in the displayed flux unit of mixed unit spectra"""
+    import warnings
+
+    from sdss_solara.pages.jdaviz_embed import add_data, build_app, smart_resize
+
+    flam = u.Unit("1e-17 erg / (s cm2 Angstrom)")
+    wave = np.linspace(4000, 9000, 1000) * u.AA
+    flux = np.full(1000, 10.0)
+    flux[500] = 1e5
+    boss = Spectrum(flux=flux * flam, spectral_axis=wave)
+    mwm = Spectrum(flux=boss.flux.to(u.Jy, equivalencies=u.spectral_density(6500 * u.AA)), spectral_axis=wave)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        app, specviz = build_app()
+        add_data(specviz, "boss", boss, "1D Spectrum")
+        add_data(specviz, "mwm", mwm, "1D Spectrum")
+        smart_resize(specviz)
+
+    state = specviz._spectrum_viewer.state
+    expected = (10 * flam).to_value(state.y_display_unit) * 1.5
+    assert np.isclose(state.y_min, expected, rtol=0.05)
+    assert np.isclose(state.y_max, expected, rtol=0.05)
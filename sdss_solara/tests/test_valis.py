@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sdss_solara.io.valis import ValisClient
+
+
+FILES = {
+    "boss": ["spectro/boss/redux/v6_2_1/spectra/epoch/lite/112XXX/112360/60287/spec-112360-60287-27021603143302004.fits"],
+    "astra": ["spectro/astra/spectra/star/92/73/mwmStar-0.8.0-54459273.fits"],
+}
+
+
+class StubValis(BaseHTTPRequestHandler):
+    """stub handler for the valis target/pipelines route"""
+
+    calls = []
+
+    def do_GET(self):
+        self.calls.append(self.path)
+        time.sleep(0.1)
+        if self.path.endswith("/404"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps({"files": FILES}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def valis():
+    StubValis.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubValis)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_get_pipeline_files(valis):
+    """test we get and cache the target files"""
+    client = ValisClient(url=valis)
+    files = client.get_pipeline_files(54459273, "IPL3")
+    assert files == sum(FILES.values(), [])
+    assert client.get_pipeline_files("54459273", "IPL3") == files
+    assert StubValis.calls == ["/target/pipelines/54459273"]
+
+
+def test_coalesce_requests(valis):
+    """test concurrent requests share a single call"""
+    client = ValisClient(url=valis)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: client.get_pipeline_files(1, "IPL3"), range(8)))
+    assert all(i == results[0] for i in results)
+    assert len(StubValis.calls) == 1
+
+
+def test_not_found(valis):
+    """test a missing target returns no files"""
+    client = ValisClient(url=valis)
+    assert client.get_pipeline_files(404, "IPL3") == []